@@ -0,0 +1,74 @@
+"""
+Compares building a scene object by object against the batched build, on a scene of many transforms.
+
+Needs to run inside of Blender:
+blender --background --factory-startup --python benchmarks/bench_build.py -- --transforms 50000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import bpy
+import mathutils
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# blender doesn't put the folder of the script on the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from io_scene_maya import import_stats, maya_scene, maya_scene_importer
+
+import generate_scene
+
+
+def build(filepath, batched):
+    # start from an empty file, so both builds link into the same kind of scene
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+
+    scene = maya_scene.parse_scene(filepath)
+    stats = import_stats.ImportStats()
+    builder = maya_scene_importer.SceneBuilder(scene, bpy.context, mathutils.Matrix(), stats, batched=batched)
+
+    start = time.perf_counter()
+    builder.build_scene()
+    bpy.context.view_layer.update()
+    duration = time.perf_counter() - start
+
+    return duration, len(bpy.data.objects), stats
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("files", nargs="*", help=".ma files to build, a scene is generated without any")
+    arg_parser.add_argument("--transforms", type=int, default=50000)
+    arg_parser.add_argument("--meshes", type=int, default=1000)
+    arg_parser.add_argument("--depth", type=int, default=4, help="length of the transform parent chains")
+    args = arg_parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as scene_directory:
+        filepaths = args.files
+        if not filepaths:
+            filepaths = [os.path.join(scene_directory, "generated.ma")]
+            generate_scene.write_scene(
+                filepaths[0],
+                transforms=args.transforms,
+                meshes=args.meshes,
+                verts=8,
+                depth=args.depth,
+                unique_meshes=1,
+            )
+
+        for filepath in filepaths:
+            print(filepath)
+            for batched in (False, True):
+                duration, object_count, stats = build(filepath, batched)
+                print(f"  {'batched' if batched else 'per object':<12} {duration:8.3f}s {object_count} objects")
+                for line in stats.summary():
+                    print(f"    {line}")
+
+
+if __name__ == "__main__":
+    main()
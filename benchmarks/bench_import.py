@@ -0,0 +1,113 @@
+"""
+Times whole imports (parse and build) of .ma files into Blender, to compare checkouts of the add-on.
+
+Needs bpy, so it runs inside of Blender, or with the bpy module from pypi (pip install bpy):
+blender --background --factory-startup --python benchmarks/bench_import.py -- --output after.json
+python benchmarks/bench_import.py -- --package ../baseline-checkout --output before.json
+python benchmarks/bench_import.py -- --compare before.json
+
+Without any files the scenes of GENERATED_SCENES are generated and imported.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import bpy
+
+# blender doesn't put the folder of the script on the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import generate_scene
+
+# name -> generate_scene.write_scene arguments
+GENERATED_SCENES = {
+    # the defaults of generate_scene, a hundred meshes of a thousand vertices
+    "meshes.ma": {},
+    # lots of small objects, like set dressing
+    "transforms.ma": {"transforms": 10000, "meshes": 1000, "verts": 8, "depth": 4, "unique_meshes": 1},
+}
+
+
+def import_file(import_scene, filepath):
+    # start from an empty file, so every import links into the same kind of scene
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    
+    start = time.perf_counter()
+    import_scene(None, bpy.context, filepath)
+    bpy.context.view_layer.update()
+    return time.perf_counter() - start, len(bpy.data.objects)
+
+
+def compare(results, baseline):
+    print(f"compared to {baseline.get('label') or 'baseline'}")
+    for filename, file_result in results["files"].items():
+        baseline_result = baseline["files"].get(filename)
+        if baseline_result is None:
+            continue
+        
+        ratio = file_result["seconds"] / baseline_result["seconds"]
+        print(f"  {filename:<20} {baseline_result['seconds']:8.3f}s -> {file_result['seconds']:8.3f}s  x{ratio:.2f}")
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("files", nargs="*", help=".ma files to import")
+    arg_parser.add_argument("--package", default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            help="folder with the io_scene_maya to time, this checkout by default")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--label", default="", help="stored in the results, to tell runs apart")
+    arg_parser.add_argument("--output", help="json file to write the results to")
+    arg_parser.add_argument("--compare", help="json results of an earlier run to compare against")
+    args = arg_parser.parse_args(argv)
+    
+    sys.path.insert(0, os.path.abspath(args.package))
+    from io_scene_maya import maya_scene_importer
+    
+    results = {
+        "label": args.label,
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "blender": bpy.app.version_string,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "files": {},
+    }
+    
+    with tempfile.TemporaryDirectory() as scene_directory:
+        filepaths = args.files
+        if not filepaths:
+            for filename, scene_options in GENERATED_SCENES.items():
+                filepaths.append(os.path.join(scene_directory, filename))
+                generate_scene.write_scene(filepaths[-1], **scene_options)
+        
+        for filepath in filepaths:
+            runs = []
+            for _ in range(args.repeat):
+                duration, object_count = import_file(maya_scene_importer.import_scene, filepath)
+                runs.append(duration)
+            
+            results["files"][os.path.basename(filepath)] = {
+                "size": os.path.getsize(filepath),
+                "seconds": min(runs),
+                "runs": runs,
+                "objects": object_count,
+            }
+            print(f"{os.path.basename(filepath):<20} {min(runs):8.3f}s {object_count} objects")
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    
+    if args.compare:
+        with open(args.compare, "r") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Compares the from_pydata mesh builder against the foreach_set one on a synthetic grid mesh.
+
+Needs to run inside of Blender:
+blender --background --factory-startup --python benchmarks/bench_mesh_build.py -- --size 1000
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+import bpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from io_scene_maya import maya_scene, maya_scene_importer
+
+
+def grid_mesh_ma(size):
+    """
+    maya ascii text of a single size x size quad grid with one uv set
+    """
+    row = size + 1
+    horizontal_edge_count = size * row
+
+    def horizontal_edge(i, j):
+        return j * size + i
+
+    def vertical_edge(i, j):
+        return horizontal_edge_count + j * row + i
+
+    lines = [
+        'requires maya "2022";',
+        'createNode transform -n "grid";',
+        'createNode mesh -n "gridShape" -p "grid";',
+        '\tsetAttr ".uvst[0].uvsn" -type "string" "map1";',
+    ]
+
+    coordinates = " ".join(f"{i / size} {j / size}" for j in range(row) for i in range(row))
+    lines.append(f'\tsetAttr -s {row * row} ".uvst[0].uvsp[0:{row * row - 1}]" -type "float2" {coordinates};')
+
+    positions = " ".join(f"{i} 0 {j}" for j in range(row) for i in range(row))
+    lines.append(f'\tsetAttr -s {row * row} ".vt[0:{row * row - 1}]" {positions};')
+
+    edges = [f"{j * row + i} {j * row + i + 1} 0" for j in range(row) for i in range(size)]
+    edges += [f"{j * row + i} {(j + 1) * row + i} 0" for j in range(size) for i in range(row)]
+    lines.append(f'\tsetAttr -s {len(edges)} ".ed[0:{len(edges) - 1}]" {" ".join(edges)};')
+
+    faces = []
+    for j in range(size):
+        for i in range(size):
+            faces.append("f 4 {} {} {} {}".format(
+                horizontal_edge(i, j),
+                vertical_edge(i + 1, j),
+                -horizontal_edge(i, j + 1) - 1,
+                -vertical_edge(i, j) - 1,
+            ))
+            faces.append("mu 0 4 {} {} {} {}".format(
+                j * row + i,
+                j * row + i + 1,
+                (j + 1) * row + i + 1,
+                (j + 1) * row + i,
+            ))
+    lines.append(f'\tsetAttr -s {size * size} ".fc[0:{size * size - 1}]" -type "polyFaces" {" ".join(faces)};')
+
+    return "\n".join(lines).encode()
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--size", type=int, default=500, help="quads along each side of the grid")
+    args = arg_parser.parse_args(argv)
+
+    parser = maya_scene.SceneParser(io.BytesIO(grid_mesh_ma(args.size)))
+    parser.parse()
+    mesh_node = parser.scene.nodes[-1]
+
+    scene_builder = maya_scene_importer.SceneBuilder(parser.scene, bpy.context, None)
+
+    print(f"grid mesh of {args.size * args.size} faces")
+
+    for builder in (scene_builder.create_mesh_data_from_pydata, scene_builder.create_mesh_data):
+        start = time.perf_counter()
+        new_mesh = builder(mesh_node)
+        duration = time.perf_counter() - start
+
+        print(f"{builder.__name__}: {duration:.3f}s, {len(new_mesh.loops)} loops")
+        bpy.data.meshes.remove(new_mesh)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Times the parser on .ma files, no Blender needed.
+
+python benchmarks/bench_parse.py scene.ma --output results.json
+python benchmarks/bench_parse.py scene.ma --compare results.json
+
+Without any files a scene is generated with the defaults of generate_scene.py.
+Every phase is timed --repeat times and the fastest run is reported, peak memory
+comes from one more run of each phase with tracemalloc on, since tracing slows things down.
+The parsing phases get another run with an import_stats.ImportStats passed in,
+its times (tokenize, setAttr decode, ...) go into the results as the breakdown of the phase.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # windows
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from io_scene_maya import bl_info, import_stats, maya_parser_ascii, maya_scene, maya_scene_cache
+
+import generate_scene
+
+
+def phase_scan(filepath, context, stats=None):
+    with open(filepath, "rb") as f:
+        parser = maya_parser_ascii.MayaAsciiParser(f)
+        parser.stats = stats
+        parser.parse()
+
+
+def phase_scene_parse(filepath, context, stats=None):
+    context["scene"] = maya_scene.parse_scene(filepath, stats=stats)
+
+
+def phase_scene_parse_ranges(filepath, context, stats=None):
+    maya_scene.parse_scene(filepath, workers=context["workers"], stats=stats)
+
+
+def phase_mesh_arrays(filepath, context):
+    for node in context["scene"].nodes:
+        if isinstance(node, maya_scene.Mesh):
+            node.vertex_array()
+            node.face_arrays()
+            for uv_set_index in node.uv_data:
+                node.uv_arrays(uv_set_index)
+
+
+def phase_cache_store(filepath, context):
+    context["cache"].store(filepath, {}, context["scene"])
+
+
+def phase_cache_load(filepath, context):
+    context["cache"].load(filepath, {})
+
+
+# name, function, whether MB/s means anything for it, whether it takes an ImportStats
+PHASES = (
+    ("scan", phase_scan, True, True),
+    ("scene_parse", phase_scene_parse, True, True),
+    ("scene_parse_ranges", phase_scene_parse_ranges, True, True),
+    ("mesh_arrays", phase_mesh_arrays, False, False),
+    ("cache_store", phase_cache_store, False, False),
+    ("cache_load", phase_cache_load, False, False),
+)
+
+
+def peak_rss():
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on mac
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def bench_file(filepath, args):
+    file_size = os.path.getsize(filepath)
+    file_result = {"size": file_size, "phases": {}}
+
+    with tempfile.TemporaryDirectory() as cache_directory:
+        context = {
+            "workers": args.workers,
+            "cache": maya_scene_cache.ParseCache(cache_directory),
+        }
+
+        for phase_name, phase, measures_throughput, takes_stats in PHASES:
+            if phase_name == "scene_parse_ranges" and args.workers <= 1:
+                continue
+
+            durations = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                phase(filepath, context)
+                durations.append(time.perf_counter() - start)
+
+            phase_result = {
+                "seconds": min(durations),
+                "runs": durations,
+            }
+            if measures_throughput:
+                phase_result["mb_per_s"] = file_size / 1024 ** 2 / min(durations)
+
+            if args.memory:
+                tracemalloc.start()
+                phase(filepath, context)
+                phase_result["peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+            # timing every command slows the parse down, so the breakdown gets a run of its own
+            if takes_stats and args.stats:
+                stats = import_stats.ImportStats()
+                phase(filepath, context, stats)
+                phase_result["stats"] = stats.to_dict()
+
+            file_result["phases"][phase_name] = phase_result
+            print(f"  {phase_name:<20} {format_phase(phase_result)}")
+            if "stats" in phase_result:
+                print(f"    {format_stats(phase_result['stats'])}")
+
+    scene = context["scene"]
+    file_result["nodes"] = len(scene.nodes)
+    file_result["meshes"] = sum(isinstance(node, maya_scene.Mesh) for node in scene.nodes)
+    return file_result
+
+
+def format_phase(phase_result):
+    text = f"{phase_result['seconds']:8.3f}s"
+    if "mb_per_s" in phase_result:
+        text += f" {phase_result['mb_per_s']:8.1f} MB/s"
+    if "peak_traced_bytes" in phase_result:
+        text += f" {phase_result['peak_traced_bytes'] / 1024 ** 2:8.1f} MB peak"
+    return text
+
+
+def format_stats(stats):
+    times = sorted(stats["times"].items(), key=lambda item: -item[1])
+    return ", ".join(f"{name} {seconds:.3f}s" for name, seconds in times)
+
+
+def compare(results, baseline):
+    """
+    print the time of every phase relative to the same phase in the baseline
+    """
+    for filename, file_result in results["files"].items():
+        baseline_phases = baseline["files"].get(filename, {}).get("phases", {})
+        print(f"{filename} compared to {baseline.get('label') or 'baseline'}")
+
+        for phase_name, phase_result in file_result["phases"].items():
+            baseline_phase = baseline_phases.get(phase_name)
+            if baseline_phase is None:
+                continue
+
+            ratio = phase_result["seconds"] / baseline_phase["seconds"]
+            print(f"  {phase_name:<20} {baseline_phase['seconds']:8.3f}s -> {phase_result['seconds']:8.3f}s  x{ratio:.2f}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("files", nargs="*", help=".ma files to parse")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--workers", type=int, default=1, help="also time parsing byte ranges in this many processes")
+    arg_parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip the tracemalloc runs")
+    arg_parser.add_argument("--no-stats", dest="stats", action="store_false", help="skip the runs with ImportStats")
+    arg_parser.add_argument("--label", default="", help="stored in the results, to tell runs apart")
+    arg_parser.add_argument("--output", help="json file to write the results to")
+    arg_parser.add_argument("--compare", help="json results of an earlier run to compare against")
+    args = arg_parser.parse_args()
+
+    # byte ranges are only parsed in parallel above a certain size
+    maya_scene.PARALLEL_PARSE_MIN_SIZE = 0
+
+    with tempfile.TemporaryDirectory() as scene_directory:
+        filepaths = args.files
+        if not filepaths:
+            filepaths = [os.path.join(scene_directory, "generated.ma")]
+            generate_scene.write_scene(filepaths[0])
+
+        results = {
+            "label": args.label,
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "version": list(bl_info["version"]),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "files": {},
+        }
+
+        for filepath in filepaths:
+            print(filepath)
+            results["files"][os.path.basename(filepath)] = bench_file(filepath, args)
+
+    results["peak_rss_bytes"] = peak_rss()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
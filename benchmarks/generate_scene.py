@@ -0,0 +1,166 @@
+"""
+Writes synthetic .ma files to benchmark the parser with.
+
+python benchmarks/generate_scene.py scene.ma --transforms 1000 --meshes 500 --verts 2000 --uv-sets 2 --depth 4 --unsupported 0.3
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+# cycled through for the nodes the importer doesn't support
+UNSUPPORTED_NODE_TYPES = ("shadingEngine", "groupId", "polyTweak")
+
+
+def _numbers(values, number_format="%.6g"):
+    return " ".join(map(number_format.__mod__, np.asarray(values).ravel().tolist()))
+
+
+def _integers(values):
+    return _numbers(values, "%d")
+
+
+def mesh_commands(name, parent, vert_count, uv_set_count, rng):
+    """
+    a strip of quads with about vert_count vertices, two rows of vertices along the strip
+    """
+    columns = max(2, vert_count // 2)
+    vert_count = columns * 2
+    quad_count = columns - 1
+
+    yield f'createNode mesh -n "{name}" -p "{parent}";'
+    yield '\tsetAttr -k off ".v";'
+
+    column = np.arange(quad_count)
+
+    for uv_set in range(uv_set_count):
+        yield f'\tsetAttr ".uvst[{uv_set}].uvsn" -type "string" "map{uv_set + 1}";'
+        yield (f'\tsetAttr -s {vert_count} ".uvst[{uv_set}].uvsp[0:{vert_count - 1}]" -type "float2" '
+               f'{_numbers(rng.random((vert_count, 2)))};')
+
+    yield '\tsetAttr ".cuvs" -type "string" "map1";'
+
+    positions = np.zeros((vert_count, 3))
+    positions[:columns, 0] = positions[columns:, 0] = np.arange(columns)
+    positions[columns:, 2] = 1
+    positions += rng.random((vert_count, 3)) * 0.1
+    yield f'\tsetAttr -s {vert_count} ".vt[0:{vert_count - 1}]" {_numbers(positions)};'
+
+    # bottom row, top row, then the edges across
+    edges = np.concatenate([
+        np.stack([column, column + 1, np.zeros_like(column)], axis=1),
+        np.stack([column + columns, column + columns + 1, np.zeros_like(column)], axis=1),
+        np.stack([np.arange(columns), np.arange(columns) + columns, np.ones(columns, dtype=int)], axis=1),
+    ])
+    yield f'\tsetAttr -s {len(edges)} ".ed[0:{len(edges) - 1}]" {_integers(edges)};'
+
+    bottom = column
+    top = column + quad_count
+    across = column + quad_count * 2
+    face_edges = np.stack([bottom, across + 1, -top - 1, -across - 1], axis=1)
+    face_verts = np.stack([column, column + 1, column + columns + 1, column + columns], axis=1)
+
+    faces = []
+    for edge_ids, vert_ids in zip(face_edges.tolist(), face_verts.tolist()):
+        faces.append("f 4 " + _integers(edge_ids))
+        for uv_set in range(uv_set_count):
+            faces.append(f"mu {uv_set} 4 " + _integers(vert_ids))
+    yield f'\tsetAttr -s {quad_count} ".fc[0:{quad_count - 1}]" -type "polyFaces" {" ".join(faces)};'
+
+
+def unsupported_node_commands(name, index, vert_count, rng):
+    nodetype = UNSUPPORTED_NODE_TYPES[index % len(UNSUPPORTED_NODE_TYPES)]
+    yield f'createNode {nodetype} -n "{name}";'
+    yield '\tsetAttr ".ihi" 0;'
+
+    if nodetype == "polyTweak":
+        yield (f'\tsetAttr -s {vert_count} ".tk[0:{vert_count - 1}]" -type "float3" '
+               f'{_numbers(rng.random((vert_count, 3)))};')
+
+
+def scene_commands(transforms=100, meshes=100, verts=1000, uv_sets=1, depth=1, unsupported=0.0, seed=0,
+                   unique_meshes=None):
+    """
+    transforms are parented in chains of depth, meshes are spread evenly over the transforms,
+    unsupported is the share of all nodes that are of a type the importer skips,
+    with unique_meshes the meshes are copies of that many different ones, like set dressing
+    """
+    rng = np.random.default_rng(seed)
+    meshes = min(meshes, transforms)
+    depth = max(depth, 1)
+
+    yield "//Maya ASCII 2022 scene"
+    yield "//Name: synthetic.ma"
+    yield 'requires maya "2022";'
+    yield "currentUnit -l centimeter -a degree -t film;"
+    yield 'fileInfo "application" "maya";'
+
+    supported_count = transforms + meshes
+    unsupported_count = round(supported_count * unsupported / (1 - unsupported)) if unsupported < 1 else 0
+
+    mesh_transforms = {mesh * transforms // meshes: mesh for mesh in range(meshes)} if meshes else {}
+
+    unsupported_written = 0
+    for transform in range(transforms):
+        name = f"transform{transform}"
+        parent = f' -p "transform{transform - 1}"' if transform % depth else ""
+
+        yield f'createNode transform -n "{name}"{parent};'
+        yield f'\tsetAttr ".t" -type "double3" {_numbers(rng.random(3) * 10)} ;'
+        yield f'\tsetAttr ".r" -type "double3" {_numbers(rng.random(3) * 360)} ;'
+        yield '\tsetAttr ".s" -type "double3" 1 1 1 ;'
+
+        if transform in mesh_transforms:
+            mesh = mesh_transforms[transform]
+            mesh_rng = rng
+            if unique_meshes:
+                mesh_rng = np.random.default_rng([seed, mesh % unique_meshes])
+            yield from mesh_commands(f"mesh{mesh}Shape", name, verts, uv_sets, mesh_rng)
+
+        # spread the unsupported nodes evenly between the supported ones
+        unsupported_due = unsupported_count * (transform + 1) // transforms
+        while unsupported_written < unsupported_due:
+            yield from unsupported_node_commands(f"unsupported{unsupported_written}", unsupported_written, verts, rng)
+            unsupported_written += 1
+
+    yield 'select -ne :time1;'
+    yield '\tsetAttr ".o" 1;'
+    yield "// End of synthetic.ma"
+
+
+def write_scene(filepath, **kwargs):
+    with open(filepath, "w", newline="\n") as f:
+        for command in scene_commands(**kwargs):
+            f.write(command)
+            f.write("\n")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("output", help=".ma file to write")
+    arg_parser.add_argument("--transforms", type=int, default=100)
+    arg_parser.add_argument("--meshes", type=int, default=100, help="at most one per transform")
+    arg_parser.add_argument("--verts", type=int, default=1000, help="vertices per mesh")
+    arg_parser.add_argument("--uv-sets", type=int, default=1)
+    arg_parser.add_argument("--depth", type=int, default=1, help="length of the transform parent chains")
+    arg_parser.add_argument("--unsupported", type=float, default=0.0, help="share of nodes of unsupported types, 0-1")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--unique-meshes", type=int, help="make the meshes copies of this many different ones")
+    args = arg_parser.parse_args(argv)
+
+    write_scene(
+        args.output,
+        transforms=args.transforms,
+        meshes=args.meshes,
+        verts=args.verts,
+        uv_sets=args.uv_sets,
+        depth=args.depth,
+        unsupported=args.unsupported,
+        seed=args.seed,
+        unique_meshes=args.unique_meshes,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
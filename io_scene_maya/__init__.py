@@ -10,90 +10,18 @@ bl_info = {
     "category": "Import-Export",
 }
 
-import os
-import bpy
-from bpy.props import (
-        StringProperty,
-        CollectionProperty,
-        )
-
-from bpy_extras.io_utils import (
-    ImportHelper,
-    orientation_helper,
-    axis_conversion,
-)
-
-
-@orientation_helper(axis_forward='-Z', axis_up='Y')
-class ImportMA(bpy.types.Operator, ImportHelper):
-    """Load an Autodesk Maya .ma File"""
-    bl_idname = "import_scene.maya_ascii"
-    bl_label = "Import Maya ASCII Scene"
-    bl_options = {'PRESET', 'UNDO'}
-
-    filename_ext = ".ma"
-    filter_glob: StringProperty(
-        default="*.ma",
-        options={'HIDDEN'},
-    )
-    
-    # Selected files
-    files: CollectionProperty(type=bpy.types.PropertyGroup)
-
-    def execute(self, context):
-        from . import maya_scene_importer
-
-        keywords = self.as_keywords(ignore=("axis_forward",
-                                            "axis_up",
-                                            "filter_glob",
-                                            ))
-
-        global_matrix = axis_conversion(
-            from_forward=self.axis_forward,
-            from_up=self.axis_up,
-        ).to_4x4()
-        
-        keywords["correction_matrix"] = global_matrix
-
-        folder = os.path.dirname(self.filepath)
-        
-        failed_files = []
-        for file in self.files:
-            file_path = os.path.join(folder, file.name)
-            
-            keywords["filepath"] = file_path
-            res = maya_scene_importer.import_scene(self, context, **keywords)
-            
-            if res != {"FINISHED"}:
-                failed_files.append(res)
-        
-        if failed_files:
-            return {"CANCELLED"}
-        
-        return {"FINISHED"}
-
-
-def menu_func_import(self, context):
-    self.layout.operator(ImportMA.bl_idname, text="Maya ASCII Scene (.ma)")
-
-
-classes = (
-    ImportMA,
-)
+# bpy is only imported by the operators, the parsing modules of this package
+# are also imported without blender, by the worker processes that parse files for one
 
 
 def register():
-    for cls in classes:
-        bpy.utils.register_class(cls)
-
-    bpy.types.TOPBAR_MT_file_import.append(menu_func_import)
+    from . import operators
+    operators.register()
 
 
 def unregister():
-    bpy.types.TOPBAR_MT_file_import.remove(menu_func_import)
-
-    for cls in classes:
-        bpy.utils.unregister_class(cls)
+    from . import operators
+    operators.unregister()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,136 @@
+"""
+Converts Maya scenes without Blender, to check or process lots of files at once.
+
+python -m io_scene_maya scenes/*.ma --output converted
+python -m io_scene_maya "assets/**/*.ma" --format npz --workers 8
+
+Every file becomes an .obj of its meshes and a .json of its node hierarchy (or an .npz of the parsed scene),
+see maya_scene_export. Files are converted in a pool of worker processes.
+"""
+
+import argparse
+import glob
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from . import maya_scene_export
+
+
+def expand_filepaths(patterns):
+    """
+    files and glob patterns ("**" included) to a list of files, in the order given
+    """
+    filepaths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        for filepath in matches:
+            if os.path.isfile(filepath) and filepath not in filepaths:
+                filepaths.append(filepath)
+    return filepaths
+
+
+def convert_files(filepaths, stems, workers, convert_options):
+    """
+    yields (filepath, summary, error) per file as they're done
+    workers is the number of processes to convert with, every CPU when it's None
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    
+    # the workers are put to use on the byte ranges of a single file instead
+    file_workers = workers
+    workers = min(workers, len(filepaths))
+    
+    if workers <= 1:
+        for filepath, stem in zip(filepaths, stems):
+            yield _convert(filepath, stem, dict(convert_options, workers=file_workers))
+        return
+    
+    # spawn, like maya_scene.parse_scenes, so it behaves the same on every platform
+    executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        futures = {
+            executor.submit(maya_scene_export.convert_file, filepath, stem, **convert_options): (filepath, stem)
+            for filepath, stem in zip(filepaths, stems)
+        }
+        
+        for future in as_completed(futures):
+            filepath, stem = futures[future]
+            try:
+                yield filepath, future.result(), None
+            except BrokenProcessPool:
+                print(f"Converting in worker processes failed, converting '{filepath}' here instead.")
+                yield _convert(filepath, stem, convert_options)
+            except Exception as e:
+                yield filepath, None, f"{type(e).__name__}: {e}"
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _convert(filepath, stem, convert_options):
+    try:
+        return filepath, maya_scene_export.convert_file(filepath, stem, **convert_options), None
+    except Exception as e:
+        return filepath, None, f"{type(e).__name__}: {e}"
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m io_scene_maya",
+        description="Convert Maya scenes (.ma, compressed .ma) to .obj + .json or .npz, without Blender. "
+                    ".mb files only give their transforms and cameras, their meshes can't be read yet",
+    )
+    arg_parser.add_argument("files", nargs="+", help="files or glob patterns, quote patterns with ** in them")
+    arg_parser.add_argument("--output", "-o", default=".",
+                            help="folder to write to, the current one by default. the folders of the files are kept below it")
+    arg_parser.add_argument("--format", choices=maya_scene_export.OUTPUT_FORMATS, default="obj")
+    arg_parser.add_argument("--workers", "-j", type=int, help="processes to convert with, every CPU by default")
+    arg_parser.add_argument("--no-uvs", action="store_true", help="skip reading uv sets")
+    arg_parser.add_argument("--no-cameras", action="store_true", help="leave out camera nodes")
+    arg_parser.add_argument("--no-hidden", action="store_true", help="leave out hidden nodes")
+    arg_parser.add_argument("--no-references", action="store_true", help="don't bring in referenced files")
+    arg_parser.add_argument("--quiet", "-q", action="store_true", help="only print failures and the totals")
+    args = arg_parser.parse_args(argv)
+    
+    filepaths = expand_filepaths(args.files)
+    if not filepaths:
+        print("No files found")
+        return 1
+    
+    stems = maya_scene_export.output_stems(filepaths, args.output)
+    
+    convert_options = dict(
+        output_format=args.format,
+        import_references=not args.no_references,
+        import_uvs=not args.no_uvs,
+        import_cameras=not args.no_cameras,
+        import_hidden=not args.no_hidden,
+    )
+    
+    start = time.perf_counter()
+    failed_count = 0
+    for filepath, summary, error in convert_files(filepaths, stems, args.workers, convert_options):
+        if error is not None:
+            failed_count += 1
+            print(f"FAILED {filepath}: {error}")
+            continue
+        
+        if not args.quiet:
+            print(f"{filepath}: {summary['nodes']} nodes, {summary['meshes']} meshes in {summary['seconds']:.2f}s")
+            for warning in summary["warnings"]:
+                print(f"  {warning}")
+    
+    duration = time.perf_counter() - start
+    converted_count = len(filepaths) - failed_count
+    print(f"Converted {converted_count} of {len(filepaths)} file(s) in {duration:.2f}s, "
+          f"{converted_count / duration if duration else 0:.1f} files/s")
+    
+    return 1 if failed_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Timings and counters of an import, to tell where the time of a slow import goes.
+
+Everything that records into an ImportStats takes None to mean it's turned off,
+and checks for that before doing any timing at all.
+"""
+
+import contextlib
+import json
+import os
+import threading
+from time import perf_counter
+
+# order of the phases in the summary, anything else comes after.
+# mesh build contains the polyFaces resolution and uv build
+SUMMARY_PHASES = (
+    "file read",
+    "cache load",
+    "tokenize",
+    "command dispatch",
+    "setAttr decode",
+    "polyFaces decode",
+    "polyFaces resolution",
+    "mesh build",
+    "uv build",
+)
+
+
+class ImportStats(object):
+    """
+    wall time per phase, counters, and the individual timed blocks for a chrome trace.
+
+    phases timed with add_time (once per command) are only totals,
+    phases timed with phase() also end up as blocks in the trace
+    """
+
+    def __init__(self):
+        self.times = {}
+        self.counters = {}
+        self.node_types = {}
+
+        # chrome trace "complete" events
+        self.events = []
+
+    def add_time(self, name, seconds):
+        self.times[name] = self.times.get(name, 0.0) + seconds
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def count_node(self, nodetype):
+        self.node_types[nodetype] = self.node_types.get(nodetype, 0) + 1
+
+    @contextlib.contextmanager
+    def phase(self, name, **args):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            end = perf_counter()
+            self.add_time(name, end - start)
+            self.events.append({
+                "name": name,
+                "ph": "X",
+                "ts": start * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": args,
+            })
+
+    def merge(self, other):
+        """
+        add the stats of another process (or file) to these
+        """
+        for name, seconds in other.times.items():
+            self.add_time(name, seconds)
+        for name, amount in other.counters.items():
+            self.count(name, amount)
+        for nodetype, amount in other.node_types.items():
+            self.node_types[nodetype] = self.node_types.get(nodetype, 0) + amount
+        self.events.extend(other.events)
+
+    def to_dict(self):
+        return {
+            "times": dict(self.times),
+            "counters": dict(self.counters),
+            "node_types": dict(self.node_types),
+        }
+
+    def summary(self):
+        """
+        a few lines of text for the operator report
+        """
+        phases = [name for name in SUMMARY_PHASES if name in self.times]
+        phases += sorted(name for name in self.times if name not in SUMMARY_PHASES)
+
+        lines = ["Import times: " + ", ".join(f"{name} {self.times[name]:.2f}s" for name in phases)]
+
+        counters = [f"{name} {amount:,}" for name, amount in sorted(self.counters.items())]
+        if counters:
+            lines.append("Counts: " + ", ".join(counters))
+
+        if self.node_types:
+            most_common = sorted(self.node_types.items(), key=lambda item: -item[1])[:8]
+            lines.append("Nodes: " + ", ".join(f"{nodetype} {amount:,}" for nodetype, amount in most_common))
+
+        return lines
+
+    def write_chrome_trace(self, filepath):
+        """
+        open in chrome://tracing or https://ui.perfetto.dev
+        """
+        with open(filepath, "w") as f:
+            json.dump({
+                "traceEvents": self.events,
+                "displayTimeUnit": "ms",
+                "otherData": self.to_dict(),
+            }, f)
+
+
+def phase(stats, name, **args):
+    """
+    stats.phase(), or nothing when stats is None
+    """
+    if stats is None:
+        return contextlib.nullcontext()
+    return stats.phase(name, **args)
@@ -18,7 +18,15 @@ The above copyright notice and this permission notice shall be included in all c
 THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
+import io
 import json
+import mmap
+import os
+import re
+import warnings
+from time import perf_counter
+
+import numpy as np
 
 from . import maya_parser_common as common
 
@@ -33,32 +41,51 @@ class MayaAsciiParserBase(common.MayaParserBase):
             "requires": self._exec_requires,
             "fileInfo": self._exec_file_info,
             "file": self._exec_file,
+            "currentUnit": self._exec_current_unit,
             "createNode": self._exec_create_node,
             "setAttr": self._exec_set_attr,
+            "select": self._exec_select,
+            "connectAttr": self._exec_connect_attr,
         }
+        
+        # set while the setAttr commands that follow can be skipped without tokenizing them
+        self._skip_set_attr = False
+        
+        # an import_stats.ImportStats to record timings and counts into, None records nothing
+        self.stats = None
+
+    def skip_node_attrs(self):
+        """
+        skip the remaining setAttr commands of the current node,
+        call from on_create_node (or on_select / on_set_attr) when the node is of no interest
+        """
+        self._skip_set_attr = True
 
-    def on_comment(self, value):
-        pass
+    def wants_set_attr(self, name):
+        """
+        return False to skip an attribute before its value is decoded
+        """
+        return True
 
     def register_handler(self, command, handler):
+        """
+        handler gets the tokenized args of the command and returns its record, or None to leave it out
+        """
         self.__command_handlers[command] = handler
 
     def exec_command(self, command, args):
         handler = self.__command_handlers.get(command, None)
         if handler is not None:
-            handler(args)
+            return handler(args)
 
     def has_command(self, command):
         return command in self.__command_handlers
 
     def _exec_requires(self, args):
-        if args[0] == "maya":
-            self.on_requires_maya(args[1])
-        else:
-            self.on_requires_plugin(args[0], args[1])
+        return common.Requires(args[0], args[1])
 
     def _exec_file_info(self, args):
-        self.on_file_info(args[0], args[1])
+        return common.FileInfo(args[0], args[1])
 
     def _exec_file(self, args):
         reference = False
@@ -85,14 +112,39 @@ class MayaAsciiParserBase(common.MayaParserBase):
             elif arg in ("-rfn", "--referenceNode"):
                 reference_node = args[argptr + 1]
                 argptr += 2
-            elif arg in ('-op'):
+            elif is_flag(arg):
+                # -op "v=0;", -typ "mayaAscii", -shd "renderLayersByName", ...
                 argptr += 2
             else:
                 break
 
-        if argptr < len(args):
+        # the -rdi lines only describe the nesting of the references, the -r ones are what this file references
+        if reference and argptr < len(args):
             path = args[argptr]
-            self.on_file_reference(path)
+            return common.FileReference(path, namespace, reference_node, defer_reference)
+
+    def _exec_current_unit(self, args):
+        # currentUnit -l centimeter -a degree -t film;
+        angle = None
+        linear = None
+        time = None
+
+        argptr = 0
+        while argptr + 1 < len(args):
+            arg = args[argptr]
+            if arg in ("-a", "-angle", "--angle"):
+                angle = args[argptr + 1]
+                argptr += 2
+            elif arg in ("-l", "-linear", "--linear"):
+                linear = args[argptr + 1]
+                argptr += 2
+            elif arg in ("-t", "-time", "--time"):
+                time = args[argptr + 1]
+                argptr += 2
+            else:
+                argptr += 1
+
+        return common.CurrentUnit(angle, linear, time)
 
     def _exec_create_node(self, args):
         nodetype = args[0]
@@ -114,7 +166,39 @@ class MayaAsciiParserBase(common.MayaParserBase):
             else:
                 raise MayaAsciiError("Unexpected argument: %s" % arg)
 
-        self.on_create_node(nodetype, name, parent)
+        self._skip_set_attr = False
+        
+        if self.stats is not None:
+            self.stats.count_node(nodetype)
+        
+        return common.CreateNode(nodetype, name, parent)
+
+    def _exec_select(self, args):
+        # select -ne :time1;
+        # the setAttr commands that follow apply to the selected node
+        names = [arg for arg in args if not is_flag(arg)]
+        if not names:
+            return None
+        
+        self._skip_set_attr = False
+        return common.Select(names[-1])
+
+    def _exec_connect_attr(self, args):
+        # connectAttr "pCubeShape1.iog" "initialShadingGroup.dsm" -na;
+        plugs = []
+        argptr = 0
+        while argptr < len(args):
+            arg = args[argptr]
+            if arg in ("-l", "-lock"):
+                argptr += 2
+                continue
+            if not is_flag(arg):
+                plugs.append(arg)
+            argptr += 1
+        
+        if len(plugs) < 2:
+            return None
+        return common.ConnectAttr(plugs[0], plugs[1])
 
     def _exec_set_attr(self, args):
         """
@@ -138,72 +222,90 @@ class MayaAsciiParserBase(common.MayaParserBase):
         
         name = None  # attribute_name
         attrtype = None
-        data_index_start = 0
+        size = None  # element count from -s, lets the receiver preallocate
         
-        skip_next_arg = False
-        for arg in args:
-            
-            if skip_next_arg:
-                data_index_start += 1
-                skip_next_arg = False
-                continue
-            
-            # unless a special case comes up, the values should start on this index
-            data_has_started = True
+        # the tokenizer hands over bulk values as one undecoded block after the other args
+        raw = None
+        if args and type(args[-1]) is RawData:
+            raw = args.pop()
+        
+        data_index_start = 0
+        arg_count = len(args)
+        while data_index_start < arg_count:
+            arg = args[data_index_start]
             
             # the first arg with a dot should be the attr name
-            if '.' in arg and name is None:
+            is_name = name is None and '.' in arg
+            if is_name:
                 name = arg
-                data_has_started = False
-                
-            # deal with setAttr args
+            
+            # deal with setAttr args, is_flag() written out since this runs for every command
             # might be safer to list all setAttr arguments, since "-" can show up elsewhere
             if "-" in arg and arg.strip("-").isalpha():
-                data_has_started = False
+                flag_arg = args[data_index_start + 1] if data_index_start + 1 < arg_count else None
                 
                 if arg in ("-type", "--type"):
-                    attrtype = args[data_index_start + 1]
+                    attrtype = flag_arg
+                
+                if arg in ("-s", "--size") and flag_arg is not None:
+                    size = int(flag_arg)
                 
                 # alteredValue doesn't have any arguments apparently
                 if not "-av" in arg:
-                    skip_next_arg = True
+                    data_index_start += 1
             
-            # break the loop so we don't have to iterate all the args
-            if data_has_started:
+            # everything from here on is data
+            elif not is_name:
                 break
             
-            # keep adding until we've dealt with everything non-data
             data_index_start += 1
         
+        if name is None or not self.wants_set_attr(name):
+            return None
+        
+        plug = common.parse_plug(name)
         value = args[data_index_start:]
         
-        # sometimes attrtype is set, sometimes it isn't, so there's some redundancy happening below
-        if attrtype == "double3" or attrtype == "float3":
-            value = [float(f) for f in value]
+        # bulk data goes straight from the value text into a typed array
+        bulk_type = bulk_attr_type(plug)
+        if bulk_type is not None:
+            if self.stats is not None:
+                decode_start = perf_counter()
+            
+            dtype, width = BULK_ARRAY_TYPES[bulk_type]
+            if raw is not None:
+                value = raw.array(dtype, width, plug.element_count)
+            else:
+                # short commands come tokenized, numpy converts a few strings quicker than it joins and parses them
+                value = as_array(value, dtype, width)
+            
+            if self.stats is not None:
+                self.stats.add_time("setAttr decode", perf_counter() - decode_start)
+            
+            return common.SetAttr(name, value, bulk_type, True, size)
         
-        if ".uvsp[" in name:
-            float_converted = [float(f) for f in value]
-            value = list(chunks(float_converted, 2))
-            attrtype = "float2"
+        # enforce polyFaces type for ".fc"
+        if plug.path == "fc":
+            if self.stats is not None:
+                decode_start = perf_counter()
+            
+            if raw is not None:
+                value = raw.poly_faces()
+            else:
+                value = decode_poly_face_tokens(value)
             
-        elif ".pt[" in name and ":" in name:
-            float_converted = [float(f) for f in value]
-            value = list(chunks(float_converted, 3))
-            attrtype = "double3Array"
+            if self.stats is not None:
+                self.stats.add_time("polyFaces decode", perf_counter() - decode_start)
+            
+            return common.SetAttr(name, value, "polyFaces", True, size)
         
-        elif ".vt[" in name and not "vl" in name:
-            float_converted = [float(f) for f in value]
-            value = list(chunks(float_converted, 3))
-            attrtype = "vtx" # not a real type, just for convenience
+        # only values still being read come as raw text
+        if raw is not None:
+            value.extend(raw.tokens())
         
-        elif ".ed[" in name:
-            int_converted = [int(idx) for idx in value]
-            value = list(chunks(int_converted, 3))
-            attrtype = "edge" # not a real type, just for convenience
-            
-        # enforce polyFaces type for ".fc"
-        elif ".fc[" in name:
-            attrtype = "polyFaces"   
+        # sometimes attrtype is set, sometimes it isn't, so there's some redundancy happening below
+        if attrtype == "double3" or attrtype == "float3":
+            value = [float(f) for f in value]
         
         """
         # it might be nice to skip the list when only a single value, but I'm not sure there's a safe way to go about it
@@ -211,104 +313,891 @@ class MayaAsciiParserBase(common.MayaParserBase):
             if not isinstance(value[0], (list, tuple)):
                 value = value[0]
         """
-        self.on_set_attr(name, value, attrtype)
+        return common.SetAttr(name, value, attrtype, False, size)
         
 
-def chunks(in_list, size):
-    for i in range(0, len(in_list), size):
-        yield in_list[ i : i + size]
+# attrtype -> (dtype, values per element) for the bulk data decoded into arrays
+BULK_ARRAY_TYPES = {
+    "vtx": (np.float64, 3),
+    "double3Array": (np.float64, 3),
+    "float2": (np.float32, 2),
+    "double2": (np.float64, 2),
+    "float3": (np.float32, 3),
+    "edge": (np.int32, 3),
+}
+
 
+# attribute path (see maya_parser_common.parse_plug) -> BULK_ARRAY_TYPES type, for the attributes decoded into arrays
+BULK_ATTR_TYPES = {
+    "uvst.uvsp": "float2",
+    "pt": "double3Array",
+    "vt": "vtx",  # not a real type, just for convenience
+    "ed": "edge",  # not a real type, just for convenience
+    "n": "float3",
+    "ktv": "double2",
+}
+
+
+def bulk_attr_type(plug):
+    """
+    the BULK_ARRAY_TYPES type of an attribute whose values are decoded into an array, None for any other.
+    only a range of elements (.vt[0:7], .vt[3]) is, the attribute as a whole isn't
+    """
+    if plug.index_range is None:
+        return None
+    return BULK_ATTR_TYPES.get(plug.path)
+
+# encoding used when tokens are decoded from a byte buffer
+ENCODING = "utf-8"
+
+# a token is either a quoted string (escapes left as is) or a run of non-whitespace, tokenize() strips the quotes
+_TOKEN_PATTERN = r'"(?:[^"\\]|\\.)*"?|\'(?:[^\'\\]|\\.)*\'?|\S+'
+_TOKEN_RE = re.compile(_TOKEN_PATTERN, re.DOTALL)
+_BYTES_TOKEN_RE = re.compile(_TOKEN_PATTERN.encode(), re.DOTALL)
+
+_QUOTES = "\"'"
+
+# setAttr commands up to this many bytes are tokenized whole,
+# longer ones only up to their values, which are kept undecoded when they're bulk data
+SHORT_COMMAND_SIZE = 1024
+
+
+def _unquote(token):
+    """
+    the text of a quoted string token, an unterminated string only has its opening quote
+    """
+    quote = token[0]
+    if quote not in _QUOTES:
+        return token
+    
+    # the last quote is escaped itself when there's an odd number of backslashes in front of it
+    body = token[1:-1]
+    if len(token) > 1 and token[-1] == quote and (len(body) - len(body.rstrip("\\"))) % 2 == 0:
+        return body
+    return token[1:]
+
+
+def tokenize(text):
+    """
+    the tokens of a str or bytes-like text, which is decoded as a whole
+    """
+    if not isinstance(text, str):
+        text = str(text, ENCODING, "replace")
+    
+    if "\\" in text or "'" in text:
+        return _regex_tokens(text)
+    
+    # without escapes or single quotes the strings are every other piece between double quotes,
+    # which python splits up a lot quicker than the regex
+    pieces = text.split('"')
+    tokens = pieces[0].split()
+    for index in range(1, len(pieces), 2):
+        # a quote in the middle of a token doesn't start a string
+        before = pieces[index - 1]
+        if before and not before[-1].isspace():
+            return _regex_tokens(text)
         
-class MayaAsciiParser(MayaAsciiParserBase):
+        tokens.append(pieces[index])
+        if index + 1 < len(pieces):
+            tokens.extend(pieces[index + 1].split())
+    
+    return tokens
 
-    def __init__(self, stream):
-        super(MayaAsciiParser, self).__init__()
-        self.__stream = stream
 
-    def parse(self):
-        while self.__parse_next_command():
+def _regex_tokens(text):
+    return [_unquote(token) if token[0] in _QUOTES else token for token in _TOKEN_RE.findall(text)]
+
+
+def is_flag(arg):
+    return "-" in arg and arg.strip("-").isalpha()
+
+
+def is_bulk_attr(plug):
+    """
+    whether the values of an attribute are decoded straight from the command text, into an array or PolyFaces
+    """
+    return plug.path == "fc" or bulk_attr_type(plug) is not None
+
+
+def tokenize_set_attr(text, start=0, end=None, more=None):
+    """
+    tokenize a setAttr command. Of long commands of bulk data (see is_bulk_attr)
+    only the flags and attr name are, everything from the first value onwards is kept as a single RawData
+    so the values don't get split into one python string per number
+    
+    text can be the whole file buffer, only the tokenized part gets copied out of it.
+    more are the pieces of text that follow, when the command is still being read,
+    those are always kept as RawData
+    """
+    if end is None:
+        end = len(text)
+    
+    if more is None and end - start <= SHORT_COMMAND_SIZE:
+        return tokenize(text[start:end])
+    
+    is_bytes = not isinstance(text, str)
+    token_regex = _BYTES_TOKEN_RE if is_bytes else _TOKEN_RE
+    
+    args = []
+    name = None
+    skip_next_arg = False
+    for match in token_regex.finditer(text, start, end):
+        arg = match.group()
+        if is_bytes:
+            arg = arg.decode(ENCODING, errors="replace")
+        arg = _unquote(arg)
+        
+        if skip_next_arg:
+            skip_next_arg = False
+        
+        elif '.' in arg and name is None:
+            name = arg
+        
+        elif is_flag(arg):
+            # alteredValue doesn't have any arguments apparently
+            skip_next_arg = not "-av" in arg
+        
+        else:
+            if more is None and (name is None or not is_bulk_attr(common.parse_plug(name))):
+                args.extend(tokenize(text[match.start():end]))
+            else:
+                args.append(RawData(text, match.start(), end, more))
+            break
+        
+        args.append(arg)
+    
+    else:
+        # the values only start on the lines that are still being read
+        if more is not None:
+            args.append(RawData(text, end, end, more))
+    
+    return args
+
+
+def tokenize_command(command, text, start=0, end=None):
+    # setAttr values are left for the handler to decode, short commands are tokenized whole either way
+    if command == "setAttr" and (len(text) if end is None else end) - start > SHORT_COMMAND_SIZE:
+        return tokenize_set_attr(text, start, end)
+    return tokenize(text[start:end])
+
+
+def as_array(values, dtype, width=1):
+    array = np.array(values, dtype=dtype)
+    return _shape_rows(array, width)
+
+
+def _shape_rows(array, width):
+    if width == 1:
+        return array
+    
+    # drop a trailing partial element rather than failing on a truncated command
+    full_length = len(array) - (len(array) % width)
+    return array[:full_length].reshape(-1, width)
+
+
+# markers of the polyFaces data type, swapped for numbers outside of the int32 range
+# so the whole stream can be parsed as integers in one go
+_POLY_FACES_MARKER_BASE = 1 << 40
+_POLY_FACES_MARKERS = ("fc", "mc", "mu", "mf", "mh", "f", "h")  # the ones with two letters go before f and h
+_POLY_FACES_MARKER_SET = frozenset(_POLY_FACES_MARKERS)
+_POLY_FACES_F, _POLY_FACES_H, _POLY_FACES_MU = (
+    _POLY_FACES_MARKER_BASE + _POLY_FACES_MARKERS.index(marker) for marker in ("f", "h", "mu")
+)
+
+
+class PolyFaces(object):
+    """
+    decoded polyFaces data in CSR layout
+    
+    the edges of face i are edge_ids[face_offsets[i]:face_offsets[i + 1]],
+    with maya's signed edge ids (negative means the edge -id - 1, reversed)
+    uv_indices maps each uv set index to the uv index of every loop, -1 where a face has no uvs
+    """
+    __slots__ = ("face_offsets", "edge_ids", "uv_indices")
+    
+    def __init__(self, face_offsets, edge_ids, uv_indices):
+        self.face_offsets = face_offsets
+        self.edge_ids = edge_ids
+        self.uv_indices = uv_indices
+    
+    def __len__(self):
+        return len(self.face_offsets) - 1
+
+
+def decode_poly_faces(text):
+    """
+    decode a polyFaces value in one pass over the text
+    
+    f 4 0 5 -2 -5
+    mu 0 4 0 1 3 2
+    
+    "f" starts a face, "mu" gives the uv indices of the last face for one uv set.
+    Hole loops ("h") are left out along with their uvs, "fc" and "mc" (colors)
+    and the old style uvs of "mf" and "mh" are skipped.
+    Raises MayaAsciiError on anything that's neither a number nor a marker
+    """
+    for marker_index, marker in enumerate(_POLY_FACES_MARKERS):
+        if isinstance(text, bytes):
+            marker = marker.encode()
+            replacement = b" %d " % (_POLY_FACES_MARKER_BASE + marker_index)
+        else:
+            replacement = " %d " % (_POLY_FACES_MARKER_BASE + marker_index)
+        text = text.replace(marker, replacement)
+    
+    values = _poly_faces_values(text)
+    
+    marker_positions = np.flatnonzero(values >= _POLY_FACES_MARKER_BASE)
+    marker_kinds = values[marker_positions]
+    
+    # values before the first marker don't belong to anything
+    if len(marker_positions):
+        values = values[marker_positions[0]:]
+        marker_positions = marker_positions - marker_positions[0]
+    else:
+        values = values[:0]
+    
+    # the marker each value belongs to, and where in the marker's run of values it is
+    owners = np.cumsum(values >= _POLY_FACES_MARKER_BASE) - 1
+    offsets_in_run = np.arange(len(values)) - marker_positions[owners]
+    owner_kinds = marker_kinds[owners]
+    
+    # f <count> <edge ids...>
+    face_markers = marker_kinds == _POLY_FACES_F
+    edge_id_mask = (owner_kinds == _POLY_FACES_F) & (offsets_in_run >= 2)
+    edge_ids = values[edge_id_mask].astype(np.int32)
+    
+    face_numbers = np.cumsum(face_markers) - 1
+    face_sizes = np.bincount(face_numbers[owners[edge_id_mask]], minlength=int(face_markers.sum()))
+    face_offsets = np.zeros(len(face_sizes) + 1, dtype=np.int32)
+    np.cumsum(face_sizes, out=face_offsets[1:])
+    
+    # mu <uv set> <count> <uv indices...>, for the last f or h before it
+    loop_markers = face_markers | (marker_kinds == _POLY_FACES_H)
+    last_loop_marker = np.maximum.accumulate(np.where(loop_markers, np.arange(len(marker_kinds)), -1))
+    uv_markers = (marker_kinds == _POLY_FACES_MU) & (last_loop_marker >= 0)
+    uv_markers &= face_markers[np.maximum(last_loop_marker, 0)]
+    
+    uv_indices = {}
+    if uv_markers.any():
+        uv_sets = np.full(len(marker_kinds), -1, dtype=np.int64)
+        uv_sets[uv_markers] = values[marker_positions[uv_markers] + 1]
+        uv_faces = face_numbers[np.maximum(last_loop_marker, 0)]
+        
+        uv_value_mask = uv_markers[owners] & (offsets_in_run >= 3)
+        uv_value_owners = owners[uv_value_mask]
+        uv_value_faces = uv_faces[uv_value_owners]
+        uv_value_corners = offsets_in_run[uv_value_mask] - 3
+        uv_values = values[uv_value_mask]
+        
+        # ignore anything past the corner count of the face
+        in_face = uv_value_corners < face_sizes[uv_value_faces]
+        uv_loops = face_offsets[uv_value_faces] + uv_value_corners
+        uv_value_sets = uv_sets[uv_value_owners]
+        
+        for uv_set in np.unique(uv_sets[uv_markers]):
+            in_set = in_face & (uv_value_sets == uv_set)
+            loop_uv_indices = np.full(len(edge_ids), -1, dtype=np.int32)
+            loop_uv_indices[uv_loops[in_set]] = uv_values[in_set]
+            uv_indices[int(uv_set)] = loop_uv_indices
+    
+    return PolyFaces(face_offsets, edge_ids, uv_indices)
+
+
+def _poly_faces_values(text):
+    # np.fromstring stops at the first thing it can't read, numpy 2 raises on that but older ones only warn
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            return np.fromstring(text, dtype=np.int64, sep=" ")
+        except (ValueError, DeprecationWarning):
             pass
+    
+    raise MayaAsciiError("polyFaces data has a value that's neither a number nor a known marker")
 
-    def __parse_next_command(self):
-        lines = []
 
-        line = self.__stream.readline()
-        while True:
-            # Check if we've reached the end of the file
-            if not line:
-                break
+def decode_poly_face_tokens(tokens):
+    """
+    decode_poly_faces() for a value that's already tokenized,
+    on the few faces of a short command that's quicker than the array passes of decode_poly_faces()
+    """
+    edge_ids = []
+    face_offsets = [0]
+    uv_values = {}  # uv set -> (loop, uv index) pairs
+    
+    marker = None
+    last_loop = None  # first loop and size of the last face, None after a hole
+    values = []
+    for token in tokens + ["f"]:
+        if token not in _POLY_FACES_MARKER_SET:
+            try:
+                values.append(int(token))
+            except ValueError:
+                raise MayaAsciiError(f"Unexpected polyFaces value: {token}") from None
+            continue
+        
+        # the values of the last marker are complete
+        if marker == "f":
+            last_loop = len(edge_ids), len(values) - 1
+            edge_ids.extend(values[1:])
+            face_offsets.append(len(edge_ids))
+        elif marker == "h":
+            last_loop = None
+        elif marker == "mu" and last_loop is not None and values:
+            first_loop, face_size = last_loop
+            pairs = uv_values.setdefault(values[0], [])
+            pairs.extend((first_loop + corner, uv) for corner, uv in enumerate(values[2:2 + face_size]))
+        
+        marker = token
+        values = []
+    
+    uv_indices = {}
+    for uv_set, pairs in uv_values.items():
+        loop_uv_indices = [-1] * len(edge_ids)
+        for loop, uv in pairs:
+            loop_uv_indices[loop] = uv
+        uv_indices[uv_set] = np.array(loop_uv_indices, dtype=np.int32)
+    
+    return PolyFaces(np.array(face_offsets, dtype=np.int32), np.array(edge_ids, dtype=np.int32), uv_indices)
+
 
-            # Handle comments
-            elif line.startswith("//"):
-                self.on_comment(line[2:].strip())
+def join_poly_faces(parts):
+    """
+    one PolyFaces out of the PolyFaces of consecutive runs of faces
+    """
+    if len(parts) == 1:
+        return parts[0]
+    
+    loop_counts = [len(part.edge_ids) for part in parts]
+    loop_starts = np.cumsum([0] + loop_counts[:-1])
+    
+    face_offsets = np.concatenate(
+        [np.zeros(1, dtype=np.int32)]
+        + [part.face_offsets[1:] + loop_start for part, loop_start in zip(parts, loop_starts)]
+    ).astype(np.int32)
+    edge_ids = np.concatenate([part.edge_ids for part in parts])
+    
+    uv_indices = {}
+    for uv_set in sorted(set().union(*(part.uv_indices for part in parts))):
+        uv_indices[uv_set] = np.concatenate([
+            part.uv_indices.get(uv_set, np.full(loop_count, -1, dtype=np.int32))
+            for part, loop_count in zip(parts, loop_counts)
+        ])
+    
+    return PolyFaces(face_offsets, edge_ids, uv_indices)
 
-            # Handle commands
-            # A command may span multiple lines
+
+# values are decoded this many characters at a time, so the text is never copied whole
+DECODE_CHUNK_SIZE = 2 * 1024 * 1024
+
+
+class RawData(object):
+    """
+    the undecoded value text of a command, text[start:end] of either str or bytes,
+    and when the command is still being read, more pieces of text that follow
+    
+    handlers decode this depending on what they expect to find in it,
+    numeric data is parsed directly from the text into an array a chunk at a time
+    """
+    __slots__ = ("text", "start", "end", "more")
+    
+    def __init__(self, text, start=0, end=None, more=None):
+        self.text = text
+        self.start = start
+        self.end = len(text) if end is None else end
+        self.more = more
+    
+    def __repr__(self):
+        return f"RawData({self.text[self.start:min(self.end, self.start + 40)]!r})"
+    
+    def tokens(self):
+        return tokenize(_join(self.text, self.chunks()))
+    
+    def array(self, dtype, width=1, count=None):
+        """
+        rows of width values, count rows get preallocated when it's known up front
+        """
+        values = None
+        if count is not None:
+            values = np.empty(count * width, dtype=dtype)
+        
+        parts = []
+        filled = 0
+        for chunk in self.chunks():
+            chunk_values = np.fromstring(chunk, dtype=dtype, sep=" ")
+            
+            # more values than expected, collect them instead
+            if values is not None and filled + len(chunk_values) > len(values):
+                parts.append(values[:filled])
+                values = None
+            
+            if values is not None:
+                values[filled:filled + len(chunk_values)] = chunk_values
             else:
-                line = line.rstrip("\r\n")
-                if line and line.endswith(";"):
-                    # Remove trailing semicolon here so the command line
-                    # processor doesn't have to deal with it.
-                    lines.append(line[:-1])
-                    break
-                elif line:
-                    lines.append(line)
-            line = self.__stream.readline()
+                parts.append(chunk_values)
+            filled += len(chunk_values)
+        
+        if values is not None:
+            values = values[:filled]
+        elif len(parts) == 1:
+            values = parts[0]
+        else:
+            values = np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+        
+        return _shape_rows(values, width)
+    
+    def poly_faces(self):
+        # chunks are cut right before an "f", so every chunk holds whole faces
+        return join_poly_faces([decode_poly_faces(chunk) for chunk in self.chunks(token="f")])
+    
+    def chunks(self, chunk_size=None, token=None):
+        """
+        the text in slices of about chunk_size, cut at whitespace so no value is split,
+        or right before a whitespace delimited token when given
+        """
+        if chunk_size is None:
+            chunk_size = DECODE_CHUNK_SIZE
+        
+        if self.more is None:
+            yield from _cut_chunks(self.text, self.start, self.end, chunk_size, token)
+            return
+        
+        pieces = [self.text[self.start:self.end]]
+        size = len(pieces[0])
+        for piece in self.more:
+            pieces.append(piece)
+            size += len(piece)
+            if size < chunk_size:
+                continue
+            
+            text = _join(piece, pieces)
+            cut = _last_cut(text, 0, len(text), token)
+            if cut == -1:
+                pieces = [text]
+                continue
+            
+            yield text[:cut]
+            pieces = [text[cut:]]
+            size = len(pieces[0])
+        
+        text = _join(self.text, pieces)
+        if text:
+            yield text
 
-        if lines:
-            self.__parse_command_lines(lines)
-            return True
 
-        return False
+def _join(like, pieces):
+    return (b"" if isinstance(like, (bytes, bytearray, mmap.mmap)) else "").join(pieces)
 
-    def __parse_command_lines(self, lines):
-        # Pop command name from the first line
-        command, _, lines[0] = lines[0].partition(" ")
-        command = command.lstrip()
 
-        # Only process arguments if we handle this command
-        if self.has_command(command):
-
-            # Tokenize arguments
-            args = []
-            for line in lines:
-                while True:
-                    line = line.strip()
-                    if not line:
-                        break
+def _spaces(text):
+    if isinstance(text, str):
+        return (" ", "\n", "\t", "\r")
+    return (b" ", b"\n", b"\t", b"\r")
 
-                    # Handle strings
-                    if line[0] in "'\"":
-                        string_delim = line[0]
-                        escaped = False
-                        string_end = len(line)
 
-                        for i in range(1, len(line)):
+def _last_cut(text, start, end, token=None):
+    """
+    the last index between start and end where text can be cut without splitting a value,
+    right before token if given. -1 when there's no such place
+    """
+    spaces = _spaces(text)
+    if token is None:
+        cut = max(text.rfind(space, start, end) for space in spaces)
+        return cut if cut > start else -1
+    
+    needle = token.encode() + b" " if not isinstance(text, str) else token + " "
+    cut = text.rfind(needle, start, end)
+    while cut > start:
+        if text[cut - 1:cut] in spaces:
+            return cut
+        cut = text.rfind(needle, start, cut)
+    return -1
 
-                            # Check for end delimeter
-                            if not escaped and line[i] == string_delim:
-                                string_end = i
-                                break
 
-                            # Check for start of escape sequence
-                            elif not escaped and line[i] == "\\":
-                                escaped = True
+def _next_cut(text, start, end, token=None):
+    """
+    like _last_cut, but the first place from start on
+    """
+    spaces = _spaces(text)
+    if token is None:
+        cuts = [cut for cut in (text.find(space, start, end) for space in spaces) if cut != -1]
+        return min(cuts) if cuts else -1
+    
+    needle = token.encode() + b" " if not isinstance(text, str) else token + " "
+    cut = text.find(needle, start, end)
+    while cut != -1:
+        if text[cut - 1:cut] in spaces:
+            return cut
+        cut = text.find(needle, cut + 1, end)
+    return -1
+
+
+def _cut_chunks(text, start, end, chunk_size, token):
+    pos = start
+    while end - pos > chunk_size:
+        cut = _last_cut(text, pos, pos + chunk_size, token)
+        if cut == -1:
+            cut = _next_cut(text, pos + chunk_size, end, token)
+            if cut == -1:
+                break
+        
+        yield text[pos:cut]
+        pos = cut
+    
+    if pos < end:
+        yield text[pos:end]
 
-                            # End escape sequence
-                            else:
-                                escaped = False
 
-                        # Partition string argument from the remainder
-                        # of the command line.
-                        arg, line = line[1:string_end], line[string_end + 1:]
+# whitespace between commands, and the name at the start of a command (empty at a stray semicolon)
+_COMMAND_NAME_RE = re.compile(rb"\s*([^\s;]*)")
 
-                    # Handle other arguments
-                    # These, unlike strings, may be tokenized by whitespace
-                    else:
-                        arg, _, line = line.partition(" ")
+# remainder of a double quoted string, up to and including the closing quote
+_STRING_END_RE = re.compile(rb'(?:[^"\\]|\\.)*"', re.DOTALL)
 
-                    args.append(arg)
+# commands up to this many bytes are checked for strings as a whole, longer ones a string at a time
+_QUICK_SCAN_SIZE = 1024
 
-            # Done tokenizing arguments, call command handler
-            self.exec_command(command, args)
 
+def find_command_end(buffer, start, end=None):
+    """
+    index of the ; that ends the command starting at start,
+    semicolons inside of string literals are skipped
+    """
+    if end is None:
+        end = len(buffer)
+    
+    semicolon = buffer.find(b";", start, end)
+    if semicolon == -1:
+        return end
+    
+    # without escapes the quotes pair up into strings, and the semicolon is outside of them after an even number
+    if semicolon - start <= _QUICK_SCAN_SIZE:
+        text = buffer[start:semicolon]
+        if not text.count(b'"') % 2 and b"\\" not in text:
+            return semicolon
+    
+    pos = start
+    while True:
+        # most commands don't contain any strings between here and the semicolon
+        quote = buffer.find(b'"', pos, semicolon)
+        if quote == -1:
+            return semicolon
+        
+        string_end = _STRING_END_RE.match(buffer, quote + 1, end)
+        if string_end is None:
+            return end
+        pos = string_end.end()
+        
+        if pos > semicolon:
+            semicolon = buffer.find(b";", pos, end)
+            if semicolon == -1:
+                return end
+
+
+# createNode commands at the top level always start at the beginning of a line
+_CREATE_NODE_LINE = b"\ncreateNode "
+
+
+def split_at_create_nodes(buffer, count, start=0, end=None):
+    """
+    split a buffer into at most count (start, end) byte ranges of about the same size,
+    every range but the first starts on a createNode line so each can be parsed on its own
+    """
+    if end is None:
+        end = len(buffer)
+    
+    ranges = []
+    range_start = start
+    for index in range(1, count):
+        target = max(start + (end - start) * index // count, range_start)
+        boundary = buffer.find(_CREATE_NODE_LINE, target, end)
+        if boundary == -1:
+            break
+        
+        # range starts just after the newline
+        boundary += 1
+        ranges.append((range_start, boundary))
+        range_start = boundary
+    
+    ranges.append((range_start, end))
+    return ranges
+
+
+class MayaAsciiParser(MayaAsciiParserBase):
+    """
+    text streams are read line by line,
+    binary streams are memory mapped (or read whole, if they're not backed by a file)
+    and scanned for commands in bytes, which is a good bit faster on large files
+    
+    iter_commands() yields a record per command and only reads as far as it's iterated,
+    parse() hands every record over to the on_* callbacks
+    """
+    
+    # the commands parse() tokenizes, None for every command there's a handler for
+    parse_commands = None
+
+    def __init__(self, stream):
+        super(MayaAsciiParser, self).__init__()
+        self.__stream = stream
+
+    def parse(self):
+        self.dispatch_all(self.iter_commands(commands=self.parse_commands))
+
+    def parse_buffer(self, buffer, start=0, end=None):
+        self.dispatch_all(self.iter_buffer(buffer, start, end, commands=self.parse_commands))
+
+    def dispatch_all(self, records):
+        stats = self.stats
+        if stats is None:
+            for record in records:
+                self.dispatch(record)
+            return
+        
+        for record in records:
+            dispatch_start = perf_counter()
+            self.dispatch(record)
+            stats.add_time("command dispatch", perf_counter() - dispatch_start)
+
+    def iter_commands(self, commands=None, node_types=None):
+        """
+        yield a record (CreateNode, SetAttr, ...) per command,
+        the file is only read as far as the records are pulled
+        
+        commands limits which commands are tokenized and yielded ("requires", "createNode", ...),
+        comments only come through when it's None.
+        node_types limits the CreateNode records to those node types,
+        the setAttr commands of any other node are skipped without tokenizing them
+        
+        # only read the header
+        for record in parser.iter_commands(commands=("requires", "fileInfo", "createNode")):
+            if isinstance(record, CreateNode):
+                break
+        """
+        records = self.__iter_stream(commands)
+        if node_types is not None:
+            records = self.__filter_node_types(records, node_types)
+        return records
+
+    def iter_buffer(self, buffer, start=0, end=None, commands=None, node_types=None):
+        """
+        iter_commands() over a bytes-like buffer, the command text is only
+        copied out of the buffer and tokenized if there's a handler for it
+        """
+        records = self.__iter_buffer(buffer, start, end, commands)
+        if node_types is not None:
+            records = self.__filter_node_types(records, node_types)
+        return records
+
+    def __filter_node_types(self, records, node_types):
+        for record in records:
+            record_type = type(record)
+            
+            if record_type is common.CreateNode and record.nodetype not in node_types:
+                self.skip_node_attrs()
+                continue
+            
+            # attributes of a selected node, which isn't created here
+            if record_type is common.Select:
+                self.skip_node_attrs()
+                continue
+            
+            yield record
+
+    def __iter_stream(self, commands):
+        if isinstance(self.__stream, io.TextIOBase):
+            yield from self.__iter_lines(commands)
+            return
+        
+        try:
+            fileno = self.__stream.fileno()
+        except (AttributeError, OSError):
+            fileno = None
+        
+        if fileno is None:
+            read_start = perf_counter()
+            buffer = self.__stream.read()
+            if self.stats is not None:
+                self.stats.add_time("file read", perf_counter() - read_start)
+            
+            yield from self.__iter_buffer(buffer, 0, None, commands)
+            return
+        
+        # empty files can't be mapped
+        if os.fstat(fileno).st_size == 0:
+            return
+        
+        # with a memory map, reading the file is spread out over the scanning
+        # and only the mapping itself shows up as "file read"
+        read_start = perf_counter()
+        with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as buffer:
+            if self.stats is not None:
+                self.stats.add_time("file read", perf_counter() - read_start)
+            
+            yield from self.__iter_buffer(buffer, 0, None, commands)
+
+    def __iter_buffer(self, buffer, start, end, commands):
+        if end is None:
+            end = len(buffer)
+        
+        # command name -> its decoded name, None for the commands that aren't tokenized
+        command_names = {}
+        
+        pos = start
+        while True:
+            command = _COMMAND_NAME_RE.match(buffer, pos, end)
+            command_name = command.group(1)
+            args_start = command.end()
+            
+            if not command_name:
+                if args_start >= end:
+                    break
+                
+                # a stray semicolon
+                pos = args_start + 1
+                continue
+            
+            if command_name[:2] == b"//":
+                line_end = buffer.find(b"\n", args_start, end)
+                if line_end == -1:
+                    line_end = end
+                if commands is None:
+                    yield common.Comment(buffer[command.start(1) + 2:line_end].decode(ENCODING, errors="replace").strip())
+                pos = line_end + 1
+                continue
+            
+            command_end = find_command_end(buffer, args_start, end)
+            pos = command_end + 1
+            
+            if command_name == b"setAttr" and self._skip_set_attr:
+                continue
+            
+            # Only process arguments if we handle this command
+            if command_name in command_names:
+                name = command_names[command_name]
+            else:
+                name = command_name.decode(ENCODING, errors="replace")
+                if not self.__wants_command(name, commands):
+                    name = None
+                command_names[command_name] = name
+            
+            if name is None:
+                continue
+            
+            # tokenized straight from the buffer, the values of a setAttr are only copied out as they're decoded
+            record = self.__run_command(name, buffer, args_start, command_end)
+            if record is not None:
+                yield record
+
+    def __wants_command(self, command, commands):
+        return self.has_command(command) and (commands is None or command in commands)
+
+    def __run_command(self, command, text, start=0, end=None, more=None):
+        stats = self.stats
+        if stats is None:
+            if more is not None:
+                return self.exec_command(command, tokenize_set_attr(text, start, end, more))
+            return self.exec_command(command, tokenize_command(command, text, start, end))
+        
+        tokenize_start = perf_counter()
+        if more is not None:
+            args = tokenize_set_attr(text, start, end, more)
+        else:
+            args = tokenize_command(command, text, start, end)
+        stats.add_time("tokenize", perf_counter() - tokenize_start)
+        stats.count("commands")
+        
+        return self.exec_command(command, args)
+
+    def __iter_lines(self, commands):
+        stream = self.__stream
+        
+        while True:
+            if self.stats is not None:
+                read_start = perf_counter()
+            
+            lines = []
+            size = 0
+            complete = False
+            line = stream.readline()
+            while line:
+                # Handle comments
+                if line.startswith("//"):
+                    if commands is None:
+                        yield common.Comment(line[2:].strip())
+                
+                # Handle commands
+                # A command may span multiple lines
+                else:
+                    line = line.rstrip("\r\n")
+                    if line.endswith(";"):
+                        # Remove trailing semicolon here so the command line
+                        # processor doesn't have to deal with it.
+                        lines.append(line[:-1])
+                        complete = True
+                        break
+                    elif line:
+                        lines.append(line)
+                        size += len(line)
+                
+                # the values of a very large setAttr are decoded while they're being read
+                if size > DECODE_CHUNK_SIZE and lines[0].lstrip().startswith("setAttr"):
+                    break
+                
+                line = stream.readline()
+            
+            if self.stats is not None:
+                self.stats.add_time("file read", perf_counter() - read_start)
+            
+            # end of the file
+            if not lines:
+                return
+            
+            if complete or not line:
+                record = self.__read_command_lines(lines, commands)
+            else:
+                record = self.__stream_command_lines(lines, commands)
+            
+            if record is not None:
+                yield record
+    
+    def __iter_remaining_lines(self):
+        """
+        the rest of the lines of the command being read, up to the semicolon
+        """
+        for line in iter(self.__stream.readline, ""):
+            if line.startswith("//"):
+                continue
+            
+            line = line.rstrip("\r\n")
+            if line.endswith(";"):
+                yield "\n" + line[:-1]
+                return
+            yield "\n" + line
+    
+    def __stream_command_lines(self, lines, commands):
+        more = self.__iter_remaining_lines()
+        
+        record = None
+        if not self._skip_set_attr and self.__wants_command("setAttr", commands):
+            text = "\n".join(lines)
+            text = text[text.index("setAttr") + len("setAttr"):]
+            record = self.__run_command("setAttr", text, more=more)
+        
+        # whatever the handler didn't decode
+        for _ in more:
+            pass
+        
+        return record
+
+    def __read_command_lines(self, lines, commands):
+        # Pop command name from the first line
+        command, _, lines[0] = lines[0].partition(" ")
+        command = command.lstrip()
+
+        # Only process arguments if we handle this command
+        if command == "setAttr" and self._skip_set_attr:
+            return None
+        
+        if not self.__wants_command(command, commands):
+            return None
+        
+        return self.__run_command(command, "\n".join(lines))
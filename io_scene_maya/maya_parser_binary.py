@@ -0,0 +1,325 @@
+"""
+Parser of Maya Binary (.mb) files, handing the same command records as MayaAsciiParser
+over to the MayaParserBase callbacks.
+
+An .mb is an IFF file of nested chunks. Maya 2014 and later write 64 bit files (FOR8),
+older versions 32 bit ones (FOR4), which only differ in the size of the chunk headers and the alignment.
+The layout follows https://github.com/mottosso/maya-scenefile-parser
+
+    FOR8 Maya
+        FOR8 HEAD   (VERS, PLUG, FINF, AUNI, ...)
+        FOR8 FREF   (FREF, ...)
+        FOR8 XFRM   a node, grouped by the type id of the node type
+            CREA    flags, name, parent
+            DBL3    attribute name, flags, value
+            ...
+        LIS8 CONS
+            FOR8 CONN
+                ...  flags, source plug, destination plug
+
+The file is memory mapped, numeric attribute values come through as arrays viewing the map,
+so they're only valid while the records are being handed over.
+Attributes with a data type of their own (MESH, CMPD, ...) are passed on with a value of None,
+their encoding isn't known. That includes the geometry of meshes, which maya writes as MESH data
+instead of the .vt, .ed and .fc attributes of an .ma file, so meshes can't be read from .mb files yet.
+"""
+
+import io
+import mmap
+import os
+import struct
+from time import perf_counter
+
+import numpy as np
+
+from . import maya_parser_ascii
+from . import maya_parser_common as common
+
+ENCODING = maya_parser_ascii.ENCODING
+
+# group chunks of 32 and 64 bit files
+_FORM_TAGS = (b"FOR4", b"FOR8")
+_LIST_TAGS = (b"LIS4", b"LIS8")
+
+# type ids of the node types the importer knows, any other node type comes through as its type id
+NODE_TYPE_IDS = {
+    b"XFRM": "transform",
+    b"DMSH": "mesh",
+    b"DCAM": "camera",
+}
+
+# attribute data chunk -> (attrtype, big endian dtype, values per element)
+NUMERIC_DATA_TYPES = {
+    b"DBLE": ("double", ">f8", 1),
+    b"DBL2": ("double2", ">f8", 2),
+    b"DBL3": ("double3", ">f8", 3),
+    b"FLT2": ("float2", ">f4", 2),
+    b"FLT3": ("float3", ">f4", 3),
+}
+
+# header chunks of the angle, linear and time unit
+_UNIT_TAGS = (b"AUNI", b"LUNI", b"TUNI")
+
+# chunks of a node that don't hold an attribute value: select, addAttr and lock flags
+_NODE_CHUNKS_WITHOUT_VALUE = (b"SLCT", b"ATTR", b"FLGS")
+
+
+class MayaBinaryError(ValueError):
+    pass
+
+
+def is_maya_binary(buffer):
+    return buffer[:4] in _FORM_TAGS
+
+
+class MayaBinaryParser(common.MayaParserBase):
+    """
+    binary streams are memory mapped (or read whole, if they're not backed by a file)
+    
+    iter_commands() yields a record per command and only reads as far as it's iterated,
+    parse() hands every record over to the on_* callbacks
+    """
+
+    def __init__(self, stream):
+        super(MayaBinaryParser, self).__init__()
+        self.__stream = stream
+        
+        # set from the first chunk of the file
+        self.__header_size = 8
+        self.__alignment = 4
+        
+        # an import_stats.ImportStats to record timings and counts into, None records nothing
+        self.stats = None
+
+    def parse(self):
+        for record in self.iter_commands():
+            self.dispatch(record)
+
+    def iter_commands(self, commands=None, node_types=None):
+        """
+        yield a record (CreateNode, SetAttr, ...) per command, like MayaAsciiParser.iter_commands
+        
+        commands limits which commands are yielded ("requires", "createNode", "setAttr", ...),
+        node_types limits the CreateNode records to those node types,
+        the attributes of any other node are skipped without reading them
+        """
+        try:
+            fileno = self.__stream.fileno()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            fileno = None
+        
+        if fileno is None:
+            read_start = perf_counter()
+            buffer = self.__stream.read()
+            if self.stats is not None:
+                self.stats.add_time("file read", perf_counter() - read_start)
+            
+            yield from self.iter_buffer(buffer, commands, node_types)
+            return
+        
+        # empty files can't be mapped
+        if os.fstat(fileno).st_size == 0:
+            raise MayaBinaryError("Empty file")
+        
+        read_start = perf_counter()
+        with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as buffer:
+            if self.stats is not None:
+                self.stats.add_time("file read", perf_counter() - read_start)
+            
+            yield from self.iter_buffer(buffer, commands, node_types)
+
+    def iter_buffer(self, buffer, commands=None, node_types=None):
+        """
+        iter_commands() over a bytes-like buffer of a whole file
+        """
+        if not is_maya_binary(buffer):
+            raise MayaBinaryError("Not a Maya Binary file, it doesn't start with a FOR4 or FOR8 chunk")
+        
+        if buffer[:4] == b"FOR8":
+            self.__header_size = 16
+            self.__alignment = 8
+        else:
+            self.__header_size = 8
+            self.__alignment = 4
+        
+        for tag, start, end in self.__iter_chunks(buffer, 0, len(buffer)):
+            if tag in _FORM_TAGS and buffer[start:start + 4] == b"Maya":
+                for record in self.__iter_group(buffer, start, end, commands, node_types):
+                    if self.stats is not None:
+                        self.stats.count("commands")
+                    yield record
+
+    def __iter_chunks(self, buffer, start, end):
+        """
+        (tag, data start, data end) of each chunk from start to end
+        """
+        header_size = self.__header_size
+        alignment = self.__alignment
+        wide = header_size == 16
+        
+        pos = start
+        while pos + header_size <= end:
+            tag = bytes(buffer[pos:pos + 4])
+            
+            # 64 bit headers pad the tag to 8 bytes before the size
+            if wide:
+                size = struct.unpack_from(">Q", buffer, pos + 8)[0]
+            else:
+                size = struct.unpack_from(">L", buffer, pos + 4)[0]
+            
+            data_start = pos + header_size
+            data_end = data_start + size
+            if data_end > end:
+                raise MayaBinaryError(f"Chunk {tag} at byte {pos} runs past the end of its group")
+            
+            yield tag, data_start, data_end
+            pos = data_start + common.align(size, alignment)
+
+    def __iter_group_chunks(self, buffer, start, end):
+        # a group starts with its own type id, padded to the alignment
+        return self.__iter_chunks(buffer, start + self.__alignment, end)
+
+    def __iter_group(self, buffer, start, end, commands, node_types):
+        for tag, data_start, data_end in self.__iter_group_chunks(buffer, start, end):
+            if tag in _LIST_TAGS:
+                if buffer[data_start:data_start + 4] == b"CONS":
+                    yield from self.__iter_group(buffer, data_start, data_end, commands, node_types)
+                continue
+            
+            if tag not in _FORM_TAGS:
+                continue
+            
+            type_id = bytes(buffer[data_start:data_start + 4])
+            if type_id == b"HEAD":
+                yield from self.__iter_header(buffer, data_start, data_end, commands)
+            elif type_id == b"FREF":
+                if _wants(commands, "file"):
+                    yield from self.__iter_file_references(buffer, data_start, data_end)
+            elif type_id == b"CONN":
+                if _wants(commands, "connectAttr"):
+                    record = self.__read_connection(buffer, data_start, data_end)
+                    if record is not None:
+                        yield record
+            else:
+                yield from self.__iter_node(buffer, type_id, data_start, data_end, commands, node_types)
+
+    def __iter_header(self, buffer, start, end, commands):
+        units = {}
+        
+        for tag, data_start, data_end in self.__iter_group_chunks(buffer, start, end):
+            if tag == b"VERS" and _wants(commands, "requires"):
+                yield common.Requires("maya", _strings(buffer, data_start, data_end)[0])
+            
+            elif tag == b"PLUG" and _wants(commands, "requires"):
+                plugin, version = _strings(buffer, data_start, data_end, 2)
+                yield common.Requires(plugin, version)
+            
+            elif tag == b"FINF" and _wants(commands, "fileInfo"):
+                key, value = _strings(buffer, data_start, data_end, 2)
+                yield common.FileInfo(key, value)
+            
+            elif tag in _UNIT_TAGS:
+                units[tag] = _strings(buffer, data_start, data_end)[0]
+        
+        if units and _wants(commands, "currentUnit"):
+            yield common.CurrentUnit(units.get(b"AUNI"), units.get(b"LUNI"), units.get(b"TUNI"))
+
+    def __iter_file_references(self, buffer, start, end):
+        for tag, data_start, data_end in self.__iter_group_chunks(buffer, start, end):
+            if tag == b"FREF":
+                yield common.FileReference(_strings(buffer, data_start, data_end)[0], None, None, False)
+
+    def __read_connection(self, buffer, start, end):
+        for tag, data_start, data_end in self.__iter_group_chunks(buffer, start, end):
+            # flags, then the source and destination plugs
+            src_plug, dst_plug = _strings(buffer, data_start + 1, data_end, 2)
+            if src_plug and dst_plug:
+                return common.ConnectAttr(src_plug, dst_plug)
+        return None
+
+    def __iter_node(self, buffer, type_id, start, end, commands, node_types):
+        nodetype = NODE_TYPE_IDS.get(type_id) or type_id.decode(ENCODING, errors="replace").strip()
+        wants_set_attr = _wants(commands, "setAttr")
+        
+        for tag, data_start, data_end in self.__iter_group_chunks(buffer, start, end):
+            if tag == b"CREA":
+                if node_types is not None and nodetype not in node_types:
+                    return
+                
+                # flags, then the name and the parent
+                name, parent = _strings(buffer, data_start + 1, data_end, 2)
+                if self.stats is not None:
+                    self.stats.count_node(nodetype)
+                
+                if _wants(commands, "createNode"):
+                    yield common.CreateNode(nodetype, name, parent or None)
+            
+            elif tag in _NODE_CHUNKS_WITHOUT_VALUE:
+                continue
+            
+            elif wants_set_attr:
+                record = self.__read_attribute(buffer, tag, data_start, data_end)
+                if record is not None:
+                    yield record
+
+    def __read_attribute(self, buffer, tag, start, end):
+        # attribute name, a flags byte, then the value
+        name_end = buffer.find(b"\0", start, end)
+        if name_end == -1:
+            return None
+        
+        name = bytes(buffer[start:name_end]).decode(ENCODING, errors="replace")
+        if not name.startswith("."):
+            name = "." + name
+        
+        if not self.wants_set_attr(name):
+            return None
+        
+        value_start = name_end + 2
+        
+        if tag == b"STR ":
+            return common.SetAttr(name, _strings(buffer, value_start, end), "string", False, None)
+        
+        numeric_type = NUMERIC_DATA_TYPES.get(tag)
+        if numeric_type is None:
+            # data of its own type, like the MESH data of a mesh
+            return common.SetAttr(name, None, tag.decode(ENCODING, errors="replace").strip(), False, None)
+        
+        if self.stats is not None:
+            decode_start = perf_counter()
+        
+        attrtype, dtype, width = numeric_type
+        count = max(end - value_start, 0) // (np.dtype(dtype).itemsize * width)
+        values = np.frombuffer(buffer, dtype=dtype, count=count * width, offset=value_start)
+        
+        bulk_type = maya_parser_ascii.bulk_attr_type(common.parse_plug(name))
+        if bulk_type is not None and maya_parser_ascii.BULK_ARRAY_TYPES[bulk_type][1] == width:
+            record = common.SetAttr(name, values.reshape(count, width), bulk_type, True, count)
+        elif count > 1 and width > 1:
+            record = common.SetAttr(name, values.reshape(count, width), attrtype, True, count)
+        else:
+            record = common.SetAttr(name, values.tolist(), attrtype, count > 1, count)
+        
+        if self.stats is not None:
+            self.stats.add_time("setAttr decode", perf_counter() - decode_start)
+        
+        return record
+
+    def wants_set_attr(self, name):
+        """
+        override to skip attributes before their value is read
+        """
+        return True
+
+
+def _wants(commands, command):
+    return commands is None or command in commands
+
+
+def _strings(buffer, start, end, count=1):
+    """
+    the first count null terminated strings from start to end, "" for the ones that aren't there
+    """
+    strings = bytes(buffer[start:end]).split(b"\0")
+    strings = [string.decode(ENCODING, errors="replace") for string in strings[:count]]
+    return strings + [""] * (count - len(strings))
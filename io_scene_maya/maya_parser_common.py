@@ -1,4 +1,10 @@
 import struct
+from collections import namedtuple
+from functools import lru_cache
+
+# parsed plugs kept around, the names of big multi attributes (.vt[0:999]) mostly show up once
+# but the plain ones (.t, .v, .uvst[0].uvsn) on node after node
+PLUG_CACHE_SIZE = 4096
 
 
 def be_word4(buf):
@@ -58,8 +64,101 @@ def plug_element_count(plug):
     return 1
 
 
+class Plug(namedtuple("Plug", "path attrs indices")):
+    """
+    an attribute name split into its parts, see parse_plug
+    """
+    __slots__ = ()
+
+    @property
+    def index_range(self):
+        """
+        first and last index of the last part, .uvst[0].uvsp[0:145] -> (0, 145), None when it has no index
+        """
+        return self.indices[-1]
+
+    @property
+    def element_count(self):
+        """
+        number of elements in the index range of the last part, .vt[0:7] -> 8, .vt[3] -> 1, None without one
+        """
+        index_range = self.indices[-1]
+        if index_range is None:
+            return None
+        return index_range[1] - index_range[0] + 1
+
+
+@lru_cache(maxsize=PLUG_CACHE_SIZE)
+def parse_plug(name):
+    """
+    ".uvst[0].uvsp[0:145]" -> Plug(path="uvst.uvsp", attrs=("uvst", "uvsp"), indices=((0, 0), (0, 145)))
+    the index of a part is (first, last), or None when it has none (or a * or something else that isn't a number),
+    a node name in front of the attribute (pCubeShape1.vt[0]) is left off
+    """
+    attrs = []
+    indices = []
+    for part in name.partition(".")[2].split("."):
+        attr, bracket, index = part.partition("[")
+        attrs.append(attr)
+        indices.append(_index_range(index[:-1]) if bracket else None)
+    
+    return Plug(".".join(attrs), tuple(attrs), tuple(indices))
+
+
+def _index_range(index):
+    first, _, last = index.partition(":")
+    try:
+        return int(first), int(last or first)
+    except ValueError:
+        return None
+
+
+# a record per command in a file, as yielded by MayaAsciiParser.iter_commands
+Comment = namedtuple("Comment", "text")
+Requires = namedtuple("Requires", "plugin version")  # plugin is "maya" for the maya version itself
+FileInfo = namedtuple("FileInfo", "key value")
+CurrentUnit = namedtuple("CurrentUnit", "angle linear time")  # None for the units that aren't given
+FileReference = namedtuple("FileReference", "path namespace reference_node deferred")
+CreateNode = namedtuple("CreateNode", "nodetype name parent")
+Select = namedtuple("Select", "name")
+SetAttr = namedtuple("SetAttr", "name value type is_array size")
+ConnectAttr = namedtuple("ConnectAttr", "src_plug dst_plug")
+
+
 class MayaParserBase(object):
 
+    def dispatch(self, record):
+        """
+        hand a command record over to its on_* callback
+        """
+        record_type = type(record)
+        
+        # roughly in order of how common they are
+        if record_type is SetAttr:
+            self.on_set_attr(record.name, record.value, record.type, is_array=record.is_array, size=record.size)
+        elif record_type is CreateNode:
+            self.on_create_node(record.nodetype, record.name, record.parent)
+        elif record_type is ConnectAttr:
+            self.on_connect_attr(record.src_plug, record.dst_plug)
+        elif record_type is Select:
+            self.on_select(record.name)
+        elif record_type is Comment:
+            self.on_comment(record.text)
+        elif record_type is Requires:
+            if record.plugin == "maya":
+                self.on_requires_maya(record.version)
+            else:
+                self.on_requires_plugin(record.plugin, record.version)
+        elif record_type is FileInfo:
+            self.on_file_info(record.key, record.value)
+        elif record_type is CurrentUnit:
+            self.on_current_unit(record.angle, record.linear, record.time)
+        elif record_type is FileReference:
+            self.on_file_reference(record.path, record.namespace, record.deferred)
+
+    def on_comment(self, value):
+        pass
+
     def on_requires_maya(self, version):
         pass
 
@@ -72,7 +171,7 @@ class MayaParserBase(object):
     def on_current_unit(self, angle, linear, time):
         pass
 
-    def on_file_reference(self, path):
+    def on_file_reference(self, path, namespace=None, deferred=False):
         pass
 
     def on_create_node(self, nodetype, name, parent):
@@ -84,7 +183,7 @@ class MayaParserBase(object):
     def on_add_attr(self, node, name):
         pass
 
-    def on_set_attr(self, name, value, type):
+    def on_set_attr(self, name, value, type, is_array=False, size=None):
         pass
 
     def on_set_attr_flags(self, plug, keyable=None, channelbox=None, lock=None):
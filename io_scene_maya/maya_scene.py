@@ -0,0 +1,1274 @@
+"""
+Blender independent description of the parts of a maya scene that get imported.
+
+Everything in here can be pickled, so scenes can be parsed in other processes
+and only handed over to blender for building.
+"""
+
+import bz2
+import gzip
+import hashlib
+import io
+import itertools
+import lzma
+import mmap
+import multiprocessing
+import os
+import re
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from . import import_stats
+from . import maya_parser_ascii
+from . import maya_parser_binary
+from . import maya_parser_common
+from . import maya_scene_graph
+from . import maya_scene_index
+
+# files smaller than this are parsed in one go, starting worker processes takes about as long
+PARALLEL_PARSE_MIN_SIZE = 64 * 1024 ** 2
+
+# compressed files are decompressed while they're parsed, nothing is written out
+COMPRESSION_SUFFIXES = {
+    ".gz": "gzip",
+    ".xz": "lzma",
+    ".lzma": "lzma",
+    ".bz2": "bz2",
+    ".zst": "zstd",
+    ".zstd": "zstd",
+}
+
+# how much compressed data is read at a time
+COMPRESSED_READ_SIZE = 1024 ** 2
+
+# maya writes 1e+20 for the components of normals that weren't set
+UNSET_NORMAL = 1e19
+
+# shader node types that become materials, and the attribute of their color
+MATERIAL_COLOR_ATTRS = {
+    "lambert": ".c",
+    "blinn": ".c",
+    "phong": ".c",
+    "phongE": ".c",
+    "anisotropic": ".c",
+    "surfaceShader": ".oc",
+    "standardSurface": ".bc",
+    "aiStandardSurface": ".base_color",
+}
+
+# animation curves keyed over time, the ones driven by other attributes (set driven keys) aren't imported
+ANIM_CURVE_TYPES = ("animCurveTL", "animCurveTA", "animCurveTU")
+
+# transform attribute (short and long name) -> blender data path and index of the channel
+ANIMATED_CHANNELS = {
+    ".tx": ("location", 0),
+    ".translateX": ("location", 0),
+    ".ty": ("location", 1),
+    ".translateY": ("location", 1),
+    ".tz": ("location", 2),
+    ".translateZ": ("location", 2),
+    ".rx": ("rotation_euler", 0),
+    ".rotateX": ("rotation_euler", 0),
+    ".ry": ("rotation_euler", 1),
+    ".rotateY": ("rotation_euler", 1),
+    ".rz": ("rotation_euler", 2),
+    ".rotateZ": ("rotation_euler", 2),
+    ".sx": ("scale", 0),
+    ".scaleX": ("scale", 0),
+    ".sy": ("scale", 1),
+    ".scaleY": ("scale", 1),
+    ".sz": ("scale", 2),
+    ".scaleZ": ("scale", 2),
+}
+
+# keyTanOutType values of keys that don't go on to the next key with a curve
+TANGENT_LINEAR = 2
+TANGENT_STEP = 5
+
+# frames (or ticks) per second of the currentUnit -time names, "<n>fps" names carry their own
+TIME_UNIT_RATES = {
+    "game": 15,
+    "film": 24,
+    "pal": 25,
+    "ntsc": 30,
+    "show": 48,
+    "palf": 50,
+    "ntscf": 60,
+    "hour": 1 / 3600,
+    "min": 1 / 60,
+    "sec": 1,
+    "millisec": 1000,
+}
+
+# .iog[0].og[2] of a shape, the instance and the object group (None for the whole shape)
+_INSTANCE_GROUP_RE = re.compile(r"^\.(?:iog|instObjGroups)(?:\[(\d+)\])?(?:\.(?:og|objectGroups)\[(\d+)\])?$")
+
+
+class Scene(object):
+    
+    def __init__(self, filepath=None):
+        self.filepath = filepath
+        
+        # supported nodes in file order, parents before their children
+        self.nodes = []
+        
+        # things that were read but couldn't be imported, for the operator report
+        self.warnings = []
+        
+        self.connections = maya_scene_graph.ConnectionGraph()
+        
+        # shader name -> {"nodetype": ..., "color": (r, g, b) or None}
+        self.materials = {}
+        
+        # animCurve name -> {"nodetype": ..., "keys": time and value of each key, "out_tangents": keyTanOutType of each key,
+        # "tangent": the default tangent type of the curve}
+        self.anim_curves = {}
+        
+        # from currentUnit, the maya defaults until then
+        self.units = {"angle": "degree", "linear": "centimeter", "time": "film"}
+        
+        # file -r commands, {"path": ..., "namespace": ... or None, "deferred": unloaded in maya}
+        self.references = []
+    
+    def to_radians(self, angles):
+        """
+        angles in the angle unit of the scene as radians
+        """
+        angles = np.asarray(angles, dtype=np.float64)
+        if self.units["angle"] in ("deg", "degree"):
+            return np.radians(angles)
+        return angles
+    
+    def time_rate(self):
+        """
+        time unit steps per second
+        """
+        unit = self.units["time"]
+        if unit in TIME_UNIT_RATES:
+            return TIME_UNIT_RATES[unit]
+        try:
+            return float(unit[:-len("fps")]) if unit.endswith("fps") else TIME_UNIT_RATES["film"]
+        except ValueError:
+            return TIME_UNIT_RATES["film"]
+    
+    def node_animation(self, node):
+        """
+        (data path, index, animCurve name) of each channel of a transform driven by an animation curve
+        """
+        channels = []
+        for src_node, src_attr, dst_attr in self.connections.inputs(node.name, node.long_name):
+            channel = ANIMATED_CHANNELS.get(dst_attr)
+            if channel is not None and src_node in self.anim_curves and src_attr in (".o", ".output"):
+                channels.append((channel[0], channel[1], src_node))
+        return channels
+    
+    def anim_curve_keys(self, curve_name, frame_rate):
+        """
+        frame, value and keyTanOutType of each key of a curve in time order,
+        times go from the time unit to frames at frame_rate, and angles to radians
+        """
+        curve = self.anim_curves[curve_name]
+        keys = curve["keys"].array()
+        
+        # keys without a .kot of their own have the curve's .tan
+        out_tangents = np.full(len(keys), curve["tangent"] or 0, dtype=np.int32)
+        set_tangents = curve["out_tangents"].array()[:len(keys), 0]
+        is_set = curve["out_tangents"].written_mask()[:len(keys)]
+        out_tangents[:len(set_tangents)][is_set] = set_tangents[is_set]
+        
+        order = np.argsort(keys[:, 0], kind="stable")
+        frames = keys[order, 0] * (frame_rate / self.time_rate())
+        values = keys[order, 1]
+        if curve["nodetype"] == "animCurveTA":
+            values = self.to_radians(values)
+        
+        return frames, values, out_tangents[order]
+
+    def surface_shader(self, shading_engine):
+        """
+        name of the shader connected to the .surfaceShader of a shadingEngine, None without one
+        """
+        for src_node, src_attr, dst_attr in self.connections.inputs(shading_engine):
+            if dst_attr in (".ss", ".surfaceShader"):
+                return src_node
+        return None
+    
+    def mesh_shading(self, mesh, face_count):
+        """
+        the material slots of a mesh from its shadingEngine memberships, a shader name per slot
+        (None for a shadingEngine without a shader), and the slot of every face.
+        the face slots are None when the whole mesh is in one shadingEngine,
+        faces that aren't in any shadingEngine go in a slot without a shader
+        """
+        slots = []
+        
+        def slot_index(shading_engine):
+            shader = self.surface_shader(shading_engine)
+            if shader not in slots:
+                slots.append(shader)
+            return slots.index(shader)
+        
+        mesh_slot = None
+        group_slots = []
+        for src_attr, dst_node, dst_attr in self.connections.outputs(mesh.name, mesh.long_name):
+            if not dst_attr.startswith((".dsm", ".dagSetMembers")):
+                continue
+            
+            match = _INSTANCE_GROUP_RE.match(src_attr)
+            if match is None or match.group(1) not in (None, "0"):
+                continue
+            
+            if match.group(2) is None:
+                mesh_slot = slot_index(dst_node)
+                continue
+            
+            group_index = int(match.group(2))
+            if group_index in mesh.face_groups:
+                group_slots.append((slot_index(dst_node), mesh.face_groups[group_index]))
+        
+        if not any(slots):
+            return [], None
+        
+        if not group_slots:
+            return slots, None
+        
+        face_slots = np.full(face_count, -1 if mesh_slot is None else mesh_slot, dtype=np.int32)
+        for slot, faces in group_slots:
+            if faces is None:
+                face_slots[:] = slot
+            else:
+                face_slots[faces[faces < face_count]] = slot
+        
+        # faces outside of every shadingEngine get an empty slot, not the material of another one
+        unassigned = face_slots < 0
+        if unassigned.any():
+            if None not in slots:
+                slots.append(None)
+            face_slots[unassigned] = slots.index(None)
+        
+        return slots, face_slots
+
+
+def parse_scene(filepath, workers=1, stats=None, selection=None, **options):
+    """
+    parse a .ma or .mb file into a Scene, .ma files may be compressed (scene.ma.gz, scene.ma.zst, ...)
+    options are the import options of SceneParser (import_uvs, import_cameras, import_hidden, proxy_meshes)
+    
+    with more than one worker, large files are split into byte ranges at createNode lines
+    which are parsed in worker processes, the Scene comes out the same as a serial parse
+    
+    stats is an optional import_stats.ImportStats to record into
+    selection is an optional maya_scene_index.NodeSelection, only those nodes are parsed
+    """
+    if not options.get("proxy_meshes"):
+        return _parse_scene(filepath, workers, stats, selection, options)
+    
+    # proxies are loaded later from the byte range of their node, which only plain .ma files have
+    if is_binary_file(filepath) or split_compression(filepath)[1] is not None:
+        scene = _parse_scene(filepath, workers, stats, selection, dict(options, proxy_meshes=False))
+        scene.warnings.append("mesh proxies only work on uncompressed .ma files, the meshes were imported fully")
+        return scene
+    
+    scene = _parse_scene(filepath, workers, stats, selection, options)
+    with import_stats.phase(stats, "node index"):
+        index = maya_scene_index.load_index(filepath)
+    
+    byte_ranges = {}
+    for long_name, start, end in zip(index.long_names(), index.starts, index.ends):
+        byte_ranges[long_name] = (start, end)
+    
+    for node in scene.nodes:
+        if isinstance(node, Mesh) and node.is_proxy:
+            node.byte_range = byte_ranges.get(node.long_name)
+    
+    return scene
+
+
+def parse_proxy_mesh(buffer, start, end):
+    """
+    the Mesh of a proxy, parsed from the byte range of its node (Mesh.byte_range), None when there's no mesh there
+    """
+    parser = SceneParser(None)
+    parser.parse_buffer(buffer, start, end)
+    parser.store_current_node()
+    
+    meshes = [node for node in parser.scene.nodes if isinstance(node, Mesh)]
+    if not meshes:
+        return None
+    return meshes[0]
+
+
+def _parse_scene(filepath, workers, stats, selection, options):
+    if workers is None:
+        workers = os.cpu_count() or 1
+    
+    if is_binary_file(filepath):
+        return _parse_binary_scene(filepath, options, stats, selection)
+    
+    compression = split_compression(filepath)[1]
+    
+    if selection is not None and compression is None:
+        return _parse_scene_selection(filepath, selection, options, stats)
+    
+    file_size = os.path.getsize(filepath)
+    if stats is not None:
+        stats.count("bytes", file_size)
+    
+    if workers > 1 and file_size >= PARALLEL_PARSE_MIN_SIZE and compression is None:
+        return _parse_scene_ranges(filepath, workers, options, stats)
+    
+    with open_scene_file(filepath) as f:
+        parser = SceneParser(f)
+        parser.set_options(options)
+        parser.stats = stats
+        parser.parse()
+    
+    parser.scene.filepath = filepath
+    
+    if selection is not None:
+        # the node index needs byte offsets into the file
+        parser.scene.warnings.append("selective import doesn't work on compressed files, the whole file was imported")
+    
+    return parser.scene
+
+
+def split_compression(filepath):
+    """
+    the path without its compression suffix, and the compression (None for uncompressed files)
+    """
+    base_path, suffix = os.path.splitext(filepath)
+    compression = COMPRESSION_SUFFIXES.get(suffix.lower())
+    if compression is None:
+        return filepath, None
+    return base_path, compression
+
+
+def scene_file_type(filepath):
+    """
+    ".ma" or ".mb" (or whatever else the extension is), compression suffixes left out
+    """
+    return os.path.splitext(split_compression(filepath)[0])[1].lower()
+
+
+def open_scene_file(filepath):
+    """
+    uncompressed files are opened as binary, so the parser can memory map them.
+    compressed files come as a text stream over the decompressor,
+    which the parser reads line by line, so the file is never decompressed as a whole
+    """
+    compression = split_compression(filepath)[1]
+    if compression is None:
+        return open(filepath, "rb")
+    
+    if compression == "gzip":
+        stream = gzip.open(filepath, "rb")
+    elif compression == "lzma":
+        stream = lzma.open(filepath, "rb")
+    elif compression == "bz2":
+        stream = bz2.open(filepath, "rb")
+    else:
+        if zstandard is None:
+            raise ImportError(f"Reading '{os.path.basename(filepath)}' needs the zstandard module, which isn't installed")
+        stream = zstandard.ZstdDecompressor().stream_reader(
+            open(filepath, "rb"),
+            read_size=COMPRESSED_READ_SIZE,
+            closefd=True,
+        )
+    
+    stream = io.BufferedReader(stream, buffer_size=COMPRESSED_READ_SIZE)
+    return io.TextIOWrapper(stream, encoding=maya_parser_ascii.ENCODING, errors="replace")
+
+
+def is_binary_file(filepath):
+    return scene_file_type(filepath) == ".mb" and split_compression(filepath)[1] is None
+
+
+def _parse_binary_scene(filepath, options, stats=None, selection=None):
+    """
+    the records of the binary parser go through the same SceneParser callbacks as the ascii ones
+    """
+    if stats is not None:
+        stats.count("bytes", os.path.getsize(filepath))
+    
+    parser = SceneParser(None)
+    parser.set_options(options)
+    parser.stats = stats
+    
+    with open(filepath, "rb") as f:
+        binary_parser = maya_parser_binary.MayaBinaryParser(f)
+        binary_parser.wants_set_attr = parser.wants_set_attr
+        binary_parser.stats = stats
+        parser.dispatch_all(binary_parser.iter_commands(commands=SceneParser.parse_commands))
+    
+    parser.store_current_node()
+    scene = parser.scene
+    scene.filepath = filepath
+    
+    # mesh geometry is stored in MESH data, which isn't decoded
+    for node in list(scene.nodes):
+        if isinstance(node, Mesh) and not len(node.vert_data):
+            scene.warnings.append(f"mesh '{node.name}' is stored in an .mb encoding that can't be read, left out")
+            scene.nodes.remove(node)
+            if node.parent is not None:
+                node.parent.children.remove(node)
+                node.parent.has_pruned_shape = True
+    
+    if selection is not None:
+        scene.warnings.append("selective import only works on .ma files, the whole file was imported")
+    
+    return scene
+
+
+def _parse_scene_selection(filepath, selection, options, stats=None):
+    """
+    look up the byte ranges of the selected nodes in the node index of the file, and only parse those.
+    the connections after the last node are parsed as well, then the shading and animation nodes
+    the selected nodes are connected to, and only the connections of all of those are kept
+    """
+    with import_stats.phase(stats, "node index"):
+        index = maya_scene_index.load_index(filepath)
+    selected = selection.select(index)
+    byte_ranges = index.byte_ranges(selected)
+    
+    # the file references and units come before the first node
+    header_end = index.starts[0] if len(index) else index.file_size
+    if header_end:
+        byte_ranges.insert(0, (0, header_end))
+    
+    # and the connectAttr commands after the last one
+    connections_start = index.ends[-1] if len(index) else index.file_size
+    if connections_start < index.file_size:
+        byte_ranges.append((connections_start, index.file_size))
+    
+    parser = SceneParser(None)
+    parser.set_options(options)
+    parser.stats = stats
+    
+    if index.file_size:
+        with open(filepath, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                for start, end in byte_ranges:
+                    parser.parse_buffer(buffer, start, end)
+                parser.store_current_node()
+                
+                dependencies = _selection_dependencies(index, selected, parser.scene.connections)
+                dependency_ranges = index.byte_ranges(dependencies)
+                for start, end in dependency_ranges:
+                    parser.parse_buffer(buffer, start, end)
+                byte_ranges.extend(dependency_ranges)
+        
+        kept_names = {index.names[node_index] for node_index in itertools.chain(selected, dependencies)}
+        parser.scene.connections = parser.scene.connections.subgraph(kept_names)
+    
+    if stats is not None:
+        stats.count("bytes", sum(end - start for start, end in byte_ranges))
+    
+    parser.store_current_node()
+    parser.scene.filepath = filepath
+    return parser.scene
+
+
+def _selection_dependencies(index, selected, connections):
+    """
+    indices of the nodes in a SceneIndex the selected nodes need to be imported the same as in a whole file:
+    the shadingEngines they're in and the shaders of those, and the animation curves connected to them
+    """
+    long_names = index.long_names()
+    name_indices = {}
+    for node_index, (name, long_name) in enumerate(zip(index.names, long_names)):
+        name_indices.setdefault(name, []).append(node_index)
+        name_indices.setdefault(long_name, []).append(node_index)
+    
+    def node_indices(name):
+        return name_indices.get(name) or name_indices.get(name.rsplit("|", 1)[-1], [])
+    
+    selected_names = [name for node_index in selected for name in (index.names[node_index], long_names[node_index])]
+    connected_names = [dst_node for src_attr, dst_node, dst_attr in connections.outputs(*selected_names)]
+    connected_names.extend(src_node for src_node, src_attr, dst_attr in connections.inputs(*selected_names))
+    
+    dependencies = set()
+    shading_engines = []
+    for name in connected_names:
+        for node_index in node_indices(name):
+            nodetype = index.nodetypes[node_index]
+            if nodetype == "shadingEngine":
+                shading_engines.append(name)
+                dependencies.add(node_index)
+            elif nodetype in ANIM_CURVE_TYPES:
+                dependencies.add(node_index)
+    
+    for src_node, src_attr, dst_attr in connections.inputs(*shading_engines):
+        for node_index in node_indices(src_node):
+            if index.nodetypes[node_index] in MATERIAL_COLOR_ATTRS:
+                dependencies.add(node_index)
+    
+    return sorted(dependencies.difference(selected))
+
+
+def _parse_scene_ranges(filepath, workers, options, stats=None):
+    """
+    the workers only scan, tokenize and decode their range of the file,
+    the records they collect are dispatched to one SceneParser in file order.
+    that way parents (and pruned parents) in earlier ranges are known by the time their children come up
+    """
+    with open(filepath, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            byte_ranges = maya_parser_ascii.split_at_create_nodes(buffer, workers)
+    
+    parser = SceneParser(None)
+    parser.set_options(options)
+    
+    for records, range_stats in _recorded_ranges(filepath, byte_ranges, options, stats is not None):
+        if stats is not None:
+            stats.merge(range_stats)
+        
+        with import_stats.phase(stats, "range dispatch"):
+            parser.dispatch_all(records)
+    
+    parser.store_current_node()
+    parser.scene.filepath = filepath
+    return parser.scene
+
+
+def _recorded_ranges(filepath, byte_ranges, options, collect_stats):
+    if len(byte_ranges) == 1:
+        # no createNode line to split at
+        start, end = byte_ranges[0]
+        yield _record_range(filepath, start, end, options, collect_stats)
+        return
+    
+    executor = ProcessPoolExecutor(len(byte_ranges), mp_context=multiprocessing.get_context("spawn"))
+    try:
+        futures = [
+            executor.submit(_record_range, filepath, start, end, options, collect_stats)
+            for start, end in byte_ranges
+        ]
+        
+        for (start, end), future in zip(byte_ranges, futures):
+            try:
+                recorded = future.result()
+            except BrokenProcessPool:
+                print(f"Parsing in worker processes failed, parsing bytes {start}-{end} of '{filepath}' here instead.")
+                recorded = _record_range(filepath, start, end, options, collect_stats)
+            yield recorded
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _record_range(filepath, start, end, options, collect_stats=False):
+    """
+    the command records of a range of the file, and its ImportStats if collect_stats.
+    skips the same setAttr data a SceneParser with these options would skip,
+    as far as that can be told without knowing about the nodes before the range
+    """
+    scanner = SceneParser(None)
+    scanner.set_options(options)
+    if collect_stats:
+        scanner.stats = import_stats.ImportStats()
+    
+    records = []
+    with import_stats.phase(scanner.stats, "parse range", start=start, end=end):
+        with open(filepath, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                for record in scanner.iter_buffer(buffer, start, end, commands=SceneParser.parse_commands):
+                    records.append(record)
+                    
+                    record_type = type(record)
+                    if record_type is maya_parser_common.CreateNode:
+                        if not scanner.wants_node_attrs(record.nodetype):
+                            scanner.skip_node_attrs()
+                    elif record_type is maya_parser_common.Select:
+                        scanner.skip_node_attrs()
+    
+    return records, scanner.stats
+
+
+class ParseResult(object):
+    
+    def __init__(self, filepath, scene=None, error=None, stats=None):
+        self.filepath = filepath
+        self.scene = scene
+        self.error = error
+        self.stats = stats
+
+
+def _parse_result(filepath, options, workers=1, collect_stats=False, selection=None):
+    stats = import_stats.ImportStats() if collect_stats else None
+    try:
+        with import_stats.phase(stats, "parse", file=os.path.basename(filepath)):
+            scene = parse_scene(filepath, workers=workers, stats=stats, selection=selection, **options)
+        return ParseResult(filepath, scene=scene, stats=stats)
+    except Exception as e:
+        traceback.print_exc()
+        return ParseResult(filepath, error=f"{type(e).__name__}: {e}", stats=stats)
+
+
+def parse_scenes(filepaths, workers=None, cache=None, collect_stats=False, selection=None, **options):
+    """
+    parse several files in a pool of worker processes
+    yields a ParseResult per file as soon as it's ready, in the order of filepaths
+    
+    files found in the cache (a maya_scene_cache.ParseCache) aren't parsed at all,
+    the others are stored in it once parsed
+    
+    with collect_stats, every ParseResult comes with the ImportStats of its file
+    selection is an optional maya_scene_index.NodeSelection, applied to every file
+    """
+    filepaths = list(filepaths)
+    
+    # a selection gives a different scene, so it's cached separately
+    cache_options = dict(options)
+    if selection is not None:
+        cache_options["selection"] = selection.key()
+    
+    cached_filepaths = set()
+    if cache is not None:
+        cached_filepaths = {filepath for filepath in filepaths if cache.contains(filepath, cache_options)}
+    
+    parsed_results = _parse_results(
+        [filepath for filepath in filepaths if filepath not in cached_filepaths],
+        workers,
+        options,
+        collect_stats,
+        selection,
+    )
+    
+    for filepath in filepaths:
+        if filepath in cached_filepaths:
+            stats = import_stats.ImportStats() if collect_stats else None
+            with import_stats.phase(stats, "cache load", file=os.path.basename(filepath)):
+                scene = cache.load(filepath, cache_options)
+            
+            if scene is not None:
+                yield ParseResult(filepath, scene=scene, stats=stats)
+                continue
+            
+            # the entry couldn't be read after all
+            result = _parse_result(filepath, options, collect_stats=collect_stats, selection=selection)
+        else:
+            result = next(parsed_results)
+        
+        if cache is not None and result.scene is not None:
+            try:
+                with import_stats.phase(result.stats, "cache store", file=os.path.basename(filepath)):
+                    cache.store(filepath, cache_options, result.scene)
+            except OSError as e:
+                print(f"Failed to cache '{filepath}': {e}")
+        
+        yield result
+
+
+def _parse_results(filepaths, workers, options, collect_stats=False, selection=None):
+    """
+    when the pool can't be used (no worker could be started, or they can't import this module)
+    the remaining files are parsed in this process instead
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    
+    # the workers are put to use on the ranges of a single file instead
+    file_workers = workers
+    workers = min(workers, len(filepaths))
+    
+    if workers <= 1:
+        for filepath in filepaths:
+            yield _parse_result(filepath, options, file_workers, collect_stats, selection)
+        return
+    
+    # spawn, since forking a process with blender in it is asking for trouble
+    executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        futures = [
+            executor.submit(_parse_result, filepath, options, collect_stats=collect_stats, selection=selection)
+            for filepath in filepaths
+        ]
+        
+        for filepath, future in zip(filepaths, futures):
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                print(f"Parsing in worker processes failed, parsing '{filepath}' here instead.")
+                result = _parse_result(filepath, options, collect_stats=collect_stats, selection=selection)
+            yield result
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class SceneParser(maya_parser_ascii.MayaAsciiParser):
+    """
+    collects the nodes the importer supports into a Scene, no blender involved
+    """
+    
+    parse_commands = ("file", "currentUnit", "createNode", "setAttr", "select", "connectAttr")
+
+    def __init__(self, *args, **kwargs):
+        super(SceneParser, self).__init__(*args, **kwargs)
+        
+        self.on_supported_node = False
+        self.current_node = None
+        
+        # entry in scene.materials of the shader node being read
+        self.current_material = None
+        
+        # entry in scene.anim_curves of the animCurve node being read
+        self.current_anim_curve = None
+        
+        self.node_map = {}
+        self.scene = Scene()
+        
+        # import options, anything left out here is skipped before its data is decoded
+        self.import_uvs = True
+        self.import_cameras = True
+        self.import_hidden = True
+        
+        # meshes only get what their bounding box needs, the rest is read when the proxy is loaded
+        self.proxy_meshes = False
+        
+        # names of nodes left out by the import options, their children are left out as well
+        self.pruned_node_names = set()
+    
+        # attribute path (see maya_parser_common.parse_plug) -> handler(plug, value, type, is_array, size),
+        # per node type, the attributes that aren't in the table of their node are skipped
+        self.__attr_handlers = {
+            "transform": {
+                "t": self.__set_translate,
+                "r": self.__set_rotate,
+                "s": self.__set_scale,
+                "v": self.__set_visibility,
+            },
+            "camera": {
+                "v": self.__set_visibility,
+            },
+            "mesh": {
+                "v": self.__set_visibility,
+                "uvst.uvsn": self.__set_uv_set_name,
+                "uvst.uvsp": self.__set_uv_points,
+                "vt": self.__set_vertices,
+                "pt": self.__set_vertex_offsets,
+                "ed": self.__set_edges,
+                "n": self.__set_normals,
+                "fc": self.__set_poly_faces,
+                "iog.og.gcl": self.__set_group_components,
+                "instObjGroups.objectGroups.objectGrpCompList": self.__set_group_components,
+            },
+        }
+        self.__anim_curve_handlers = {
+            "ktv": self.__set_anim_curve_keys,
+            "kot": self.__set_anim_curve_out_tangents,
+            "tan": self.__set_anim_curve_tangent,
+            "tangentType": self.__set_anim_curve_tangent,
+        }
+
+    def set_options(self, options):
+        for option, value in options.items():
+            setattr(self, option, value)
+    
+    def parse(self):
+        super(SceneParser, self).parse()
+        
+        # the last node isn't followed by another createNode
+        self.store_current_node()
+    
+    def is_supported_node_type(self, nodetype):
+        if nodetype == "camera":
+            return self.import_cameras
+        return nodetype in ("mesh", "transform")
+    
+    def wants_node_attrs(self, nodetype):
+        return self.is_supported_node_type(nodetype) or nodetype in MATERIAL_COLOR_ATTRS or nodetype in ANIM_CURVE_TYPES
+    
+    def on_create_node(self, nodetype, name, parent):
+        
+        # save previous node
+        self.store_current_node()
+        
+        if nodetype in MATERIAL_COLOR_ATTRS:
+            self.current_material = {"nodetype": nodetype, "color": None}
+            self.scene.materials[name] = self.current_material
+            self.on_supported_node = False
+            return
+        
+        if nodetype in ANIM_CURVE_TYPES:
+            self.current_anim_curve = {
+                "nodetype": nodetype,
+                "keys": IndexedArray(2, np.float64),
+                "out_tangents": IndexedArray(1, np.int32),
+                "tangent": None,
+            }
+            self.scene.anim_curves[name] = self.current_anim_curve
+            self.on_supported_node = False
+            return
+        
+        self.on_supported_node = self.is_supported_node_type(nodetype)
+        
+        parent_node = self.node_map.get(parent)
+        
+        if parent in self.pruned_node_names:
+            self.on_supported_node = False
+            self.pruned_node_names.add(name)
+        
+        if nodetype == "camera" and not self.import_cameras:
+            if parent_node is not None:
+                parent_node.has_pruned_shape = True
+        
+        if not self.on_supported_node:
+            # tell the parser it can skip past the setAttr block of this node
+            self.skip_node_attrs()
+            return
+        
+        if nodetype == "mesh":
+            self.current_node = Mesh(name, nodetype, parent_node)
+            self.current_node.is_proxy = self.proxy_meshes
+            
+        if nodetype == "transform":
+            self.current_node = Transform(name, nodetype, parent_node)
+                              
+        if nodetype == "camera":
+            self.current_node = Camera(name, nodetype, parent_node)
+            
+        if parent_node is not None:
+            parent_node.children.append(self.current_node)
+
+    def store_current_node(self):
+        self.current_material = None
+        self.current_anim_curve = None
+        
+        if self.current_node:
+            # store both long and short name, since either may be referenced during loading
+            self.node_map[self.current_node.name] = self.current_node
+            self.node_map[self.current_node.long_name] = self.current_node
+            self.scene.nodes.append(self.current_node)
+            self.current_node = None
+
+    def prune_current_node(self):
+        node = self.current_node
+        self.pruned_node_names.add(node.name)
+        self.pruned_node_names.add(node.long_name)
+        
+        if node.parent is not None:
+            node.parent.children.remove(node)
+            node.parent.has_pruned_shape = True
+        
+        self.current_node = None
+        self.on_supported_node = False
+        self.skip_node_attrs()
+
+    def on_select(self, name):
+        # setAttr commands after a select don't belong to the node created before it
+        self.store_current_node()
+        self.on_supported_node = False
+        self.skip_node_attrs()
+
+    def wants_set_attr(self, name):
+        plug = maya_parser_common.parse_plug(name)
+        if not self.import_uvs and plug.attrs[0] == "uvst":
+            return False
+        if self.proxy_meshes and isinstance(self.current_node, Mesh) and not is_proxy_attr(plug):
+            return False
+        return True
+
+    def on_file_reference(self, path, namespace=None, deferred=False):
+        self.scene.references.append({"path": path, "namespace": namespace, "deferred": deferred})
+
+    def on_current_unit(self, angle, linear, time):
+        for unit_type, unit in (("angle", angle), ("linear", linear), ("time", time)):
+            if unit is not None:
+                self.scene.units[unit_type] = unit
+
+    def on_connect_attr(self, src_plug, dst_plug):
+        self.scene.connections.add(src_plug, dst_plug)
+
+    def on_set_attr(self, name, value, type, is_array=False, size=None):
+        if self.current_material is not None:
+            if name == MATERIAL_COLOR_ATTRS[self.current_material["nodetype"]] and value:
+                self.current_material["color"] = tuple(float(channel) for channel in value[:3])
+            return
+        
+        if self.current_anim_curve is None and not self.on_supported_node:
+            return
+        
+        plug = maya_parser_common.parse_plug(name)
+        
+        if self.current_anim_curve is not None:
+            handlers = self.__anim_curve_handlers
+        else:
+            # records parsed in the workers didn't know which node they're on, they weren't skipped there
+            if isinstance(self.current_node, Mesh) and self.current_node.is_proxy and not is_proxy_attr(plug):
+                return
+            handlers = self.__attr_handlers[self.current_node.nodetype]
+        
+        handler = handlers.get(plug.path)
+        if handler is not None:
+            handler(plug, value, type, is_array, size)
+
+    def __set_translate(self, plug, value, type, is_array, size):
+        if type == "double3":
+            self.current_node.location = value
+
+    def __set_rotate(self, plug, value, type, is_array, size):
+        if type == "double3":
+            self.current_node.rotation = value
+
+    def __set_scale(self, plug, value, type, is_array, size):
+        if type == "double3":
+            self.current_node.scale = value
+
+    def __set_visibility(self, plug, value, type, is_array, size):
+        if value == ["no"]:
+            self.current_node.visibility = False
+            
+            if not self.import_hidden:
+                self.prune_current_node()
+
+    def __set_uv_set_name(self, plug, value, type, is_array, size):
+        # the number of .uvst[0]
+        map_index = plug.indices[0][0]
+        self.current_node.uv_data.setdefault(map_index, {})["name"] = value[0]
+
+    def __set_uv_points(self, plug, value, type, is_array, size):
+        if not is_array:
+            return
+        
+        # the number of .uvst[0], the range is the one of .uvsp[0:2]
+        uv_data = self.current_node.uv_data.setdefault(plug.indices[0][0], {})
+        
+        # store all uv coordinate values, this is later indexed against polyFaces "mu"
+        co_data = uv_data.get("co")
+        if co_data is None:
+            co_data = IndexedArray(2, np.float32)
+            uv_data["co"] = co_data
+        
+        co_data.set_range(*plug.index_range, value, size)
+
+    def __set_vertices(self, plug, value, type, is_array, size):
+        # .vt[0:2]
+        if type == "vtx":
+            self.current_node.vert_data.set_range(*plug.index_range, value, size)
+
+    def __set_vertex_offsets(self, plug, value, type, is_array, size):
+        # point offsets I think this stands for? .pt[0:2] or .pt[2]
+        if plug.index_range is None:
+            return
+        
+        if not is_array:
+            value = [value]
+        self.current_node.vert_offsets.set_range(*plug.index_range, value, size)
+
+    def __set_edges(self, plug, value, type, is_array, size):
+        # .ed[0:2], all three values are kept, index 2 is hard/softness
+        if type == "edge":
+            self.current_node.edge_data.set_range(*plug.index_range, value, size)
+
+    def __set_normals(self, plug, value, type, is_array, size):
+        # per face-vertex normals, in the order of the loops
+        if type == "float3":
+            self.current_node.normal_data.set_range(*plug.index_range, value, size)
+
+    def __set_poly_faces(self, plug, value, type, is_array, size):
+        if type != "polyFaces":
+            return
+        
+        # edge ids are resolved to vertices once the mesh is built
+        if not self.import_uvs:
+            value.uv_indices.clear()
+            
+        self.current_node.poly_faces.append(value)
+                
+    def __set_group_components(self, plug, value, type, is_array, size):
+        # faces of a per-face shadingEngine membership, .iog[0].og[2].gcl
+        if type == "componentList" and value is not None and plug.indices[0] == (0, 0) and plug.indices[1] is not None:
+            self.current_node.face_groups[plug.indices[1][0]] = component_faces(value)
+
+    def __set_anim_curve_keys(self, plug, value, type, is_array, size):
+        # time and value of the keys, .ktv[0:2]
+        if type == "double2":
+            self.current_anim_curve["keys"].set_range(*plug.index_range, value, size)
+        
+    def __set_anim_curve_out_tangents(self, plug, value, type, is_array, size):
+        if value and plug.index_range is not None:
+            tangents = np.array(value, dtype=np.float64).astype(np.int32).reshape(-1, 1)
+            self.current_anim_curve["out_tangents"].set_range(*plug.index_range, tangents, size)
+                
+    def __set_anim_curve_tangent(self, plug, value, type, is_array, size):
+        if value:
+            self.current_anim_curve["tangent"] = int(float(value[0]))
+
+
+def is_proxy_attr(plug):
+    """
+    whether a mesh proxy needs the attribute, the vertices for its bounding box and whether it's hidden
+    """
+    return plug.path in ("vt", "pt", "v")
+
+
+def component_faces(components):
+    """
+    face indices of a componentList value, like ["2", "f[0:3]", "f[7]"], None for all of them ("f[*]")
+    """
+    faces = []
+    for component in components:
+        if not component.startswith("f["):
+            continue
+        
+        indices = component[2:-1]
+        if indices == "*":
+            return None
+        
+        first, _, last = indices.partition(":")
+        faces.append(np.arange(int(first), int(last or first) + 1, dtype=np.int32))
+    
+    return np.concatenate(faces) if faces else np.zeros(0, dtype=np.int32)
+
+
+class IndexedArray(object):
+    """
+    rows of a multi attribute like .vt[0:7] stored in a single typed array
+    
+    preallocated from the setAttr -s size when there is one,
+    and grown whenever a range ends up outside of it.
+    rows in between the ranges that were set stay zero, written tells them apart
+    """
+    
+    def __init__(self, width, dtype):
+        self.width = width
+        self.dtype = dtype
+        self.data = np.zeros((0, width), dtype=dtype)
+        self.written = np.zeros(0, dtype=bool)
+        
+        # one past the highest index that was set
+        self.count = 0
+    
+    def __len__(self):
+        return self.count
+    
+    def reserve(self, size):
+        if size <= len(self.data):
+            return
+        
+        data = np.zeros((size, self.width), dtype=self.dtype)
+        data[:self.count] = self.data[:self.count]
+        self.data = data
+        
+        written = np.zeros(size, dtype=bool)
+        written[:self.count] = self.written[:self.count]
+        self.written = written
+    
+    def set_range(self, start, end, values, size=None):
+        """
+        write values into the rows start to end (inclusive, like maya)
+        """
+        if size is not None:
+            self.reserve(size)
+        
+        end = min(end + 1, start + len(values))
+        if end > len(self.data):
+            self.reserve(max(end, len(self.data) * 2))
+        
+        self.data[start:end] = values[:end - start]
+        self.written[start:end] = True
+        self.count = max(self.count, end)
+    
+    def array(self):
+        return self.data[:self.count]
+    
+    def written_mask(self):
+        """
+        which rows of array() were set
+        """
+        return self.written[:self.count]
+
+
+class MayaNode(object):
+
+    supports_single_parent = False
+    
+    def __init__(self, name, nodetype, parent):
+        self.name = name
+        self.nodetype = nodetype
+        self.parent = parent
+        self.children = []
+        self.is_built = False
+        self.has_pruned_shape = False
+        
+        self.visibility = True
+        
+        long_name = f"|{name}"
+        if parent and isinstance(parent, MayaNode):
+            long_name = f"{parent.long_name}{long_name}"
+        self.long_name = long_name
+
+
+class Transform(MayaNode):
+    def __init__(self, *args, **kwargs):
+        super(Transform, self).__init__(*args, **kwargs)
+        
+        self.location = (0, 0, 0)
+        self.rotation = (0, 0, 0)
+        self.scale = (1, 1, 1)
+        
+        # the blender object, once built
+        self.built_node = None
+
+
+class Mesh(MayaNode):
+    
+    supports_single_parent = True
+    
+    def __init__(self, *args, **kwargs):
+        super(Mesh, self).__init__(*args, **kwargs)
+        
+        self.vert_data = IndexedArray(3, np.float64)
+        self.edge_data = IndexedArray(3, np.int32)
+        self.vert_offsets = IndexedArray(3, np.float64)
+        
+        # normals of face-vertices whose normal was set (locked) in maya, UNSET_NORMAL for the others
+        self.normal_data = IndexedArray(3, np.float32)
+        
+        # decoded .fc blocks, in the order they were set
+        self.poly_faces = []
+        
+        # face indices of the object groups (.iog[0].og[N]) the shadingEngines connect to, None for all faces
+        self.face_groups = {}
+        
+        # proxies only have their vertices, byte_range is where the node is in the file, to load the rest from
+        self.is_proxy = False
+        self.byte_range = None
+        
+        self.uv_data = {}
+        
+        # content_hash() once it's been worked out, the data doesn't change after parsing
+        self.content_digest = None
+    
+    def vertex_array(self):
+        """
+        (N, 3) vertex positions with the point offsets (.pt) added
+        """
+        verts = self.vert_data.array().copy()
+        
+        offsets = self.vert_offsets.array()
+        offset_count = min(len(verts), len(offsets))
+        verts[:offset_count] += offsets[:offset_count]
+        
+        return verts
+    
+    def bounds(self):
+        """
+        min and max corner of the vertices (with the point offsets), zeros for a mesh without any
+        """
+        verts = self.vertex_array()
+        if not len(verts):
+            return np.zeros(3), np.zeros(3)
+        return verts.min(axis=0), verts.max(axis=0)
+    
+    def edge_array(self):
+        """
+        (N, 2) vertex indices of each edge
+        """
+        return np.ascontiguousarray(self.edge_data.array()[:, :2])
+    
+    def sharp_edges(self):
+        """
+        whether each edge is hard, the third value of .ed is 0 for those
+        """
+        return self.edge_data.array()[:, 2] == 0
+    
+    def loop_normals(self, loop_count):
+        """
+        (loop_count, 3) custom normal of each loop, zeros for the loops that don't have one,
+        None when none of them do
+        """
+        normals = self.normal_data.array()[:loop_count]
+        is_set = np.all(np.abs(normals) < UNSET_NORMAL, axis=1)
+        if not is_set.any():
+            return None
+        
+        loop_normals = np.zeros((loop_count, 3), dtype=np.float32)
+        loop_normals[:len(normals)][is_set] = normals[is_set]
+        return loop_normals
+    
+    def face_arrays(self):
+        """
+        flat loop vertex indices, and the loop start and loop count of each face
+        """
+        loop_totals = np.concatenate(
+            [np.diff(poly_faces.face_offsets) for poly_faces in self.poly_faces] or [np.zeros(0, dtype=np.int32)]
+        ).astype(np.int32)
+        loop_starts = np.zeros(len(loop_totals), dtype=np.int32)
+        np.cumsum(loop_totals[:-1], out=loop_starts[1:])
+        
+        edge_ids = np.concatenate(
+            [poly_faces.edge_ids for poly_faces in self.poly_faces] or [np.zeros(0, dtype=np.int32)]
+        )
+        
+        # this took so goddamn long to figure out.
+        # edges[abs(id) - 1][1] to find vertices of a face
+        # autodesk what the fuu...?
+        reversed_edges = edge_ids < 0
+        edge_indices = np.where(reversed_edges, -edge_ids - 1, edge_ids)
+        loop_vertices = self.edge_data.array()[edge_indices, reversed_edges.astype(np.intp)]
+        
+        return loop_vertices.astype(np.int32), loop_starts, loop_totals
+    
+    def uv_arrays(self, uv_set_index):
+        """
+        (N, 2) uv coordinates of the set, and the coordinate index of each loop (-1 for none)
+        """
+        uv_co = self.uv_data[uv_set_index]["co"].array()
+        
+        loop_uv_indices = np.concatenate([
+            poly_faces.uv_indices.get(uv_set_index, np.full(len(poly_faces.edge_ids), -1, dtype=np.int32))
+            for poly_faces in self.poly_faces
+        ] or [np.zeros(0, dtype=np.int32)])
+        
+        return uv_co, loop_uv_indices
+    
+    def content_hash(self):
+        """
+        digest of the decoded vertex, edge, face and uv data,
+        meshes with the same digest can share one mesh datablock
+        """
+        if self.content_digest is not None:
+            return self.content_digest
+        
+        content = hashlib.blake2b(digest_size=20)
+        
+        def add_array(array):
+            array = np.ascontiguousarray(array)
+            content.update(f"{array.dtype.str}{array.shape}".encode())
+            content.update(array.data)
+        
+        add_array(self.vert_data.array())
+        add_array(self.vert_offsets.array())
+        add_array(self.edge_data.array())
+        add_array(self.normal_data.array())
+        
+        for poly_faces in self.poly_faces:
+            add_array(poly_faces.face_offsets)
+            add_array(poly_faces.edge_ids)
+            for uv_set_index, uv_indices in sorted(poly_faces.uv_indices.items()):
+                content.update(f"uv{uv_set_index}".encode())
+                add_array(uv_indices)
+        
+        for uv_set_index, uv_data in sorted(self.uv_data.items()):
+            content.update(f"uvset{uv_set_index}:{uv_data.get('name')}".encode())
+            if uv_data.get("co"):
+                add_array(uv_data["co"].array())
+        
+        self.content_digest = content.hexdigest()
+        return self.content_digest
+
+
+class Camera(MayaNode):
+    
+    supports_single_parent = True
+    
+    def __init__(self, *args, **kwargs):
+        super(Camera, self).__init__(*args, **kwargs)
@@ -0,0 +1,365 @@
+"""
+On-disk cache of parsed scenes, so importing the same file again skips the text parser.
+
+Each scene is stored as one .npz: the arrays of every node, plus the rest of the
+scene as json. An index.json in the cache directory keeps track of what's in there,
+and the least recently used entries are removed once the cache grows past its size cap.
+Several Blender instances can share the directory, the index is only changed while holding index.lock.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from . import bl_info
+from . import maya_parser_ascii
+from . import maya_scene
+from . import maya_scene_graph
+
+# bump whenever the layout of the cached data changes, or what a parse puts into it
+CACHE_FORMAT_VERSION = 9
+
+INDEX_FILE_NAME = "index.json"
+INDEX_LOCK_FILE_NAME = "index.lock"
+
+# seconds, a lock file older than this was left behind by a process that died and is taken over
+INDEX_LOCK_TIMEOUT = 10
+
+# node attributes that only mean something while building
+_BUILD_STATE_ATTRIBUTES = ("is_built", "built_node")
+
+
+class ParseCache(object):
+
+    def __init__(self, directory, max_size=2 * 1024 ** 3):
+        self.directory = directory
+        self.max_size = max_size
+
+    def key(self, filepath, options):
+        """
+        identifies a file by its path, size and modification time,
+        and the importer version and import options it was parsed with
+        """
+        stat = os.stat(filepath)
+        identity = json.dumps([
+            os.path.normcase(os.path.abspath(filepath)),
+            stat.st_size,
+            stat.st_mtime_ns,
+            list(bl_info["version"]),
+            CACHE_FORMAT_VERSION,
+            sorted(options.items()),
+        ])
+        return hashlib.sha1(identity.encode()).hexdigest()
+
+    def contains(self, filepath, options):
+        try:
+            return os.path.exists(self._entry_path(self.key(filepath, options)))
+        except OSError:
+            return False
+
+    def load(self, filepath, options):
+        """
+        the cached Scene of the file, or None when it's not in the cache
+        """
+        try:
+            key = self.key(filepath, options)
+        except OSError:
+            return None
+
+        entry_path = self._entry_path(key)
+        if not os.path.exists(entry_path):
+            return None
+
+        try:
+            with np.load(entry_path, allow_pickle=False) as arrays:
+                scene = scene_from_arrays(arrays)
+        except Exception as e:
+            print(f"Discarding unreadable cache entry for '{filepath}': {e}")
+            self._remove(key)
+            return None
+
+        scene.filepath = filepath
+
+        with self._index_lock():
+            index = self._read_index()
+            if key in index:
+                index[key]["last_used"] = time.time()
+                self._write_index(index)
+
+        return scene
+
+    def store(self, filepath, options, scene):
+        try:
+            key = self.key(filepath, options)
+        except OSError:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        entry_path = self._entry_path(key)
+        temp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            np.savez(f, **scene_to_arrays(scene))
+        os.replace(temp_path, entry_path)
+
+        with self._index_lock():
+            index = self._read_index()
+            index[key] = {
+                "filepath": filepath,
+                "size": os.path.getsize(entry_path),
+                "last_used": time.time(),
+            }
+            self._evict(index)
+            self._write_index(index)
+
+    def clear(self):
+        if not os.path.isdir(self.directory):
+            return
+
+        with self._index_lock():
+            for key in self._entry_sizes():
+                self._remove(key)
+            self._write_index({})
+
+    def _evict(self, index):
+        """
+        the sizes come from the .npz files in the directory rather than the index, so entries the index
+        lost track of still count towards max_size. they're removed first, as if they were never used
+        """
+        sizes = self._entry_sizes()
+
+        # entries removed by someone else
+        for key in set(index) - set(sizes):
+            del index[key]
+
+        total_size = sum(sizes.values())
+        for key in sorted(sizes, key=lambda key: index.get(key, {}).get("last_used", 0)):
+            if total_size <= self.max_size:
+                break
+
+            total_size -= sizes[key]
+            index.pop(key, None)
+            self._remove(key)
+
+    def _entry_sizes(self):
+        """
+        the size of every entry in the directory, by key
+        """
+        sizes = {}
+        for entry in os.scandir(self.directory):
+            key, extension = os.path.splitext(entry.name)
+            if extension != ".npz":
+                continue
+
+            try:
+                sizes[key] = entry.stat().st_size
+            except OSError:
+                pass
+
+        return sizes
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def _remove(self, key):
+        try:
+            os.remove(self._entry_path(key))
+        except OSError:
+            pass
+
+    @contextlib.contextmanager
+    def _index_lock(self):
+        """
+        held around every read-modify-write of the index, other processes wait for it
+        """
+        lock_path = os.path.join(self.directory, INDEX_LOCK_FILE_NAME)
+        while True:
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                pass
+
+            try:
+                is_stale = time.time() - os.path.getmtime(lock_path) > INDEX_LOCK_TIMEOUT
+            except OSError:
+                # released in the meantime
+                continue
+
+            if is_stale:
+                print(f"Taking over the cache index lock '{lock_path}', left behind by another process")
+                try:
+                    os.remove(lock_path)
+                except OSError:
+                    pass
+            else:
+                time.sleep(0.01)
+
+        try:
+            yield
+        finally:
+            os.remove(lock_path)
+
+    def _read_index(self):
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE_NAME), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index):
+        index_path = os.path.join(self.directory, INDEX_FILE_NAME)
+        temp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(temp_path, index_path)
+
+
+def scene_to_arrays(scene):
+    """
+    flatten a Scene into named arrays for np.savez,
+    everything that isn't an array goes into the json under "scene"
+    """
+    arrays = {}
+    node_indices = {id(node): index for index, node in enumerate(scene.nodes)}
+
+    nodes = []
+    for index, node in enumerate(scene.nodes):
+        attributes = {}
+        for name, value in vars(node).items():
+            if name in _BUILD_STATE_ATTRIBUTES:
+                continue
+            elif name == "parent":
+                value = node_indices.get(id(value))
+            elif name == "children":
+                value = [node_indices[id(child)] for child in value]
+            else:
+                value = _encode(value, f"n{index}.{name}", arrays)
+            attributes[name] = value
+
+        nodes.append({"class": type(node).__name__, "attributes": attributes})
+
+    scene_attributes = {
+        name: _encode(value, f"scene.{name}", arrays)
+        for name, value in vars(scene).items()
+        if name not in ("nodes", "filepath")
+    }
+
+    arrays["scene"] = np.frombuffer(json.dumps({
+        "nodes": nodes,
+        "attributes": scene_attributes,
+    }).encode(), dtype=np.uint8)
+
+    return arrays
+
+
+def scene_from_arrays(arrays):
+    data = json.loads(arrays["scene"].tobytes().decode())
+
+    scene = maya_scene.Scene()
+    for name, value in data["attributes"].items():
+        setattr(scene, name, _decode(value, arrays))
+
+    for node_data in data["nodes"]:
+        node_class = getattr(maya_scene, node_data["class"])
+        node = node_class.__new__(node_class)
+        for name, value in node_data["attributes"].items():
+            if name not in ("parent", "children"):
+                value = _decode(value, arrays)
+            setattr(node, name, value)
+
+        node.is_built = False
+        if isinstance(node, maya_scene.Transform):
+            node.built_node = None
+        scene.nodes.append(node)
+
+    # parent and children were stored as indices
+    for node in scene.nodes:
+        if node.parent is not None:
+            node.parent = scene.nodes[node.parent]
+        node.children = [scene.nodes[index] for index in node.children]
+
+    return scene
+
+
+def _encode(value, key, arrays):
+    if isinstance(value, np.ndarray):
+        arrays[key] = value
+        return {"__array__": key}
+
+    if isinstance(value, maya_scene.IndexedArray):
+        arrays[key] = value.array()
+        arrays[f"{key}.w"] = value.written_mask()
+        return {"__indexed_array__": key}
+
+    if isinstance(value, maya_parser_ascii.PolyFaces):
+        return {"__poly_faces__": [
+            _encode(value.face_offsets, f"{key}.fo", arrays),
+            _encode(value.edge_ids, f"{key}.ei", arrays),
+            _encode(value.uv_indices, f"{key}.uv", arrays),
+        ]}
+
+    if isinstance(value, maya_scene_graph.ConnectionGraph):
+        value.finalize()
+        return {"__connection_graph__": [
+            value.node_names,
+            value.attr_names,
+            _encode(value.connections, f"{key}.c", arrays),
+        ]}
+    
+    if isinstance(value, dict):
+        # keys aren't always strings (uv set indices), so store the items
+        return {"__dict__": [
+            [item_key, _encode(item_value, f"{key}.{item_index}", arrays)]
+            for item_index, (item_key, item_value) in enumerate(value.items())
+        ]}
+
+    if isinstance(value, tuple):
+        return {"__tuple__": _encode(list(value), key, arrays)}
+
+    if isinstance(value, list):
+        return [_encode(item, f"{key}.{item_index}", arrays) for item_index, item in enumerate(value)]
+
+    if isinstance(value, np.generic):
+        return value.item()
+
+    return value
+
+
+def _decode(value, arrays):
+    if isinstance(value, list):
+        return [_decode(item, arrays) for item in value]
+
+    if not isinstance(value, dict):
+        return value
+
+    if "__array__" in value:
+        return arrays[value["__array__"]]
+
+    if "__indexed_array__" in value:
+        key = value["__indexed_array__"]
+        data = arrays[key]
+        indexed_array = maya_scene.IndexedArray(data.shape[1], data.dtype)
+        indexed_array.data = data
+        indexed_array.written = arrays[f"{key}.w"]
+        indexed_array.count = len(data)
+        return indexed_array
+
+    if "__poly_faces__" in value:
+        return maya_parser_ascii.PolyFaces(*[_decode(item, arrays) for item in value["__poly_faces__"]])
+
+    if "__connection_graph__" in value:
+        node_names, attr_names, connections = value["__connection_graph__"]
+        return maya_scene_graph.ConnectionGraph(node_names, attr_names, _decode(connections, arrays))
+    
+    if "__tuple__" in value:
+        return tuple(_decode(value["__tuple__"], arrays))
+
+    if "__dict__" in value:
+        return {item_key: _decode(item_value, arrays) for item_key, item_value in value["__dict__"]}
+
+    return value
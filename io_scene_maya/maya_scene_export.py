@@ -0,0 +1,219 @@
+"""
+Writes parsed scenes out without Blender, used by the command line converter (python -m io_scene_maya).
+
+An .obj of the meshes in world space plus a .json of the node hierarchy,
+or the whole parsed scene as an .npz (maya_scene_cache.scene_from_arrays(np.load(path)) reads it back).
+Positions stay Y up and in the linear unit of the file, like they are in maya.
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+
+from . import maya_scene
+from . import maya_scene_cache
+from . import maya_scene_references
+
+OUTPUT_FORMATS = ("obj", "npz")
+
+
+def local_matrix(scene, transform):
+    """
+    4x4 matrix of the translate, rotate (xyz order) and scale of a transform, pivots aren't taken into account
+    """
+    rx, ry, rz = scene.to_radians(transform.rotation)
+    
+    rotate_x = np.array([[1, 0, 0], [0, np.cos(rx), -np.sin(rx)], [0, np.sin(rx), np.cos(rx)]])
+    rotate_y = np.array([[np.cos(ry), 0, np.sin(ry)], [0, 1, 0], [-np.sin(ry), 0, np.cos(ry)]])
+    rotate_z = np.array([[np.cos(rz), -np.sin(rz), 0], [np.sin(rz), np.cos(rz), 0], [0, 0, 1]])
+    
+    matrix = np.identity(4)
+    matrix[:3, :3] = rotate_z @ rotate_y @ rotate_x @ np.diag(np.asarray(transform.scale, dtype=np.float64))
+    matrix[:3, 3] = np.asarray(transform.location, dtype=np.float64)
+    return matrix
+
+
+def world_matrices(scene):
+    """
+    world matrix of every node by id(node), shapes get the matrix of their transform
+    """
+    matrices = {}
+    for node in scene.nodes:
+        parent_matrix = matrices.get(id(node.parent), np.identity(4))
+        if isinstance(node, maya_scene.Transform):
+            matrices[id(node)] = parent_matrix @ local_matrix(scene, node)
+        else:
+            matrices[id(node)] = parent_matrix
+    return matrices
+
+
+def write_obj(scene, filepath):
+    """
+    every mesh as an object with its first uv set, returns the number of meshes written
+    """
+    matrices = world_matrices(scene)
+    mesh_count = 0
+    vertex_offset = 0
+    uv_offset = 0
+    
+    with open(filepath, "w") as f:
+        f.write(f"# {os.path.basename(scene.filepath or '')}\n")
+        
+        for node in scene.nodes:
+            if not isinstance(node, maya_scene.Mesh) or not len(node.vert_data):
+                continue
+            
+            matrix = matrices[id(node)]
+            verts = node.vertex_array() @ matrix[:3, :3].T + matrix[:3, 3]
+            loop_vertices, loop_starts, loop_totals = node.face_arrays()
+            
+            f.write(f"o {node.long_name}\n")
+            np.savetxt(f, verts, fmt="v %.6f %.6f %.6f")
+            
+            loop_uvs = None
+            uv_sets = [uv_set_index for uv_set_index, uv_data in sorted(node.uv_data.items()) if uv_data.get("co")]
+            if uv_sets:
+                uv_co, loop_uv_indices = node.uv_arrays(uv_sets[0])
+                
+                # obj faces have a uv on every corner or none at all
+                if len(loop_uv_indices) == len(loop_vertices) and np.all((loop_uv_indices >= 0) & (loop_uv_indices < len(uv_co))):
+                    np.savetxt(f, uv_co, fmt="vt %.6f %.6f")
+                    loop_uvs = loop_uv_indices + uv_offset + 1
+                    uv_offset += len(uv_co)
+            
+            write_obj_faces(f, loop_vertices + vertex_offset + 1, loop_totals, loop_uvs)
+            vertex_offset += len(verts)
+            mesh_count += 1
+    
+    return mesh_count
+
+
+def write_obj_faces(f, loop_vertices, loop_totals, loop_uvs=None):
+    """
+    faces come in runs of the same size, every run is written as one block of rows
+    """
+    if loop_uvs is None:
+        loops = loop_vertices
+        corner_format = "%d"
+        corner_width = 1
+    else:
+        loops = np.column_stack([loop_vertices, loop_uvs]).ravel()
+        corner_format = "%d/%d"
+        corner_width = 2
+    
+    run_starts = np.flatnonzero(np.diff(loop_totals, prepend=-1))
+    run_ends = np.append(run_starts[1:], len(loop_totals))
+    
+    loop_start = 0
+    for run_start, run_end in zip(run_starts, run_ends):
+        face_size = int(loop_totals[run_start])
+        loop_end = loop_start + (run_end - run_start) * face_size
+        
+        faces = loops[loop_start * corner_width:loop_end * corner_width].reshape(-1, face_size * corner_width)
+        np.savetxt(f, faces, fmt="f " + " ".join([corner_format] * face_size))
+        loop_start = loop_end
+
+
+def scene_hierarchy(scene):
+    """
+    the nodes of a scene and what's known about them, as json data
+    """
+    nodes = []
+    for node in scene.nodes:
+        entry = {
+            "name": node.name,
+            "long_name": node.long_name,
+            "type": node.nodetype,
+            "parent": node.parent.long_name if node.parent is not None else None,
+            "visible": bool(node.visibility),
+        }
+        
+        if isinstance(node, maya_scene.Transform):
+            entry["translate"] = [float(value) for value in node.location]
+            entry["rotate"] = [float(value) for value in node.rotation]
+            entry["scale"] = [float(value) for value in node.scale]
+            
+            animation = scene.node_animation(node)
+            if animation:
+                entry["animated"] = sorted({f"{data_path}[{index}]" for data_path, index, curve_name in animation})
+        
+        if isinstance(node, maya_scene.Mesh):
+            entry["vertices"] = len(node.vert_data)
+            entry["faces"] = sum(len(poly_faces.face_offsets) - 1 for poly_faces in node.poly_faces)
+            entry["uv_sets"] = [uv_data.get("name") for uv_set_index, uv_data in sorted(node.uv_data.items())]
+            entry["materials"] = [shader for shader in scene.mesh_shading(node, entry["faces"])[0]]
+        
+        nodes.append(entry)
+    
+    return {
+        "file": scene.filepath,
+        "units": scene.units,
+        "nodes": nodes,
+        "materials": {name: material["color"] for name, material in scene.materials.items()},
+        "references": scene.references,
+        "warnings": scene.warnings,
+    }
+
+
+def output_stems(filepaths, output_directory):
+    """
+    where to write each file to, without the extension.
+    the folders of the files are kept below output_directory, assets/props/crate.ma.gz -> output/props/crate,
+    files that would still end up at the same place keep their whole name, crate.ma -> crate.ma, crate.mb -> crate.mb
+    """
+    folders = [os.path.dirname(os.path.abspath(filepath)) for filepath in filepaths]
+    common_folder = os.path.commonpath(folders) if folders else ""
+    
+    stems = []
+    for filepath, folder in zip(filepaths, folders):
+        base_filepath = maya_scene.split_compression(filepath)[0]
+        stem = os.path.splitext(os.path.basename(base_filepath))[0]
+        stems.append(os.path.join(output_directory, os.path.relpath(folder, common_folder), stem))
+    
+    return [
+        os.path.join(os.path.dirname(stem), os.path.basename(filepath)) if stems.count(stem) > 1 else stem
+        for filepath, stem in zip(filepaths, stems)
+    ]
+
+
+def convert_file(filepath, stem, output_format="obj", workers=1, import_references=True, **options):
+    """
+    parse a file and write it out to stem + the extensions of the format,
+    options are the parse options of maya_scene.parse_scene.
+    returns a summary of what was written
+    """
+    start = time.perf_counter()
+    
+    scene = maya_scene.parse_scene(filepath, workers=workers, **options)
+    if import_references and scene.references:
+        resolver = maya_scene_references.ReferenceResolver(
+            lambda reference_filepaths: maya_scene.parse_scenes(reference_filepaths, workers=1, **options)
+        )
+        resolver.resolve(scene, filepath)
+    
+    os.makedirs(os.path.dirname(stem) or ".", exist_ok=True)
+    
+    outputs = []
+    mesh_count = sum(isinstance(node, maya_scene.Mesh) for node in scene.nodes)
+    
+    if output_format == "npz":
+        outputs.append(stem + ".npz")
+        np.savez(outputs[-1], **maya_scene_cache.scene_to_arrays(scene))
+    else:
+        outputs.append(stem + ".obj")
+        mesh_count = write_obj(scene, outputs[-1])
+        
+        outputs.append(stem + ".json")
+        with open(outputs[-1], "w") as f:
+            json.dump(scene_hierarchy(scene), f, indent=1)
+    
+    return {
+        "filepath": filepath,
+        "outputs": outputs,
+        "nodes": len(scene.nodes),
+        "meshes": mesh_count,
+        "warnings": scene.warnings,
+        "seconds": time.perf_counter() - start,
+    }
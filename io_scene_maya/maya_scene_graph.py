@@ -0,0 +1,164 @@
+"""
+The connectAttr commands of a scene, as a graph between node attributes.
+
+Node names and attribute names are interned into ids, every connection is a row of
+(source node, source attribute, destination node, destination attribute) ids,
+and the rows are indexed by source node and by destination node like a CSR matrix,
+so the connections of a node are found without going over all of them.
+"""
+
+import numpy as np
+
+
+def split_plug(plug):
+    """
+    "pCubeShape1.iog[0].og[1]" -> ("pCubeShape1", ".iog[0].og[1]")
+    the leading colon of the root namespace (":initialShadingGroup") is left off the node name
+    """
+    node, dot, attr = plug.partition(".")
+    if node.startswith(":"):
+        node = node[1:]
+    return node, dot + attr
+
+
+def namespaced(name, namespace):
+    """
+    "|grp|pCube1" in the namespace "props" -> "|props:grp|props:pCube1"
+    """
+    if not namespace:
+        return name
+    return "|".join(f"{namespace}:{part}" if part else part for part in name.split("|"))
+
+
+class ConnectionGraph(object):
+
+    def __init__(self, node_names=None, attr_names=None, connections=None):
+        self.node_names = list(node_names or [])
+        self.attr_names = list(attr_names or [])
+        
+        # (N, 4) source node, source attribute, destination node, destination attribute ids
+        self.connections = np.zeros((0, 4), dtype=np.int32) if connections is None else connections
+        
+        self.__node_ids = {name: node_id for node_id, name in enumerate(self.node_names)}
+        self.__attr_ids = {name: attr_id for attr_id, name in enumerate(self.attr_names)}
+        
+        # rows added since the connections array was last built
+        self.__pending = []
+        
+        # (offsets, rows) per indexed column, built on the first lookup
+        self.__indices = {}
+
+    def __len__(self):
+        return len(self.connections) + len(self.__pending)
+
+    def add(self, src_plug, dst_plug):
+        src_node, src_attr = split_plug(src_plug)
+        dst_node, dst_attr = split_plug(dst_plug)
+        self.__pending.append((
+            self.__intern(self.__node_ids, self.node_names, src_node),
+            self.__intern(self.__attr_ids, self.attr_names, src_attr),
+            self.__intern(self.__node_ids, self.node_names, dst_node),
+            self.__intern(self.__attr_ids, self.attr_names, dst_attr),
+        ))
+
+    def finalize(self):
+        """
+        move the added connections into the connections array
+        """
+        if not self.__pending:
+            return
+        
+        pending = np.array(self.__pending, dtype=np.int32).reshape(-1, 4)
+        self.connections = np.concatenate([self.connections, pending])
+        self.__pending = []
+        self.__indices = {}
+
+    def add_graph(self, graph, namespace=None):
+        """
+        add the connections of another graph, with its node names put in the namespace.
+        only the names are looked at one by one, the connections are remapped as a whole
+        """
+        self.finalize()
+        graph.finalize()
+        
+        node_ids = np.array([
+            self.__intern(self.__node_ids, self.node_names, namespaced(name, namespace)) for name in graph.node_names
+        ], dtype=np.int32)
+        attr_ids = np.array([
+            self.__intern(self.__attr_ids, self.attr_names, name) for name in graph.attr_names
+        ], dtype=np.int32)
+        
+        rows = graph.connections
+        added = np.column_stack([
+            node_ids[rows[:, 0]],
+            attr_ids[rows[:, 1]],
+            node_ids[rows[:, 2]],
+            attr_ids[rows[:, 3]],
+        ]).astype(np.int32).reshape(-1, 4)
+        
+        self.connections = np.concatenate([self.connections, added])
+        self.__indices = {}
+
+    def subgraph(self, node_names):
+        """
+        a graph of only the connections from or to the nodes,
+        node_names are short names, the nodes of the graph are matched by the last part of their name
+        """
+        self.finalize()
+        
+        node_names = set(node_names)
+        kept_nodes = np.array([name.rsplit("|", 1)[-1] in node_names for name in self.node_names], dtype=bool)
+        if not len(kept_nodes):
+            return ConnectionGraph(self.node_names, self.attr_names)
+        
+        kept_rows = kept_nodes[self.connections[:, 0]] | kept_nodes[self.connections[:, 2]]
+        return ConnectionGraph(self.node_names, self.attr_names, self.connections[kept_rows])
+
+    def outputs(self, *node_names):
+        """
+        (source attribute, destination node, destination attribute) of every connection out of the nodes,
+        a node can be given by more than one name (short and long)
+        """
+        return [
+            (self.attr_names[src_attr], self.node_names[dst_node], self.attr_names[dst_attr])
+            for src_node, src_attr, dst_node, dst_attr in self.__rows(0, node_names)
+        ]
+
+    def inputs(self, *node_names):
+        """
+        (source node, source attribute, destination attribute) of every connection into the nodes
+        """
+        return [
+            (self.node_names[src_node], self.attr_names[src_attr], self.attr_names[dst_attr])
+            for src_node, src_attr, dst_node, dst_attr in self.__rows(2, node_names)
+        ]
+
+    def __rows(self, column, node_names):
+        self.finalize()
+        
+        node_ids = {self.__node_ids.get(split_plug(name)[0]) for name in node_names}
+        node_ids.discard(None)
+        if not node_ids:
+            return []
+        
+        offsets, rows = self.__index(column)
+        found = [rows[offsets[node_id]:offsets[node_id + 1]] for node_id in sorted(node_ids)]
+        return self.connections[np.sort(np.concatenate(found))].tolist()
+
+    def __index(self, column):
+        index = self.__indices.get(column)
+        if index is None:
+            node_ids = self.connections[:, column]
+            offsets = np.zeros(len(self.node_names) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(node_ids, minlength=len(self.node_names)), out=offsets[1:])
+            index = offsets, np.argsort(node_ids, kind="stable")
+            self.__indices[column] = index
+        return index
+
+    @staticmethod
+    def __intern(ids, names, name):
+        name_id = ids.get(name)
+        if name_id is None:
+            name_id = ids[name] = len(names)
+            names.append(name)
+        return name_id
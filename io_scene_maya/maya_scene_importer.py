@@ -1,11 +1,27 @@
+import hashlib
+import mmap
 import os
 import traceback
-from math import radians
+from math import pi
+import numpy as np
 import mathutils
 import bpy
 from bpy_extras.io_utils import axis_conversion
 
-from . import maya_parser_ascii
+from . import import_stats
+from . import maya_scene
+from . import maya_scene_index
+from . import maya_scene_references
+
+# custom properties of proxy objects, the byte range is a "start:end" string since it can be past what an int property holds
+PROXY_FILEPATH_PROP = "maya_proxy_filepath"
+PROXY_NODE_PROP = "maya_proxy_node"
+PROXY_BYTE_RANGE_PROP = "maya_proxy_byte_range"
+
+# keyframe interpolation enum values, as foreach_set takes them
+INTERPOLATION_CONSTANT = 0
+INTERPOLATION_LINEAR = 1
+INTERPOLATION_BEZIER = 2
 
 # convenience example call to this function
 # import io_scene_maya.maya_scene_importer; import importlib; importlib.reload(io_scene_maya.maya_scene_importer); io_scene_maya.maya_scene_importer.import_scene(None, C, r"SOME_MAYA_FILE.ma")
@@ -15,6 +31,43 @@ def import_scene(operator, context, filepath,
                  *args, 
                  **kwargs
                  ):
+    return import_scenes(operator, context, [filepath], correction_matrix, *args, **kwargs)
+
+
+def import_scenes(operator, context, filepaths, 
+                  correction_matrix=None, 
+                  import_uvs=True,
+                  import_cameras=True,
+                  import_hidden=True,
+                  proxy_meshes=False,
+                  import_references=True,
+                  cache=None,
+                  stats=None,
+                  trace_filepath=None,
+                  selection=None,
+                  batched_build=False,
+                  *args, 
+                  **kwargs
+                  ):
+    """
+    files are parsed in parallel worker processes, and built one by one as they come in
+    cache is an optional maya_scene_cache.ParseCache, files found in it aren't parsed again
+    
+    pass an import_stats.ImportStats as stats to get the timings and counts of the import recorded into it,
+    trace_filepath writes them as a chrome trace as well
+    
+    selection is an optional maya_scene_index.NodeSelection, to import only part of each file
+    
+    with batched_build, every file gets a collection of its own which is added to the scene once
+    all of its objects are created, see SceneBuilder.finish_batch. Otherwise the objects go straight into the scene
+    
+    with proxy_meshes, meshes are imported as bounding boxes, see load_proxies
+    
+    with import_references, the files referenced by the imported files come along under their namespaces,
+    every referenced file is parsed once for the whole import. left out when importing a selection
+    """
+    if trace_filepath and stats is None:
+        stats = import_stats.ImportStats()
     
     # nothing provided, assume it's a Y up maya scene
     if correction_matrix is None:
@@ -23,227 +76,240 @@ def import_scene(operator, context, filepath,
                         from_up="Y",
                         ).to_4x4()
     
-    ext = os.path.splitext(filepath)[1].lower()
+    failed_files = []
+    warnings = []
     
-    if ext != ".ma":
-        if operator:
-            operator.report({'ERROR'}, f"Only .ma files are supported, not: {os.path.basename(filepath)}")
-        return {'CANCELLED'}
+    supported_filepaths = []
+    for filepath in filepaths:
+        ext = maya_scene.scene_file_type(filepath)
+        if ext not in (".ma", ".mb"):
+            failed_files.append(f"{os.path.basename(filepath)}: only .ma and .mb files are supported")
+            continue
+        
+        if ext == ".mb" and maya_scene.split_compression(filepath)[1] is not None:
+            failed_files.append(f"{os.path.basename(filepath)}: compressed .mb files aren't supported, only compressed .ma")
+            continue
+        supported_filepaths.append(filepath)
     
-    print(f"Importing .ma: {filepath}")
-
-    with open(filepath, "r") as f:
-        parser = Parser(f)
-        parser.correction_matrix = correction_matrix
-        parser.parse()
-        parser.build_scene()
+    parse_options = dict(
+        import_uvs=import_uvs,
+        import_cameras=import_cameras,
+        import_hidden=import_hidden,
+        proxy_meshes=proxy_meshes,
+    )
+    
+    # mesh datablocks by Mesh.content_hash(), shared between all files of the import
+    mesh_datablocks = {}
+    
+    reference_resolver = None
+    if import_references and selection is None:
+        # referenced files are imported whole, proxies only work for the imported files themselves
+        reference_options = dict(parse_options, proxy_meshes=False)
+        reference_resolver = maya_scene_references.ReferenceResolver(
+            lambda reference_filepaths: maya_scene.parse_scenes(
+                reference_filepaths,
+                cache=cache,
+                collect_stats=stats is not None,
+                **reference_options
+            ),
+            stats,
+        )
+    
+    imported_count = 0
+    parsed_results = maya_scene.parse_scenes(
+        supported_filepaths,
+        cache=cache,
+        collect_stats=stats is not None,
+        selection=selection,
+        **parse_options
+    )
+    
+    for result in parsed_results:
+        file_name = os.path.basename(result.filepath)
+        
+        if result.stats is not None:
+            stats.merge(result.stats)
+        
+        if result.error is not None:
+            failed_files.append(f"{file_name}: {result.error}")
+            continue
         
+        print(f"Importing: {result.filepath}")
+        
+        if reference_resolver is not None:
+            reference_resolver.resolve(result.scene, result.filepath)
+        elif result.scene.references:
+            result.scene.warnings.append(f"{len(result.scene.references)} file reference(s) left out")
+        
+        warnings.extend(f"{file_name}: {warning}" for warning in result.scene.warnings)
+        
+        builder = SceneBuilder(result.scene, context, correction_matrix, stats, mesh_datablocks, batched_build)
+        with import_stats.phase(stats, "build", file=file_name):
+            builder.build_scene()
+        imported_count += 1
+        
+        if builder.unsuccesful_nodes:
+            warnings.append(f"{file_name}: failed to import '{len(builder.unsuccesful_nodes)}' node(s)")
+    
+    if trace_filepath:
+        try:
+            stats.write_chrome_trace(trace_filepath)
+        except OSError as e:
+            warnings.append(f"Failed to write trace '{trace_filepath}': {e}")
+    
     if operator:
-        if parser.unsuccesful_nodes:
-            operator.report({'WARNING'}, f"Imported: {os.path.basename(filepath)}\nNOTE: Failed to import '{len(parser.unsuccesful_nodes)}' node(s).\nSee Window - System Console for more info.")
+        summary = [f"Imported {imported_count} of {len(filepaths)} file(s)"]
+        summary.extend(failed_files)
+        summary.extend(warnings)
+        
+        if stats is not None:
+            summary.extend(stats.summary())
+        
+        if failed_files and not imported_count:
+            level = 'ERROR'
+        elif failed_files or warnings:
+            level = 'WARNING'
+            summary.append("See Window - System Console for more info.")
         else:
-            operator.report({'INFO'}, f"Imported: {os.path.basename(filepath)}")
+            level = 'INFO'
+        
+        operator.report({level}, "\n".join(summary))
+    
+    if failed_files:
+        return {'CANCELLED'}
     
     return {'FINISHED'}
 
 
-class Parser(maya_parser_ascii.MayaAsciiParser):
+def load_proxies(context, objects):
+    """
+    replace the boxes of proxy objects with the geometry of their mesh nodes,
+    only the byte range of each node is parsed.
+    returns the number of objects loaded, and a message for each one that couldn't be
+    """
+    objects_by_file = {}
+    for obj in objects:
+        filepath = obj.get(PROXY_FILEPATH_PROP)
+        if filepath:
+            objects_by_file.setdefault(filepath, []).append(obj)
+    
+    loaded_count = 0
+    failures = []
+    for filepath, file_objects in objects_by_file.items():
+        try:
+            with open(filepath, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    for obj in file_objects:
+                        if load_proxy(context, obj, filepath, buffer):
+                            loaded_count += 1
+                        else:
+                            failures.append(f"{obj.name}: mesh '{obj[PROXY_NODE_PROP]}' not found in '{filepath}'")
+        except (OSError, ValueError) as e:
+            failures.extend(f"{obj.name}: {e}" for obj in file_objects)
+    
+    return loaded_count, failures
 
-    def __init__(self, *args, **kwargs):
-        super(Parser, self).__init__(*args, **kwargs)
-        
-        self.on_supported_node = False
-        self.current_node = None
-        
-        self.node_map = {}
-        self.scene_nodes = []
-        
-        self.correction_matrix = None
 
-        self.unsuccesful_nodes = []
+def load_proxy(context, obj, filepath, buffer):
+    long_name = obj[PROXY_NODE_PROP]
     
-    def on_create_node(self, nodetype, name, parent):
-        
-        # save previous node
-        if self.current_node:
-            # store both long and short name, since either may be referenced during loading
-            self.node_map[self.current_node.name] = self.current_node
-            self.node_map[self.current_node.long_name] = self.current_node
-            self.scene_nodes.append(self.current_node)
-            self.current_node = None
-        
-        self.on_supported_node = nodetype in (
-            "mesh", 
-            "transform", 
-            "camera"
-        )
-        
-        if not self.on_supported_node:
-            return
-        
-        parent_node = self.node_map.get(parent)
-        
-        if nodetype == "mesh":
-            self.current_node = Mesh(name, nodetype, parent_node)
-            
-        if nodetype == "transform":
-            self.current_node = Transform(name, nodetype, parent_node)
-            self.current_node.correction_matrix = self.correction_matrix
-                              
-        if nodetype == "camera":
-            self.current_node = Camera(name, nodetype, parent_node)
-            
-        if parent_node is not None:
-            parent_node.children.append(self.current_node)
+    byte_range = proxy_byte_range(obj, buffer)
+    if byte_range is None:
+        # the file changed since the import, the node index has the new offsets
+        index = maya_scene_index.load_index(filepath)
+        long_names = index.long_names()
+        if long_name not in long_names:
+            return False
+        node_index = long_names.index(long_name)
+        byte_range = index.starts[node_index], index.ends[node_index]
+    
+    mesh = maya_scene.parse_proxy_mesh(buffer, *byte_range)
+    if mesh is None:
+        return False
+    
+    new_mesh = SceneBuilder(maya_scene.Scene(), context, None).create_mesh_data(mesh)
+    
+    proxy_mesh = obj.data
+    obj.data = new_mesh
+    if proxy_mesh is not None and not proxy_mesh.users:
+        bpy.data.meshes.remove(proxy_mesh)
+    
+    for prop in (PROXY_FILEPATH_PROP, PROXY_NODE_PROP, PROXY_BYTE_RANGE_PROP):
+        if prop in obj:
+            del obj[prop]
+    obj.display_type = 'TEXTURED'
+    
+    return True
 
-    def on_set_attr(self, name, value, type):
-        if not self.on_supported_node:
-            return
-        
-        if name == ".t" and type == "double3":
-            self.current_node.location = value
-            return
-        
-        if name == ".r" and type == "double3":
-            self.current_node.rotation = value
-            return
-        
-        if name == ".s" and type == "double3":
-            self.current_node.scale = value
-            return
-            
-        if name == ".v":
-            if value == ["no"]:
-                self.current_node.visibility = False
-            return
 
-        # uv data
-        if ".uvst" in name:
-            if ".uvsn" in name:
-                # get the number from .uvst[0]
-                map_index = int(name.split("[")[1].split("]")[0])
-                uv_data = self.current_node.uv_data.get(map_index, {})
-                
-                uv_data["name"] = value[0]
-                self.current_node.uv_data[map_index] = uv_data
-            
-            if ".uvsp" in name and ":" in name:
-                # get the first number from .uvst[0].uvsp[0:2]
-                map_index = int(name.split("[")[1].split("]")[0])
-                uv_data = self.current_node.uv_data.get(map_index, {})
-                
-                # get the last numbers from uvst[0].uvsp[0:2]
-                start_index, end_index = name.split("[")[-1].split("]")[0].split(":")
-                index_range = list(range(int(start_index), int(end_index)+1))
-                
-                # store all uv coordinate values, this is later indexed against polyFaces "mu"
-                co_data = uv_data.get("co", {})
-                for uv_idx, uv_coordinate in zip(index_range, value):
-                    co_data[uv_idx] = uv_coordinate
-                uv_data["co"] = co_data
+def proxy_byte_range(obj, buffer):
+    """
+    the byte range stored on the object, None when it doesn't start at the createNode of the mesh anymore
+    """
+    try:
+        start, end = (int(offset) for offset in obj[PROXY_BYTE_RANGE_PROP].split(":"))
+    except (KeyError, ValueError):
+        return None
+    
+    if end > len(buffer):
+        return None
+    
+    short_name = obj[PROXY_NODE_PROP].rsplit("|", 1)[-1]
+    line_end = buffer.find(b"\n", start, end)
+    first_line = buffer[start:end if line_end == -1 else line_end]
+    if not first_line.startswith(b"createNode mesh ") or f'"{short_name}"'.encode() not in first_line:
+        return None
+    
+    return start, end
 
-                self.current_node.uv_data[map_index] = uv_data
-            
-            return
-        
-        if type == "vtx":
-            # get the numbers from .vt[0:2]
-            start_index, end_index = name.split("[")[1].split("]")[0].split(":")
-            index_range = list(range(int(start_index), int(end_index) + 1))
-            
-            for vert_idx, vert_data in zip(index_range, value):
-                self.current_node.vert_data[vert_idx] = vert_data
-            
-            return
-        
-        # point offsets I think this stands for?
-        if "pt[" in name:
-            if ":" in name:
-                # get the numbers from .pt[0:2]
-                start_index, end_index = name.split("[")[1].split("]")[0].split(":")
-                index_range = list(range(int(start_index), int(end_index)+1))
-                
-                for vert_idx, subval in zip(index_range, value):
-                    self.current_node.vert_offsets[vert_idx] = subval
-            else:
-                offset_index = int(name.split("[")[-1].split("]")[0])
-                self.current_node.vert_offsets[offset_index] = value
-                
-            return
-        
-        if type == "edge":
-            chunked_edges = []
-            for val in value:
-                chunked_edges.append((val[0], val[1])) # index 2 is hard/softness
-            
-            # get the numbers from .ed[0:2]
-            start_index, end_index = name.split("[")[1].split("]")[0].split(":")
-            index_range = list(range(int(start_index), int(end_index) + 1))
-            
-            for edge_idx, edge_connection in zip(index_range, chunked_edges):
-                self.current_node.edge_data[edge_idx] = edge_connection
-            
-            return
+
+def edge_keys(edges):
+    """
+    a single int64 per (N, 2) edge, the same for both directions
+    """
+    edges = np.sort(edges, axis=1).astype(np.int64)
+    return (edges[:, 0] << 32) | edges[:, 1]
+
+
+class SceneBuilder(object):
+    """
+    creates the blender objects of a parsed maya_scene.Scene
+    """
+    
+    def __init__(self, scene, context, correction_matrix, stats=None, mesh_datablocks=None, batched=False):
+        self.scene = scene
+        self.context = context
+        self.collection = context.scene.collection
+        self.correction_matrix = correction_matrix
+        self.stats = stats
+        
+        # with batched, objects are linked into a collection of the file once they're all created,
+        # and parented, placed and hidden after that. otherwise each object goes into the scene as it's built
+        self.batched = batched
+        self.pending_links = []
+        self.pending_placements = []
+        self.pending_hides = []
+        
+        # copies of the same mesh are built once, and linked to every object that uses it
+        self.mesh_datablocks = {} if mesh_datablocks is None else mesh_datablocks
+        
+        # blender materials by shader name
+        self.materials = {}
+        
+        self.node_builders = {
+            "transform": self.build_transform,
+            "mesh": self.build_mesh,
+            "camera": self.build_camera,
+        }
         
-        if type == "polyFaces":
-            all_face_uv_data = self.current_node.face_uv_data
-            
-            all_raw_face_data = []
-            for i, fv in enumerate(value):
-                
-                # get edge connection indices
-                if fv == "f":
-                    face_count = int(value[i+1])
-                    
-                    face_data = []
-                    for j in range(face_count):
-                        # skip first two indexes here, since that's just "f" and face_count
-                        edge_index = int(value[i+2+j])
-                        face_data.append(edge_index)
-                    
-                    all_raw_face_data.append(face_data)
-                
-                # get per-face uv indices
-                if fv == "mu":
-                    map_index = int(value[i+1])
-                    face_count = int(value[i+2])
-                    
-                    uv_indices = []
-                    for j in range(face_count):
-                        # skip first three indexes here, since that's just mu, index, and face_count
-                        uv_index = int(value[i+3+j])
-                        uv_indices.append(uv_index)
-                    
-                    # store uv indices for each map index
-                    map_data = all_face_uv_data.get(map_index, [])
-                    map_data.append(uv_indices)
-                    all_face_uv_data[map_index] = map_data
-            
-            
-            # extract vertex id's from edge id's
-            all_face_data = []
-            for mesh_face in all_raw_face_data:
-                face_data = []
-                for edge_id in mesh_face:
-                
-                    # this took so goddamn long to figure out.
-                    # edges[abs(id) - 1][1] to find vertices of a face
-                    # autodesk what the fuu...?
-                    if edge_id < 0:
-                        target_vert = self.current_node.edge_data[abs(edge_id) - 1][1]
-                    else:
-                        target_vert = self.current_node.edge_data[edge_id][0]
-                    
-                    face_data.append(target_vert)
-                
-                all_face_data.append(face_data)
-            
-            self.current_node.face_data.extend(all_face_data)
-            
-            return
+        self.unsuccesful_nodes = []
 
     def build_scene(self):
-        for node in self.scene_nodes[:]:
+        for node in self.scene.nodes:
+            
+            if not node.children and node.has_pruned_shape:
+                # the shape of this transform was left out, no point in an empty object
+                continue
         
             if len(node.children) == 1:
                 if node.children[0].supports_single_parent:
@@ -251,187 +317,415 @@ class Parser(maya_parser_ascii.MayaAsciiParser):
                     continue
             
             try:
-                node.build()
+                self.node_builders[node.nodetype](node)
             except Exception as e:
                 self.unsuccesful_nodes.append(node)
                 traceback.print_exc()
                 print(f"Failed to recreate node '{node.name}'. See error above.")
+        
+        if self.batched:
+            self.finish_batch()
 
+    def finish_batch(self):
+        """
+        link the objects into a new collection while it's not in the scene yet, then add the collection,
+        so the view layer is synced once instead of once per object
+        """
+        with import_stats.phase(self.stats, "object link"):
+            file_name = os.path.basename(self.scene.filepath or "") or "Maya Scene"
+            collection = bpy.data.collections.new(file_name)
+            for new_object in self.pending_links:
+                collection.objects.link(new_object)
+            self.collection.children.link(collection)
+        
+        with import_stats.phase(self.stats, "object placement"):
+            # parents come before their children, like the nodes
+            for new_object, parent_object, matrix in self.pending_placements:
+                if parent_object is not None:
+                    new_object.parent = parent_object
+                if matrix is not None:
+                    new_object.matrix_basis = matrix
+        
+        with import_stats.phase(self.stats, "visibility"):
+            for new_object in self.pending_hides:
+                new_object.hide_set(True)
+        
+        if self.stats is not None:
+            self.stats.count("objects", len(self.pending_links))
+        
+        self.pending_links = []
+        self.pending_placements = []
+        self.pending_hides = []
 
-class MayaNode(object):
+    def link_object(self, new_object):
+        if self.batched:
+            self.pending_links.append(new_object)
+        else:
+            self.collection.objects.link(new_object)
 
-    supports_single_parent = False
-    
-    def __init__(self, name, nodetype, parent):
-        self.name = name
-        self.nodetype = nodetype
-        self.parent = parent
-        self.children = []
-        self.is_built = False
-        
-        self.visibility = True
+    def place_object(self, new_object, parent_object=None, matrix=None):
+        if self.batched:
+            self.pending_placements.append((new_object, parent_object, matrix))
+            return
         
-        long_name = f"|{name}"
-        if parent and isinstance(parent, MayaNode):
-            long_name = f"{parent.long_name}{long_name}"
-        self.long_name = long_name
-    
-    def build(self):
-        pass
+        if parent_object is not None:
+            new_object.parent = parent_object
+        if matrix is not None:
+            new_object.matrix_basis = matrix
 
+    def hide_object(self, new_object):
+        if self.batched:
+            self.pending_hides.append(new_object)
+        else:
+            new_object.hide_set(True)
 
-class Transform(MayaNode):
-    def __init__(self, *args, **kwargs):
-        super(Transform, self).__init__(*args, **kwargs)
+    def build_transform(self, node, in_type=None):
+        if node.is_built:
+            return node.built_node
         
-        self.location = (0, 0, 0)
-        self.rotation = (0, 0, 0)
-        self.scale = (1, 1, 1)
-        self.built_node = None
-    
-    def build(self, in_type=None):
-        if self.is_built:
-            return self.built_node
-        
-        self.is_built = True
+        node.is_built = True
         
-        new_object = bpy.data.objects.new(self.name, in_type)
-        bpy.context.scene.collection.objects.link(new_object)
+        new_object = bpy.data.objects.new(node.name, in_type)
+        self.link_object(new_object)
         
         # save reference for transforms with multiple shape children
-        self.built_node = new_object
-        
-        eul = mathutils.Euler(
-            [
-                radians(self.rotation[0]),
-                radians(self.rotation[1]),
-                radians(self.rotation[2]),
-            ]
-        )
+        node.built_node = new_object
         
-        output_matrix = mathutils.Matrix.LocRotScale(self.location, eul, self.scale)
+        eul = mathutils.Euler(self.scene.to_radians(node.rotation).tolist())
+        
+        output_matrix = mathutils.Matrix.LocRotScale(node.location, eul, node.scale)
+        
+        animation = self.scene.node_animation(node)
 
-        if isinstance(self.parent, Transform):
-            new_object.parent = self.parent.built_node
-            new_object.matrix_basis = output_matrix
+        if isinstance(node.parent, maya_scene.Transform):
+            self.place_object(new_object, node.parent.built_node, output_matrix)
+        elif animation:
+            # the keys would overwrite the axis correction, so it goes on a parent instead
+            correction_object = bpy.data.objects.new(node.name + "_AXIS_CORRECTION", None)
+            self.link_object(correction_object)
+            self.place_object(correction_object, None, self.correction_matrix)
+            self.place_object(new_object, correction_object, output_matrix)
         else:
             # only apply axis correction on top level nodes
-            new_object.matrix_basis = self.correction_matrix @ output_matrix
+            self.place_object(new_object, None, self.correction_matrix @ output_matrix)
         
-        if not self.visibility:
-            new_object.hide_set(True)
+        if not node.visibility:
+            self.hide_object(new_object)
         
-        if isinstance(self.parent, Transform) and self.parent.visibility == False:
-            self.visibility = False
-            new_object.hide_set(True)
+        if isinstance(node.parent, maya_scene.Transform) and node.parent.visibility == False:
+            node.visibility = False
+            self.hide_object(new_object)
+        
+        if animation:
+            with import_stats.phase(self.stats, "animation"):
+                self.build_animation(new_object, animation)
         
         return new_object
 
+    def build_animation(self, obj, channels):
+        """
+        an action with an F-Curve per animated channel,
+        all keys of a curve are added at once and filled in with foreach_set
+        """
+        render = self.context.scene.render
+        frame_rate = render.fps / render.fps_base
+        
+        obj.animation_data_create()
+        action = bpy.data.actions.new(obj.name + "Action")
+        obj.animation_data.action = action
+        
+        for data_path, index, curve_name in channels:
+            frames, values, out_tangents = self.scene.anim_curve_keys(curve_name, frame_rate)
+            if not len(frames):
+                continue
+            
+            if self.stats is not None:
+                self.stats.count("keyframes", len(frames))
+            
+            if hasattr(action, "fcurve_ensure_for_datablock"):
+                # 4.4 and up, actions have slots the curves belong to
+                fcurve = action.fcurve_ensure_for_datablock(obj, data_path, index=index)
+            else:
+                fcurve = action.fcurves.new(data_path, index=index)
+            
+            keyframe_points = fcurve.keyframe_points
+            keyframe_points.add(len(frames))
+            
+            co = np.column_stack([frames, values]).astype(np.float32).ravel()
+            keyframe_points.foreach_set("co", co)
+            keyframe_points.foreach_set("handle_left", co)
+            keyframe_points.foreach_set("handle_right", co)
+            
+            interpolation = np.select(
+                [out_tangents == maya_scene.TANGENT_STEP, out_tangents == maya_scene.TANGENT_LINEAR],
+                [INTERPOLATION_CONSTANT, INTERPOLATION_LINEAR],
+                INTERPOLATION_BEZIER,
+            ).astype(np.int32)
+            if (interpolation != INTERPOLATION_BEZIER).any():
+                keyframe_points.foreach_set("interpolation", interpolation)
+            
+            # works out the auto handles
+            fcurve.update()
 
-class Mesh(MayaNode):
-    
-    supports_single_parent = True
-    
-    def __init__(self, *args, **kwargs):
-        super(Mesh, self).__init__(*args, **kwargs)
+    def build_mesh(self, node):
+        node.is_built = True
         
-        self.vert_data = {}
-        self.edge_data = {}
-        self.face_data = []
-        self.vert_offsets = {}
+        if not node.vert_data:
+            print(f"no vert data found to build mesh from: {node.name}")
+            return
         
-        self.uv_data = {}
-        self.face_uv_data = {}
-    
-    def build(self):
-        self.is_built = True
+        if node.is_proxy:
+            new_mesh = self.create_proxy_mesh(node)
+        else:
+            new_mesh = self.get_mesh_data(node)
         
-        if not self.vert_data:
-            print(f"no vert data found to build mesh from: {self.name}")
-            return
+        obj = None
         
-        # construct vertex list of from dict of indices
-        final_verts = [(0,0,0)] * (max(self.vert_data.keys())+1)
-        for idx, vtx_pos in self.vert_data.items():
-        
-            offset = self.vert_offsets.get(idx)
-            if offset is not None:
-                vtx_pos = (
-                    vtx_pos[0] + offset[0],
-                    vtx_pos[1] + offset[1],
-                    vtx_pos[2] + offset[2],
-                )
+        # if the parent only has one child, and it's this, we can skip making an in-between transform
+        if node.parent and len(node.parent.children) == 1:
+            obj = self.build_transform(node.parent, new_mesh)
+            
+        else:
+            # parent needs multiple children, let's just add this mesh as a child
+            obj = bpy.data.objects.new(node.name + "_TRANSFORM", new_mesh)
+            self.link_object(obj)
             
-            final_verts[idx] = vtx_pos
+            if node.parent:
+                self.place_object(obj, node.parent.built_node)
+        
+        if node.is_proxy:
+            obj[PROXY_FILEPATH_PROP] = self.scene.filepath
+            obj[PROXY_NODE_PROP] = node.long_name
+            if node.byte_range is not None:
+                obj[PROXY_BYTE_RANGE_PROP] = "{}:{}".format(*node.byte_range)
+            obj.display_type = 'WIRE'
+        
+        # propagate visibilty
+        if isinstance(node.parent, maya_scene.Transform) and node.parent.visibility == False:
+            node.visibility = False
+            self.hide_object(obj)
+
+    def get_mesh_data(self, node):
+        """
+        the mesh datablock of a node, shared with the nodes built before it that have the same data
+        """
+        with import_stats.phase(self.stats, "material assignment"):
+            face_count = sum(len(poly_faces) for poly_faces in node.poly_faces)
+            shader_names, face_slots = self.scene.mesh_shading(node, face_count)
+            materials = [self.get_material(shader_name) for shader_name in shader_names]
+        
+        with import_stats.phase(self.stats, "mesh hash"):
+            # copies with different materials can't share the datablock
+            content_hash = (
+                node.content_hash(),
+                tuple(material.name_full if material else None for material in materials),
+                None if face_slots is None else hashlib.blake2b(face_slots.tobytes()).hexdigest(),
+            )
+        
+        new_mesh = self.mesh_datablocks.get(content_hash)
+        if new_mesh is None:
+            with import_stats.phase(self.stats, "mesh build", node=node.name):
+                new_mesh = self.create_mesh_data(node, materials, face_slots)
+            self.mesh_datablocks[content_hash] = new_mesh
+        elif self.stats is not None:
+            self.stats.count("shared meshes")
+        
+        return new_mesh
+
+    def create_proxy_mesh(self, mesh):
+        """
+        a box around the vertices of the mesh, standing in until load_proxies reads the geometry
+        """
+        low, high = mesh.bounds()
+        corners = [(x, y, z) for x in (low[0], high[0]) for y in (low[1], high[1]) for z in (low[2], high[2])]
+        faces = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+        
+        new_mesh = bpy.data.meshes.new(f"{mesh.name}_proxy")
+        new_mesh.from_pydata(corners, [], faces)
+        new_mesh.update()
+        return new_mesh
+
+    def build_camera(self, node):
+        node.is_built = True
+        
+        new_camera = bpy.data.cameras.new(node.name)
+        
+        if len(node.parent.children) == 1:
+            self.build_transform(node.parent, new_camera)
+        else:
+            new_object = bpy.data.objects.new(node.name + "_TRANSFORM", new_camera)
+            self.link_object(new_object)
+            self.place_object(new_object, node.parent.built_node)
+
+    def get_material(self, shader_name):
+        """
+        the blender material of a shader, made on first use. None stays None, for an empty slot
+        """
+        if shader_name is None:
+            return None
+        
+        material = self.materials.get(shader_name)
+        if material is None:
+            material = bpy.data.materials.new(shader_name)
+            
+            color = self.scene.materials.get(shader_name, {}).get("color")
+            if color is not None:
+                material.diffuse_color = (*color, 1.0)
+            
+            self.materials[shader_name] = material
+        
+        return material
+
+    def create_mesh_data(self, mesh, materials=(), face_slots=None):
+        """
+        build the mesh datablock from flat arrays with foreach_set,
+        every uv layer is a single gather of its coordinates through the per-loop uv indices
+        
+        face_slots is the material index of every face, set in one go
+        """
+        verts = mesh.vertex_array()
+        edges = mesh.edge_array()
+        with import_stats.phase(self.stats, "polyFaces resolution"):
+            loop_vertices, loop_starts, loop_totals = mesh.face_arrays()
         
-        # construct edge list from dict of indices
-        final_edges = [(0, 0)] * (max(self.edge_data.keys())+1)
-        for idx, edge_connection in self.edge_data.items():
-            final_edges[idx] = edge_connection
+        if self.stats is not None:
+            self.stats.count("vertices", len(verts))
+            self.stats.count("loops", len(loop_vertices))
+        
+        new_mesh = bpy.data.meshes.new(mesh.name)
+        
+        new_mesh.vertices.add(len(verts))
+        new_mesh.vertices.foreach_set("co", verts.astype(np.float32).ravel())
+        
+        new_mesh.edges.add(len(edges))
+        new_mesh.edges.foreach_set("vertices", edges.ravel())
+        
+        new_mesh.loops.add(len(loop_vertices))
+        new_mesh.loops.foreach_set("vertex_index", loop_vertices)
+        
+        new_mesh.polygons.add(len(loop_starts))
+        new_mesh.polygons.foreach_set("loop_start", loop_starts)
+        try:
+            new_mesh.polygons.foreach_set("loop_total", loop_totals)
+        except (AttributeError, TypeError):
+            # read-only in newer versions, where it's derived from loop_start
+            pass
+        
+        # fills in the edge index of each loop
+        new_mesh.update(calc_edges=True)
+        
+        # uvs go on before validating, so any loops removed there take their uvs with them
+        with import_stats.phase(self.stats, "uv build"):
+            self.create_uv_layers(mesh, new_mesh)
+        
+        for material in materials:
+            new_mesh.materials.append(material)
+        
+        if face_slots is not None and len(face_slots) == len(loop_starts):
+            new_mesh.polygons.foreach_set("material_index", face_slots)
         
-        new_mesh = bpy.data.meshes.new(self.name)
-        new_mesh.from_pydata(final_verts, final_edges, self.face_data)
+        new_mesh.validate(clean_customdata=False)
+        
+        with import_stats.phase(self.stats, "normals"):
+            self.create_shading(mesh, new_mesh)
+        
+        new_mesh.update()
+        
+        return new_mesh
+    
+    def create_shading(self, mesh, new_mesh):
+        """
+        maya shades every face smooth and splits the shading at hard edges only,
+        on top of that the normals that were set in maya become custom normals
+        """
+        new_mesh.polygons.foreach_set("use_smooth", np.ones(len(new_mesh.polygons), dtype=bool))
+        
+        try:
+            # custom normals and sharp edges only show with auto smooth before 4.1
+            new_mesh.use_auto_smooth = True
+            new_mesh.auto_smooth_angle = pi
+        except AttributeError:
+            pass
+        
+        hard_edges = mesh.edge_array()[mesh.sharp_edges()]
+        if len(hard_edges):
+            # calc_edges and validate can reorder the edges, they're matched by their vertices instead
+            built_edges = np.zeros(len(new_mesh.edges) * 2, dtype=np.int32)
+            new_mesh.edges.foreach_get("vertices", built_edges)
+            sharp = np.isin(edge_keys(built_edges.reshape(-1, 2)), edge_keys(hard_edges))
+            
+            try:
+                new_mesh.edges.foreach_set("use_edge_sharp", sharp)
+            except AttributeError:
+                sharp_attribute = new_mesh.attributes.get("sharp_edge") or new_mesh.attributes.new("sharp_edge", 'BOOLEAN', 'EDGE')
+                sharp_attribute.data.foreach_set("value", sharp)
+        
+        if len(mesh.normal_data):
+            loop_normals = mesh.loop_normals(len(new_mesh.loops))
+            if loop_normals is not None:
+                if len(mesh.normal_data) > len(new_mesh.loops):
+                    print(f"{mesh.name} has more normals than face-vertices, the extra ones are left out")
+                new_mesh.normals_split_custom_set(loop_normals)
+    
+    def create_uv_layers(self, mesh, new_mesh):
+        for uv_set_index, uv_data in mesh.uv_data.items():
+            uv_set_name = uv_data.get("name")
+            new_uv = new_mesh.uv_layers.new(name=uv_set_name, do_init=False)
+            
+            if not uv_data.get("co"):
+                print(f"No uv data found on: {mesh.name} for set: {uv_set_name}")
+                continue
+            
+            uv_co, loop_uv_indices = mesh.uv_arrays(uv_set_index)
+            
+            invalid_indices = loop_uv_indices >= len(uv_co)
+            if invalid_indices.any():
+                print(f"{mesh.name} has '{np.count_nonzero(invalid_indices)}' uv indices outside of UVSet '{uv_set_name}'.")
+            
+            # loops of faces without uvs in this set (-1) end up at 0, 0
+            uv_co = np.vstack([uv_co, np.zeros((1, 2), dtype=np.float32)])
+            loop_uv_indices = np.where(invalid_indices, -1, loop_uv_indices)
+            
+            new_uv.data.foreach_set("uv", uv_co[loop_uv_indices].ravel())
+    
+    def create_mesh_data_from_pydata(self, mesh):
+        """
+        the previous from_pydata builder with per-loop uv assignment,
+        only kept around to compare against in benchmarks/bench_mesh_build.py
+        """
+        final_verts = mesh.vertex_array().tolist()
+        final_edges = mesh.edge_array().tolist()
+        
+        loop_vertices, loop_starts, loop_totals = mesh.face_arrays()
+        final_faces = [face.tolist() for face in np.split(loop_vertices, loop_starts[1:])] if len(loop_starts) else []
+        
+        new_mesh = bpy.data.meshes.new(mesh.name)
+        new_mesh.from_pydata(final_verts, final_edges, final_faces)
         new_mesh.validate(clean_customdata=False)
         new_mesh.update()
         
         # I wrote this in a haze, not sure I can explain it anymore, seems to work?
-        for uv_set_index, uv_data in self.uv_data.items():
+        for uv_set_index, uv_data in mesh.uv_data.items():
             uv_set_name = uv_data.get("name")
             coordinates = uv_data.get("co")
             new_uv = new_mesh.uv_layers.new(name=uv_set_name, do_init=False)
             
             if not coordinates:
-                print(f"No uv data found on: {self.name} for set: {uv_set_name}")
+                print(f"No uv data found on: {mesh.name} for set: {uv_set_name}")
                 continue
             
+            coordinates = coordinates.array().tolist() + [[0.0, 0.0]]  # -1 for loops without uvs
+            
             # build full list of uv coordinates that can be indexed per mesh.loop
             full_coordinates = []
-            for face_index, face_uv_indices in enumerate(self.face_uv_data.get(uv_set_index)):
-                for uv_index in face_uv_indices:
-                    full_coordinates.append(coordinates[uv_index])
+            for uv_index in mesh.uv_arrays(uv_set_index)[1].tolist():
+                full_coordinates.append(coordinates[uv_index])
             
             for loop in new_mesh.loops:
                 try:
                     new_uv.data[loop.index].uv = full_coordinates[loop.index]
                 except IndexError:
-                    print(f"{self.name} failed to map index '{loop.index}' to UVSet '{uv_set_name}' of length {len(full_coordinates)}, not sure why.")
+                    print(f"{mesh.name} failed to map index '{loop.index}' to UVSet '{uv_set_name}' of length {len(full_coordinates)}, not sure why.")
                     continue
         
-        obj = None
-        
-        # if the parent only has one child, and it's this, we can skip making an in-between transform
-        if self.parent and len(self.parent.children) == 1:
-            obj = self.parent.build(new_mesh)
-            
-        else:
-            # parent needs multiple children, let's just add this mesh as a child
-            obj = bpy.data.objects.new(self.name + "_TRANSFORM", new_mesh)
-            bpy.context.scene.collection.objects.link(obj)
-            
-            if self.parent:
-                obj.parent = self.parent.built_node
-        
-        # propagate visibilty
-        if isinstance(self.parent, Transform) and self.parent.visibility == False:
-            self.visibility = False
-            obj.hide_set(True)
-        
-
-class Camera(MayaNode):
-    
-    supports_single_parent = True
-    
-    def __init__(self, *args, **kwargs):
-        super(Camera, self).__init__(*args, **kwargs)
-
-    def build(self):
-        self.is_built = True
-        
-        new_camera = bpy.data.cameras.new(self.name)
-        
-        if len(self.parent.children) == 1:
-            self.parent.build(new_camera)
-        else:
-            new_object = bpy.data.objects.new(self.name + "_TRANSFORM", new_camera)
-            bpy.context.scene.collection.objects.link(new_object)
-            new_object.parent = self.parent.built_node
+        return new_mesh
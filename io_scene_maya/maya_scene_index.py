@@ -0,0 +1,247 @@
+"""
+Inventory of the nodes in a .ma file, without parsing any of their attributes.
+
+Only the top level lines of the file are looked at, each createNode gets an entry
+with its type, name, parent and the byte range of its block of commands.
+The index is saved beside the file, so parts of the file can be imported later
+by parsing just the byte ranges of the nodes that are wanted.
+"""
+
+import fnmatch
+import itertools
+import json
+import mmap
+import os
+import re
+
+from . import maya_parser_ascii
+
+# bump whenever the layout of the saved index changes
+INDEX_FORMAT_VERSION = 1
+
+INDEX_FILE_SUFFIX = ".index.json"
+
+# start of every line that isn't indented
+_TOP_LEVEL_LINE_RE = re.compile(rb"\n(?=\S)")
+
+# commands of a node's block that aren't always indented
+_NODE_BLOCK_COMMANDS = (b"setAttr", b"addAttr", b"rename", b"lockNode")
+
+
+class SceneIndex(object):
+    """
+    the nodes of a file in file order, as columns
+    parent_indices point at the entry of the parent, -1 for nodes without one (or an unknown one)
+    """
+
+    def __init__(self, file_size=0, file_mtime_ns=0):
+        self.file_size = file_size
+        self.file_mtime_ns = file_mtime_ns
+
+        self.nodetypes = []
+        self.names = []
+        self.parents = []
+        self.parent_indices = []
+        self.starts = []
+        self.ends = []
+
+        self.__long_names = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def long_names(self):
+        if self.__long_names is None:
+            self.__long_names = []
+            for name, parent_index in zip(self.names, self.parent_indices):
+                parent_long_name = self.__long_names[parent_index] if parent_index >= 0 else ""
+                self.__long_names.append(f"{parent_long_name}|{name}")
+        return self.__long_names
+
+    def byte_ranges(self, indices):
+        """
+        the byte ranges of the entries, in file order, touching ranges merged into one
+        """
+        byte_ranges = []
+        for index in sorted(indices):
+            start, end = self.starts[index], self.ends[index]
+            if byte_ranges and byte_ranges[-1][1] == start:
+                byte_ranges[-1] = (byte_ranges[-1][0], end)
+            else:
+                byte_ranges.append((start, end))
+        return byte_ranges
+
+    def to_json(self):
+        return {
+            "version": INDEX_FORMAT_VERSION,
+            "file_size": self.file_size,
+            "file_mtime_ns": self.file_mtime_ns,
+            "nodetypes": self.nodetypes,
+            "names": self.names,
+            "parents": self.parents,
+            "parent_indices": self.parent_indices,
+            "starts": self.starts,
+            "ends": self.ends,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        index = cls(data["file_size"], data["file_mtime_ns"])
+        for column in ("nodetypes", "names", "parents", "parent_indices", "starts", "ends"):
+            setattr(index, column, data[column])
+        return index
+
+
+def scan_index(buffer, file_size=0, file_mtime_ns=0):
+    """
+    build a SceneIndex from a bytes-like buffer of a whole file
+    """
+    index = SceneIndex(file_size, file_mtime_ns)
+    create_node_parser = maya_parser_ascii.MayaAsciiParserBase()
+
+    # short and long names, like SceneParser.node_map
+    node_indices = {}
+    long_names = []
+
+    def close_node(end):
+        if len(index.ends) < len(index.starts):
+            index.ends.append(end)
+
+    line_starts = itertools.chain([0], (match.end() for match in _TOP_LEVEL_LINE_RE.finditer(buffer)))
+    for line_start in line_starts:
+        words = buffer[line_start:line_start + 16].split(None, 1)
+        command = words[0] if words else b""
+
+        if command in _NODE_BLOCK_COMMANDS:
+            continue
+
+        close_node(line_start)
+
+        if command != b"createNode":
+            continue
+
+        command_end = maya_parser_ascii.find_command_end(buffer, line_start)
+        args = maya_parser_ascii.tokenize(buffer[line_start + len(b"createNode"):command_end])
+        try:
+            record = create_node_parser.exec_command("createNode", args)
+        except (maya_parser_ascii.MayaAsciiError, IndexError) as e:
+            print(f"Skipping unreadable createNode at byte {line_start}: {e}")
+            continue
+
+        parent_index = node_indices.get(record.parent, -1)
+        parent_long_name = long_names[parent_index] if parent_index >= 0 else ""
+        long_name = f"{parent_long_name}|{record.name}"
+
+        node_index = len(index.names)
+        node_indices[record.name] = node_index
+        node_indices[long_name] = node_index
+        long_names.append(long_name)
+
+        index.nodetypes.append(record.nodetype)
+        index.names.append(record.name)
+        index.parents.append(record.parent)
+        index.parent_indices.append(parent_index)
+        index.starts.append(line_start)
+
+    close_node(len(buffer))
+    return index
+
+
+def index_path(filepath):
+    return filepath + INDEX_FILE_SUFFIX
+
+
+def load_index(filepath, save=True):
+    """
+    the SceneIndex saved beside the file, scanned (and saved) again when it's missing or out of date
+    """
+    stat = os.stat(filepath)
+
+    try:
+        with open(index_path(filepath), "r") as f:
+            data = json.load(f)
+        if (data.get("version") == INDEX_FORMAT_VERSION
+                and data["file_size"] == stat.st_size
+                and data["file_mtime_ns"] == stat.st_mtime_ns):
+            return SceneIndex.from_json(data)
+    except (OSError, ValueError, KeyError):
+        pass
+
+    with open(filepath, "rb") as f:
+        if stat.st_size == 0:
+            index = SceneIndex(stat.st_size, stat.st_mtime_ns)
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                index = scan_index(buffer, stat.st_size, stat.st_mtime_ns)
+
+    if save:
+        try:
+            temp_path = f"{index_path(filepath)}.{os.getpid()}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(index.to_json(), f)
+            os.replace(temp_path, index_path(filepath))
+        except OSError as e:
+            # read only location most likely, the index is just scanned again next time
+            print(f"Failed to save node index of '{filepath}': {e}")
+
+    return index
+
+
+class NodeSelection(object):
+    """
+    which nodes of a file to import
+
+    names is a glob matched against the short and long name of nodes, namespaces included ("props:*"),
+    root is the name of a node to import the subtree of,
+    node_types limits the nodes to those types.
+    nodes under a node that matches names / root are selected as well,
+    and the ancestors of everything selected are always included
+    """
+
+    def __init__(self, names=None, root=None, node_types=None):
+        self.names = names or None
+        self.root = root or None
+        self.node_types = set(node_types) if node_types else None
+
+    def key(self):
+        """
+        tells selections apart in the parse cache
+        """
+        return [self.names, self.root, sorted(self.node_types) if self.node_types else None]
+
+    def select(self, index):
+        """
+        indices of the selected entries of a SceneIndex
+        """
+        long_names = index.long_names()
+
+        # whether a node or one of its ancestors matches, parents always come before their children
+        under_names = []
+        under_root = []
+        selected = set()
+
+        for node_index, (name, parent_index) in enumerate(zip(index.names, index.parent_indices)):
+            long_name = long_names[node_index]
+            has_parent = 0 <= parent_index < node_index
+
+            in_names = self.names is None or (has_parent and under_names[parent_index])
+            if not in_names:
+                in_names = fnmatch.fnmatchcase(name, self.names) or fnmatch.fnmatchcase(long_name, self.names)
+            under_names.append(in_names)
+
+            in_root = self.root is None or (has_parent and under_root[parent_index])
+            if not in_root:
+                in_root = self.root in (name, long_name)
+            under_root.append(in_root)
+
+            if in_names and in_root and (self.node_types is None or index.nodetypes[node_index] in self.node_types):
+                selected.add(node_index)
+
+        # ancestor transforms, so the selected nodes end up where they belong
+        for node_index in list(selected):
+            parent_index = index.parent_indices[node_index]
+            while 0 <= parent_index < node_index and parent_index not in selected:
+                selected.add(parent_index)
+                node_index, parent_index = parent_index, index.parent_indices[parent_index]
+
+        return sorted(selected)
@@ -0,0 +1,189 @@
+"""
+Imports the files a scene references (file -r) into it, under the namespace of each reference.
+
+Referenced files are parsed once per ReferenceResolver, however many times and from however many
+files they're referenced. The references of every file are gathered first and parsed a level
+at a time, so the files of one level are parsed side by side in the worker pool.
+Each reference then gets copies of the nodes of its file, the mesh data itself is shared between them.
+"""
+
+import copy
+import os
+import re
+
+from . import import_stats
+from . import maya_scene
+from . import maya_scene_graph
+
+# maya numbers the 2nd, 3rd, ... reference to the same file as "props.ma{1}", "props.ma{2}"
+_COPY_NUMBER_RE = re.compile(r"\{\d+\}$")
+
+
+def reference_file_key(filepath):
+    """
+    the same for every path to a file
+    """
+    return os.path.normcase(os.path.realpath(filepath))
+
+
+def find_reference_file(path, referencing_filepath):
+    """
+    the file a reference path points at, None when it can't be found.
+    the path is tried as it is (with environment variables expanded), relative to the referencing file,
+    and as a file next to the referencing file, for references saved on another machine
+    """
+    path = os.path.expandvars(_COPY_NUMBER_RE.sub("", path))
+    folder = os.path.dirname(os.path.abspath(referencing_filepath))
+    
+    for candidate in (
+        path,
+        os.path.join(folder, path),
+        os.path.join(folder, path.replace("\\", "/").rsplit("/", 1)[-1]),
+    ):
+        if os.path.isfile(candidate):
+            return os.path.abspath(candidate)
+    return None
+
+
+def graft_scene(scene, referenced_scene, namespace):
+    """
+    add copies of the nodes of a referenced scene to a scene, named in the namespace,
+    along with its connections, materials and animation curves
+    """
+    node_copies = {}
+    for node in referenced_scene.nodes:
+        # hashed once here, every copy of the file's meshes shares the digest
+        if isinstance(node, maya_scene.Mesh) and not node.is_proxy:
+            node.content_hash()
+        
+        node_copy = copy.copy(node)
+        node_copy.name = maya_scene_graph.namespaced(node.name, namespace)
+        node_copy.parent = node_copies.get(id(node.parent))
+        node_copy.children = []
+        node_copy.is_built = False
+        if isinstance(node_copy, maya_scene.Transform):
+            node_copy.built_node = None
+        
+        parent_long_name = node_copy.parent.long_name if node_copy.parent is not None else ""
+        node_copy.long_name = f"{parent_long_name}|{node_copy.name}"
+        
+        if node_copy.parent is not None:
+            node_copy.parent.children.append(node_copy)
+        
+        node_copies[id(node)] = node_copy
+        scene.nodes.append(node_copy)
+    
+    scene.connections.add_graph(referenced_scene.connections, namespace)
+    
+    for name, material in referenced_scene.materials.items():
+        scene.materials[maya_scene_graph.namespaced(name, namespace)] = material
+    
+    for name, anim_curve in referenced_scene.anim_curves.items():
+        scene.anim_curves[maya_scene_graph.namespaced(name, namespace)] = anim_curve
+
+
+class ReferenceResolver(object):
+    """
+    parse_files(filepaths) yields a maya_scene.ParseResult per file, like maya_scene.parse_scenes does,
+    stats is an optional import_stats.ImportStats to merge the stats of the referenced files into
+    """
+
+    def __init__(self, parse_files, stats=None):
+        self.parse_files = parse_files
+        self.stats = stats
+        
+        # parsed files by reference_file_key, the ones with their references imported are in __resolved
+        self.__scenes = {}
+        self.__resolved = set()
+        
+        # why a file couldn't be parsed, by reference_file_key
+        self.__errors = {}
+        
+        # files whose warnings have been passed on, they're only reported once
+        self.__reported = set()
+
+    def resolve(self, scene, filepath):
+        """
+        import the references of the scene into it, and theirs into them
+        """
+        key = reference_file_key(filepath)
+        
+        # other imported files may reference this one, it doesn't need to be parsed again for them
+        self.__scenes.setdefault(key, scene)
+        
+        with import_stats.phase(self.stats, "references"):
+            self.__parse_references(scene, filepath)
+            self.__graft_references(scene, filepath, [key])
+        
+        self.__resolved.add(key)
+
+    def __parse_references(self, scene, filepath):
+        pending = [(scene, filepath)]
+        while pending:
+            unparsed = {}
+            for pending_scene, pending_filepath in pending:
+                for reference in pending_scene.references:
+                    reference_filepath = find_reference_file(reference["path"], pending_filepath)
+                    if reference_filepath is None or reference["deferred"]:
+                        continue
+                    
+                    key = reference_file_key(reference_filepath)
+                    if key not in self.__scenes and key not in self.__errors:
+                        unparsed.setdefault(key, reference_filepath)
+            
+            pending = []
+            if not unparsed:
+                break
+            
+            for key, result in zip(unparsed, self.parse_files(list(unparsed.values()))):
+                if result.stats is not None and self.stats is not None:
+                    self.stats.merge(result.stats)
+                
+                if result.error is not None:
+                    self.__errors[key] = result.error
+                    continue
+                
+                self.__scenes[key] = result.scene
+                pending.append((result.scene, result.filepath))
+
+    def __graft_references(self, scene, filepath, resolving):
+        """
+        resolving are the keys of the files being resolved, from the imported file down to this one
+        """
+        for reference in scene.references:
+            path = reference["path"]
+            if reference["deferred"]:
+                scene.warnings.append(f"reference '{path}' is unloaded, left out")
+                continue
+            
+            reference_filepath = find_reference_file(path, filepath)
+            if reference_filepath is None:
+                scene.warnings.append(f"referenced file '{path}' not found")
+                continue
+            
+            key = reference_file_key(reference_filepath)
+            if key in resolving:
+                scene.warnings.append(f"reference '{path}' references itself, left out")
+                continue
+            
+            if key in self.__errors:
+                scene.warnings.append(f"referenced file '{path}' couldn't be read: {self.__errors[key]}")
+                continue
+            
+            referenced_scene = self.__scenes[key]
+            if key not in self.__resolved:
+                resolving.append(key)
+                self.__graft_references(referenced_scene, reference_filepath, resolving)
+                resolving.pop()
+                self.__resolved.add(key)
+            
+            if key not in self.__reported:
+                self.__reported.add(key)
+                file_name = os.path.basename(reference_filepath)
+                scene.warnings.extend(f"{file_name}: {warning}" for warning in referenced_scene.warnings)
+            
+            namespace = (reference["namespace"] or "").strip(":")
+            if not namespace:
+                namespace = os.path.splitext(os.path.basename(reference_filepath))[0]
+            
+            graft_scene(scene, referenced_scene, namespace)
@@ -0,0 +1,261 @@
+import os
+import tempfile
+import bpy
+from bpy.props import (
+        BoolProperty,
+        IntProperty,
+        StringProperty,
+        CollectionProperty,
+        )
+
+from bpy_extras.io_utils import (
+    ImportHelper,
+    orientation_helper,
+    axis_conversion,
+)
+
+
+class MayaImportPreferences(bpy.types.AddonPreferences):
+    bl_idname = __package__
+    
+    use_parse_cache: BoolProperty(
+        name="Cache Parsed Files",
+        description="Keep parsed files on disk, so importing the same unchanged file again skips parsing it",
+        default=True,
+    )
+    
+    cache_directory: StringProperty(
+        name="Cache Directory",
+        description="Where parsed files are cached, the temp directory when left empty",
+        subtype='DIR_PATH',
+        default="",
+    )
+    
+    cache_size: IntProperty(
+        name="Cache Size (MB)",
+        description="The least recently used files are removed from the cache past this size",
+        default=2048,
+        min=0,
+    )
+    
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "use_parse_cache")
+        
+        col = layout.column()
+        col.enabled = self.use_parse_cache
+        col.prop(self, "cache_directory")
+        col.prop(self, "cache_size")
+        col.operator(ClearMayaParseCache.bl_idname)
+    
+    def parse_cache(self):
+        from . import maya_scene_cache
+        
+        if not self.use_parse_cache:
+            return None
+        
+        directory = bpy.path.abspath(self.cache_directory) or os.path.join(tempfile.gettempdir(), "io_scene_maya_cache")
+        return maya_scene_cache.ParseCache(directory, max_size=self.cache_size * 1024 ** 2)
+
+
+def addon_preferences(context):
+    return context.preferences.addons[__package__].preferences
+
+
+class ClearMayaParseCache(bpy.types.Operator):
+    """Remove all cached files"""
+    bl_idname = "import_scene.maya_clear_parse_cache"
+    bl_label = "Clear Cache"
+    
+    def execute(self, context):
+        cache = addon_preferences(context).parse_cache()
+        if cache is not None:
+            cache.clear()
+        return {"FINISHED"}
+
+
+@orientation_helper(axis_forward='-Z', axis_up='Y')
+class ImportMA(bpy.types.Operator, ImportHelper):
+    """Load an Autodesk Maya .ma File"""
+    bl_idname = "import_scene.maya_ascii"
+    bl_label = "Import Maya Scene"
+    bl_options = {'PRESET', 'UNDO'}
+
+    filename_ext = ".ma"
+    filter_glob: StringProperty(
+        # .mb files are read as well, but not listed until the MESH data in them can be decoded
+        default="*.ma;*.ma.gz;*.ma.xz;*.ma.lzma;*.ma.bz2;*.ma.zst;*.ma.zstd",
+        options={'HIDDEN'},
+    )
+    
+    # Selected files
+    files: CollectionProperty(type=bpy.types.PropertyGroup)
+    
+    import_uvs: BoolProperty(
+        name="UVs",
+        description="Import UV sets, skipping them saves reading the uv data at all",
+        default=True,
+    )
+    
+    import_cameras: BoolProperty(
+        name="Cameras",
+        description="Import camera nodes",
+        default=True,
+    )
+    
+    import_hidden: BoolProperty(
+        name="Hidden Objects",
+        description="Import hidden nodes and everything parented under them",
+        default=True,
+    )
+    
+    import_references: BoolProperty(
+        name="References",
+        description="Import the files referenced by the scene under their namespaces, each referenced file is "
+                    "only read once however often it's referenced. Left out when importing only some nodes",
+        default=True,
+    )
+    
+    proxy_meshes: BoolProperty(
+        name="Mesh Proxies",
+        description="Import meshes as bounding boxes, only reading their vertices. "
+                    "Load the geometry of selected proxies later with Object > Load Maya Proxy Geometry",
+        default=False,
+    )
+    
+    batched_build: BoolProperty(
+        name="Collection per File",
+        description="Put each file into a collection of its own, which is added to the scene once all of its objects "
+                    "are created. Saves about a tenth of the build time on scenes with many objects",
+        default=False,
+    )
+    
+    collect_stats: BoolProperty(
+        name="Import Statistics",
+        description="Time each phase of the import and count what was read, the summary ends up in the report",
+        default=False,
+    )
+    
+    trace_filepath: StringProperty(
+        name="Trace File",
+        description="Also write the timings to this file as a Chrome trace (chrome://tracing), left out when empty",
+        subtype='FILE_PATH',
+        default="",
+    )
+    
+    selection_names: StringProperty(
+        name="Names",
+        description="Only import nodes whose name matches this pattern (\"props:*\", \"*_geo\"), "
+                    "along with everything under them. Left out when empty",
+        default="",
+    )
+    
+    selection_root: StringProperty(
+        name="Root",
+        description="Only import this node and everything under it. Left out when empty",
+        default="",
+    )
+    
+    selection_node_types: StringProperty(
+        name="Node Types",
+        description="Only import nodes of these comma separated types (\"mesh, camera\"). Left out when empty",
+        default="",
+    )
+
+    def execute(self, context):
+        from . import import_stats, maya_scene_importer, maya_scene_index
+
+        keywords = self.as_keywords(ignore=("axis_forward",
+                                            "axis_up",
+                                            "filter_glob",
+                                            "filepath",
+                                            "files",
+                                            "collect_stats",
+                                            "trace_filepath",
+                                            "selection_names",
+                                            "selection_root",
+                                            "selection_node_types",
+                                            ))
+
+        global_matrix = axis_conversion(
+            from_forward=self.axis_forward,
+            from_up=self.axis_up,
+        ).to_4x4()
+        
+        keywords["correction_matrix"] = global_matrix
+        keywords["cache"] = addon_preferences(context).parse_cache()
+        
+        if self.collect_stats:
+            keywords["stats"] = import_stats.ImportStats()
+            keywords["trace_filepath"] = bpy.path.abspath(self.trace_filepath) or None
+        
+        # the ancestors of the selected nodes come along, so they end up in the right place
+        node_types = [node_type.strip() for node_type in self.selection_node_types.split(",") if node_type.strip()]
+        if self.selection_names or self.selection_root or node_types:
+            keywords["selection"] = maya_scene_index.NodeSelection(
+                names=self.selection_names.strip(),
+                root=self.selection_root.strip(),
+                node_types=node_types,
+            )
+
+        folder = os.path.dirname(self.filepath)
+        file_paths = [os.path.join(folder, file.name) for file in self.files]
+        if not file_paths:
+            file_paths = [self.filepath]
+        
+        # parsed in parallel, built one after the other
+        return maya_scene_importer.import_scenes(self, context, file_paths, **keywords)
+
+
+class LoadMayaProxies(bpy.types.Operator):
+    """Replace the bounding boxes of the selected Maya mesh proxies with their geometry"""
+    bl_idname = "object.maya_load_proxies"
+    bl_label = "Load Maya Proxy Geometry"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    @classmethod
+    def poll(cls, context):
+        from . import maya_scene_importer
+        return any(maya_scene_importer.PROXY_FILEPATH_PROP in obj for obj in context.selected_objects)
+    
+    def execute(self, context):
+        from . import maya_scene_importer
+        
+        loaded_count, failures = maya_scene_importer.load_proxies(context, context.selected_objects)
+        for failure in failures:
+            self.report({'WARNING'}, failure)
+        
+        self.report({'INFO'}, f"Loaded {loaded_count} Maya proxies")
+        return {"FINISHED"}
+
+
+def menu_func_import(self, context):
+    self.layout.operator(ImportMA.bl_idname, text="Maya Scene (.ma)")
+
+
+def menu_func_object(self, context):
+    self.layout.operator(LoadMayaProxies.bl_idname)
+
+
+classes = (
+    MayaImportPreferences,
+    ClearMayaParseCache,
+    ImportMA,
+    LoadMayaProxies,
+)
+
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+
+    bpy.types.TOPBAR_MT_file_import.append(menu_func_import)
+    bpy.types.VIEW3D_MT_object.append(menu_func_object)
+
+
+def unregister():
+    bpy.types.VIEW3D_MT_object.remove(menu_func_object)
+    bpy.types.TOPBAR_MT_file_import.remove(menu_func_import)
+
+    for cls in classes:
+        bpy.utils.unregister_class(cls)
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# the tests import io_scene_maya from the checkout, run them from anywhere with python -m pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DATA_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+def data_path(name):
+    return os.path.join(DATA_DIRECTORY, name)
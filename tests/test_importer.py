@@ -0,0 +1,111 @@
+"""
+Imports the test scenes into blender, skipped when bpy can't be imported.
+
+Run them with the bpy module from pypi (pip install bpy), or with the python of a blender install.
+"""
+
+import math
+
+import pytest
+
+bpy = pytest.importorskip("bpy")
+
+from conftest import data_path
+from io_scene_maya import maya_scene_importer
+
+
+def import_file(name, **kwargs):
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    result = maya_scene_importer.import_scene(None, bpy.context, data_path(name), **kwargs)
+    assert result == {"FINISHED"}
+
+
+def action_fcurves(action):
+    """
+    the curves of an action by (data path, index), from the layers of the action in 4.4 and up
+    """
+    if hasattr(action, "layers") and action.layers:
+        fcurves = [
+            fcurve
+            for layer in action.layers
+            for strip in layer.strips
+            for channelbag in strip.channelbags
+            for fcurve in channelbag.fcurves
+        ]
+    else:
+        fcurves = action.fcurves
+    return {(fcurve.data_path, fcurve.array_index): fcurve for fcurve in fcurves}
+
+
+def keyframes(fcurve):
+    """
+    frame, value, frame, value, ...
+    """
+    return [value for key in fcurve.keyframe_points for value in key.co]
+
+
+def test_animated_transform():
+    import_file("animated.ma")
+    
+    obj = bpy.data.objects["pCube1"]
+    assert obj.animation_data is not None and obj.animation_data.action is not None
+    
+    fcurves = action_fcurves(obj.animation_data.action)
+    assert set(fcurves) == {("location", 0), ("rotation_euler", 1)}
+    
+    # ntsc keys at 1, 30 and 60 land on frames 0.8, 24 and 48 of a 24 fps scene
+    translate_x = fcurves["location", 0]
+    assert keyframes(translate_x) == pytest.approx([0.8, 5, 24, 0, 48, 10])
+    assert [key.interpolation for key in translate_x.keyframe_points] == ["CONSTANT", "BEZIER", "LINEAR"]
+    
+    rotate_y = fcurves["rotation_euler", 1]
+    assert keyframes(rotate_y) == pytest.approx([0, math.pi, 24, 0])
+    
+    # the static values are still set, and the animated object gets its own axis correction parent
+    assert tuple(obj.location) == pytest.approx((1, 2, 3))
+    assert obj.parent is not None and obj.parent.name == "pCube1_AXIS_CORRECTION"
+    
+    # the first key is stepped
+    bpy.context.scene.frame_set(12)
+    assert obj.location.x == pytest.approx(5)
+
+
+def test_mesh():
+    import_file("cube.ma")
+    
+    obj = bpy.data.objects["pCube1"]
+    mesh = obj.data
+    assert len(mesh.vertices) == 8
+    assert len(mesh.polygons) == 6
+    assert [layer.name for layer in mesh.uv_layers] == ["map1"]
+    
+    # .pt[2] moves the third vertex up, the axis correction is on the object, not the mesh
+    assert [vertex.co.y for vertex in mesh.vertices] == pytest.approx([-0.5, -0.5, 1, 0.5, 0.5, 0.5, -0.5, -0.5])
+
+
+def test_unassigned_faces_get_an_empty_slot():
+    import_file("shading.ma")
+    
+    mesh = bpy.data.objects["pCube3"].data
+    assert [material.name if material else None for material in mesh.materials] == ["green", None]
+    assert [polygon.material_index for polygon in mesh.polygons] == [1, 0, 0, 1]
+
+
+def test_identical_meshes_share_their_data():
+    import_file("instances.ma")
+    
+    # the same geometry with the same materials is built once, pPlane3 has a material of its own
+    meshes = [bpy.data.objects[f"pPlane{number}"].data for number in (1, 2, 3)]
+    assert meshes[0] == meshes[1]
+    assert meshes[2] != meshes[0]
+    assert len(bpy.data.meshes) == 2
+
+
+def test_objects_go_into_the_scene():
+    import_file("cube.ma")
+    assert list(bpy.data.objects["pCube1"].users_collection) == [bpy.context.scene.collection]
+    assert not bpy.data.collections
+    
+    # unless the build is batched, into a collection of the file
+    import_file("cube.ma", batched_build=True)
+    assert [collection.name for collection in bpy.data.objects["pCube1"].users_collection] == ["cube.ma"]
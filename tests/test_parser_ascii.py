@@ -0,0 +1,142 @@
+"""
+the pieces of maya_parser_ascii the SceneParser builds on: plug names, setAttr tokenizing and RawData decoding
+"""
+
+import numpy as np
+import pytest
+
+from io_scene_maya import maya_parser_ascii
+from io_scene_maya.maya_parser_common import parse_plug
+
+
+@pytest.mark.parametrize("name, path, indices", [
+    (".t", "t", (None,)),
+    (".vt[3]", "vt", ((3, 3),)),
+    ("pCubeShape1.vt[0:7]", "vt", ((0, 7),)),
+    (".uvst[0].uvsp[0:145]", "uvst.uvsp", ((0, 0), (0, 145))),
+    (".pt[0].px", "pt.px", ((0, 0), None)),
+    (".iog[0].og[2].gco", "iog.og.gco", ((0, 0), (2, 2), None)),
+    (".uvst[*].uvsn", "uvst.uvsn", (None, None)),
+])
+def test_parse_plug(name, path, indices):
+    plug = parse_plug(name)
+    assert plug.path == path
+    assert plug.attrs == tuple(path.split("."))
+    assert plug.indices == indices
+    assert plug.index_range == indices[-1]
+
+
+@pytest.mark.parametrize("text, tokens", [
+    ('".t" -type "double3" 1 2 3 ', [".t", "-type", "double3", "1", "2", "3"]),
+    ('"a""b" "" c', ["a", "b", "", "c"]),
+    ('"a b;c" d', ["a b;c", "d"]),
+    ('"a \\" b" c', ['a \\" b', "c"]),
+    ("'a b' \"c 'd'\"", ["a b", "c 'd'"]),
+    ('a"b" "c"d', ['a"b"', "c", "d"]),
+    ('"unterminated d', ["unterminated d"]),
+])
+def test_tokenize(text, tokens):
+    assert maya_parser_ascii.tokenize(text) == tokens
+    assert maya_parser_ascii.tokenize(text.encode()) == tokens
+
+
+def test_tokenize_set_attr():
+    for text in ('-s 2 ".vt[0:1]" 0 0 0 1 1 1', b'-s 2 ".vt[0:1]" 0 0 0 1 1 1'):
+        # short commands are tokenized whole
+        args = maya_parser_ascii.tokenize_set_attr(text)
+        assert args == ["-s", "2", ".vt[0:1]", "0", "0", "0", "1", "1", "1"]
+        
+        # of long ones bulk values are kept as raw text
+        args = maya_parser_ascii.tokenize_set_attr(text + text[-6:] * 200)
+        assert args[:3] == ["-s", "2", ".vt[0:1]"]
+        assert args[3].array(np.float32, 3)[:2].tolist() == [[0, 0, 0], [1, 1, 1]]
+    
+    # anything else is tokenized
+    args = maya_parser_ascii.tokenize_set_attr('".nm" -type "stringArray" 200' + ' "a b"' * 200)
+    assert args[:4] == [".nm", "-type", "stringArray", "200"]
+    assert args[4:] == ["a b"] * 200
+
+
+def test_tokenize_set_attr_values_on_later_lines():
+    # only the attribute name has been read yet, the values are still coming
+    args = maya_parser_ascii.tokenize_set_attr(' ".fc[0]" -type "polyFaces" ', more=iter(["\nf 3 0 1 2", "\nmu 0 3 0 1 2"]))
+    assert args[:3] == [".fc[0]", "-type", "polyFaces"]
+    
+    faces = args[3].poly_faces()
+    assert faces.face_offsets.tolist() == [0, 3]
+    assert faces.edge_ids.tolist() == [0, 1, 2]
+    assert faces.uv_indices[0].tolist() == [0, 1, 2]
+
+
+VALUES = " ".join(str(value) for value in range(1000))
+FACES = "f 3 0 1 -3 mu 0 3 0 1 2 f 4 2 3 4 5 mu 0 4 2 3 4 5 " * 50
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, None])
+def test_chunked_array(chunk_size):
+    raw_data = maya_parser_ascii.RawData(VALUES)
+    chunks = list(raw_data.chunks(chunk_size))
+    assert "".join(chunks) == VALUES
+    
+    # cut at the spaces, no value is split
+    assert all(chunk.startswith(" ") for chunk in chunks[1:])
+    
+    # split into lines that are read one by one
+    lines = VALUES.split(" ")
+    raw_data = maya_parser_ascii.RawData(lines[0], more=iter(" " + line for line in lines[1:]))
+    assert "".join(raw_data.chunks(chunk_size)) == VALUES
+
+
+@pytest.mark.parametrize("count", [None, 10, 1000, 2000])
+def test_array_count(monkeypatch, count):
+    monkeypatch.setattr(maya_parser_ascii, "DECODE_CHUNK_SIZE", 16)
+    values = maya_parser_ascii.RawData(VALUES.encode()).array(np.int32, 2, count)
+    assert values.tolist() == np.arange(1000).reshape(-1, 2).tolist()
+
+
+def test_chunked_poly_faces(monkeypatch):
+    expected = maya_parser_ascii.RawData(FACES).poly_faces()
+    assert len(expected.face_offsets) == 101
+    
+    monkeypatch.setattr(maya_parser_ascii, "DECODE_CHUNK_SIZE", 10)
+    for raw_data in (maya_parser_ascii.RawData(FACES), maya_parser_ascii.RawData(FACES.encode())):
+        faces = raw_data.poly_faces()
+        assert faces.face_offsets.tolist() == expected.face_offsets.tolist()
+        assert faces.edge_ids.tolist() == expected.edge_ids.tolist()
+        assert faces.uv_indices[0].tolist() == expected.uv_indices[0].tolist()
+
+
+@pytest.mark.parametrize("text", [
+    FACES,
+    # values before the first face, a hole and its uvs, colors, a second uv set and uvs past the corner count
+    "7 f 3 0 1 2 mu 0 3 0 1 2 h 3 3 4 5 mu 0 3 6 7 8 fc 3 0 1 2 f 3 2 1 0 mu 1 4 9 8 7 6 mc 0 3 0 1 2",
+    "mu 0 3 0 1 2",
+    "f 3 0 1 2 mf 3 0 1 2 mu 0 3 0 1 2 h 3 3 4 5 mh 3 6 7 8 f 3 2 1 0",
+])
+def test_poly_face_tokens(text):
+    expected = maya_parser_ascii.decode_poly_faces(text)
+    faces = maya_parser_ascii.decode_poly_face_tokens(text.split())
+    assert faces.face_offsets.tolist() == expected.face_offsets.tolist()
+    assert faces.edge_ids.tolist() == expected.edge_ids.tolist()
+    assert {uv_set: uvs.tolist() for uv_set, uvs in faces.uv_indices.items()} == \
+        {uv_set: uvs.tolist() for uv_set, uvs in expected.uv_indices.items()}
+
+
+OLD_UVS = "f 3 0 1 2 mf 3 0 1 2 mu 0 3 4 5 6 f 3 2 1 0 mh 3 6 7 8"
+
+
+@pytest.mark.parametrize("text", [OLD_UVS, OLD_UVS.encode()])
+def test_poly_faces_old_uvs(text):
+    # the f in mf and the h in mh aren't faces or holes of their own
+    faces = maya_parser_ascii.decode_poly_faces(text)
+    assert faces.face_offsets.tolist() == [0, 3, 6]
+    assert faces.edge_ids.tolist() == [0, 1, 2, 2, 1, 0]
+    assert faces.uv_indices[0].tolist() == [4, 5, 6, -1, -1, -1]
+
+
+def test_poly_faces_unknown_values():
+    # left to np.fromstring these would quietly cut the faces short
+    with pytest.raises(maya_parser_ascii.MayaAsciiError):
+        maya_parser_ascii.decode_poly_faces("f 3 0 1 2 xy 3 0 1 2 f 3 2 1 0")
+    with pytest.raises(maya_parser_ascii.MayaAsciiError):
+        maya_parser_ascii.decode_poly_face_tokens("f 3 0 1 2 xy 3 0 1 2 f 3 2 1 0".split())
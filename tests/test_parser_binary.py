@@ -0,0 +1,78 @@
+"""
+binary_for4.mb and binary_for8.mb are the same small scene written with 32 and 64 bit chunk headers:
+a header with units and a plugin, a file reference, a transform with a mesh under it,
+a camera, a shading group and a connection between the mesh and the shading group.
+The chunks are sized so the data of some of them has to be padded to the alignment.
+"""
+
+import io
+
+import numpy as np
+import pytest
+
+from conftest import data_path
+from io_scene_maya import maya_parser_binary
+from io_scene_maya import maya_parser_common as common
+from io_scene_maya import maya_scene
+
+BINARY_FILES = ("binary_for4.mb", "binary_for8.mb")
+
+
+def read_records(name, **kwargs):
+    # numeric values are views of the memory map of a file, so the tests read the bytes instead
+    with open(data_path(name), "rb") as f:
+        parser = maya_parser_binary.MayaBinaryParser(io.BytesIO(f.read()))
+    
+    records = []
+    for record in parser.iter_commands(**kwargs):
+        if type(record) is common.SetAttr and isinstance(record.value, np.ndarray):
+            record = record._replace(value=record.value.tolist())
+        records.append(record)
+    return records
+
+
+@pytest.mark.parametrize("name", BINARY_FILES)
+def test_records(name):
+    records = read_records(name)
+    
+    assert records[:5] == [
+        common.Requires("maya", "2022"),
+        common.Requires("mtoa", "5.1.0"),
+        common.FileInfo("application", "maya"),
+        common.CurrentUnit("deg", "cm", "ntsc"),
+        common.FileReference("props/crate.ma", None, None, False),
+    ]
+    assert common.CreateNode("mesh", "pCubeShape1", "pCube1") in records
+    assert common.SetAttr(".t", [1.0, 2.0, 3.0], "double3", False, 1) in records
+    assert common.SetAttr(".uvst[0].uvsp[0:3]", [[0, 1], [2, 3], [4, 5], [6, 7]], "float2", True, 4) in records
+    assert common.SetAttr(".o", None, "MESH", False, None) in records
+    assert records[-1] == common.ConnectAttr("pCubeShape1.iog", "blinn1SG.dsm")
+
+
+def test_header_sizes_read_the_same():
+    assert read_records("binary_for4.mb") == read_records("binary_for8.mb")
+
+
+def test_node_types():
+    records = read_records("binary_for8.mb", node_types=("camera",))
+    assert [record.name for record in records if type(record) is common.CreateNode] == ["cameraShape1"]
+
+
+def test_not_binary():
+    with pytest.raises(maya_parser_binary.MayaBinaryError):
+        maya_parser_binary.MayaBinaryParser(io.BytesIO(b"//Maya ASCII 2022 scene")).parse()
+
+
+@pytest.mark.parametrize("name", BINARY_FILES)
+def test_scene(name):
+    scene = maya_scene.parse_scene(data_path(name))
+    
+    assert [node.long_name for node in scene.nodes] == ["|pCube1", "|camera1", "|camera1|cameraShape1"]
+    assert scene.nodes[0].location == [1.0, 2.0, 3.0]
+    assert scene.units == {"angle": "deg", "linear": "cm", "time": "ntsc"}
+    assert scene.references == [{"path": "props/crate.ma", "namespace": None, "deferred": False}]
+    assert scene.connections.outputs("pCubeShape1") == [(".iog", "blinn1SG", ".dsm")]
+    
+    # the MESH data isn't decoded, the mesh is left out with a warning
+    assert scene.nodes[0].has_pruned_shape
+    assert scene.warnings == ["mesh 'pCubeShape1' is stored in an .mb encoding that can't be read, left out"]
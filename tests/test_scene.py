@@ -0,0 +1,317 @@
+"""
+maya_scene.Scene and the SceneParser callbacks, on the .ma files in tests/data
+"""
+
+import gzip
+import io
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from conftest import DATA_DIRECTORY, data_path
+from io_scene_maya import maya_parser_ascii
+from io_scene_maya import maya_scene
+from io_scene_maya import maya_scene_cache
+from io_scene_maya import maya_scene_graph
+from io_scene_maya import maya_scene_index
+from io_scene_maya import maya_scene_references
+
+SCENE_FILES = ("animated.ma", "cube.ma", "instances.ma", "point_offsets.ma", "shading.ma")
+
+
+def find_node(scene, name):
+    return next(node for node in scene.nodes if node.name == name)
+
+
+@pytest.fixture
+def scene_directory(tmp_path):
+    """
+    the test scenes copied to a temporary folder, the node index of a selective import is saved beside the file
+    """
+    for name in os.listdir(DATA_DIRECTORY):
+        shutil.copy(data_path(name), tmp_path)
+    return tmp_path
+
+
+def scene_data(scene):
+    """
+    everything the Scene holds, as the cache stores it, in a form that compares with ==
+    """
+    arrays = maya_scene_cache.scene_to_arrays(scene)
+    data = json.loads(arrays.pop("scene").tobytes().decode())
+    return data, {key: (array.dtype, array.tolist()) for key, array in arrays.items()}
+
+
+def parse_stream(stream):
+    parser = maya_scene.SceneParser(stream)
+    parser.parse()
+    return parser.scene
+
+
+def parse_memory_map(filepath):
+    return maya_scene.parse_scene(filepath)
+
+
+def parse_buffer(filepath):
+    with open(filepath, "rb") as f:
+        return parse_stream(io.BytesIO(f.read()))
+
+
+def parse_lines(filepath):
+    with open(filepath, "rb") as f:
+        return parse_stream(io.TextIOWrapper(f, encoding=maya_parser_ascii.ENCODING))
+
+
+def parse_ranges(filepath):
+    return maya_scene.parse_scene(filepath, workers=3)
+
+
+def parse_gzip(filepath):
+    gzip_path = f"{filepath}.gz"
+    with open(filepath, "rb") as f, gzip.open(gzip_path, "wb") as gzip_file:
+        shutil.copyfileobj(f, gzip_file)
+    return maya_scene.parse_scene(gzip_path)
+
+
+@pytest.mark.parametrize("name", SCENE_FILES)
+@pytest.mark.parametrize("parse", [parse_buffer, parse_lines, parse_ranges, parse_gzip])
+def test_parse_paths_agree(scene_directory, monkeypatch, name, parse):
+    filepath = str(scene_directory / name)
+    expected = scene_data(parse_memory_map(filepath))
+    
+    # split files this small into ranges as well
+    monkeypatch.setattr(maya_scene, "PARALLEL_PARSE_MIN_SIZE", 0)
+    assert scene_data(parse(filepath)) == expected
+
+
+@pytest.mark.parametrize("name", SCENE_FILES)
+@pytest.mark.parametrize("parse", [parse_memory_map, parse_lines])
+def test_chunked_decoding_agrees(monkeypatch, name, parse):
+    expected = scene_data(parse(data_path(name)))
+    
+    # small enough that every value list and polyFaces block gets cut up, and none are tokenized whole
+    monkeypatch.setattr(maya_parser_ascii, "DECODE_CHUNK_SIZE", 8)
+    monkeypatch.setattr(maya_parser_ascii, "SHORT_COMMAND_SIZE", 0)
+    assert scene_data(parse(data_path(name))) == expected
+
+
+def test_point_offsets():
+    scene = maya_scene.parse_scene(data_path("point_offsets.ma"))
+    mesh = find_node(scene, "pPlaneShape1")
+    
+    # .pt[1] and .pt[2:3] move vertices, .pt[0].px, .opt and .dispt don't
+    assert mesh.vertex_array().tolist() == [[0, 0, 0], [1, 2, 0], [0, 0, 2], [1, 0, 3]]
+    assert not scene.warnings
+
+
+def test_mesh_shading():
+    scene = maya_scene.parse_scene(data_path("shading.ma"))
+    
+    # every face in a shadingEngine of its own
+    slots, face_slots = scene.mesh_shading(find_node(scene, "pCubeShape1"), 4)
+    assert slots == ["red", "green"]
+    assert face_slots.tolist() == [0, 0, 1, 1]
+    
+    # the whole mesh in one shadingEngine
+    slots, face_slots = scene.mesh_shading(find_node(scene, "pCubeShape2"), 4)
+    assert "green" in slots
+    assert face_slots is None
+
+
+def test_mesh_shading_unassigned_faces():
+    scene = maya_scene.parse_scene(data_path("shading.ma"))
+    
+    # only faces 1 and 2 are in a shadingEngine, the others don't get its material
+    slots, face_slots = scene.mesh_shading(find_node(scene, "pCubeShape3"), 4)
+    assert slots == ["green", None]
+    assert face_slots.tolist() == [1, 0, 0, 1]
+    assert face_slots.dtype == np.int32
+
+
+def test_anim_curve_keys():
+    scene = maya_scene.parse_scene(data_path("animated.ma"))
+    frames, values, out_tangents = scene.anim_curve_keys("pCube1_translateX", 30)
+    
+    # in time order, key 0 has no .kot of its own and keeps the curve's .tan 18
+    assert frames.tolist() == [1, 30, 60]
+    assert values.tolist() == [5, 0, 10]
+    assert out_tangents.tolist() == [maya_scene.TANGENT_STEP, 18, maya_scene.TANGENT_LINEAR]
+    
+    # the keys of the cached scene agree
+    cached = maya_scene_cache.scene_from_arrays(maya_scene_cache.scene_to_arrays(scene))
+    assert cached.anim_curve_keys("pCube1_translateX", 30)[2].tolist() == out_tangents.tolist()
+
+
+def test_content_hash():
+    scene = maya_scene.parse_scene(data_path("instances.ma"))
+    meshes = [find_node(scene, f"pPlaneShape{number}") for number in (1, 2, 3)]
+    
+    # the same geometry hashes the same, whatever the material
+    assert len({mesh.content_hash() for mesh in meshes}) == 1
+    assert meshes[0].content_digest == meshes[0].content_hash()
+    
+    # is kept instead of being hashed again
+    meshes[0].content_digest = "kept"
+    assert meshes[0].content_hash() == "kept"
+
+
+def test_grafted_meshes_keep_their_hash():
+    scene = maya_scene.Scene()
+    referenced_scene = maya_scene.parse_scene(data_path("instances.ma"))
+    for namespace in ("a", "b"):
+        maya_scene_references.graft_scene(scene, referenced_scene, namespace)
+    
+    digests = [node.content_digest for node in scene.nodes if isinstance(node, maya_scene.Mesh)]
+    assert len(digests) == 6
+    assert set(digests) == {find_node(referenced_scene, "pPlaneShape1").content_digest} != {None}
+
+
+def resolve_references(filename):
+    """
+    the scene of a file with its references imported, and the paths of every file parsed for them
+    """
+    parsed_filepaths = []
+    
+    def parse_files(filepaths):
+        parsed_filepaths.extend(os.path.basename(filepath) for filepath in filepaths)
+        return maya_scene.parse_scenes(filepaths, workers=1)
+    
+    scene = maya_scene.parse_scene(data_path(filename))
+    maya_scene_references.ReferenceResolver(parse_files).resolve(scene, data_path(filename))
+    return scene, parsed_filepaths
+
+
+def test_references():
+    scene, parsed_filepaths = resolve_references("ref_main.ma")
+    
+    # ref_prop.ma is referenced twice by ref_main.ma and once by ref_set.ma, it's parsed once for all three
+    assert sorted(parsed_filepaths) == ["ref_prop.ma", "ref_set.ma"]
+    
+    assert [node.long_name for node in scene.nodes] == [
+        "|room",
+        "|a:crate",
+        "|a:crate|a:crateShape",
+        "|b:crate",
+        "|b:crate|b:crateShape",
+        "|set:table",
+        "|set:prop:crate",
+        "|set:prop:crate|set:prop:crateShape",
+    ]
+    assert list(find_node(scene, "set:table").location) == [0, 1, 0]
+    
+    # the copies share the mesh data of the file
+    meshes = [node for node in scene.nodes if isinstance(node, maya_scene.Mesh)]
+    assert len({id(mesh.vert_data) for mesh in meshes}) == 1
+    
+    # connections and materials are in the namespace of each reference
+    assert scene.connections.outputs("a:crateShape") == [(".iog", "a:redSG", ".dsm")]
+    assert scene.connections.inputs("set:prop:redSG") == [
+        ("set:prop:red", ".oc", ".ss"),
+        ("set:prop:crateShape", ".iog", ".dsm"),
+    ]
+    assert sorted(scene.materials) == ["a:red", "b:red", "set:prop:red"]
+    assert scene.mesh_shading(find_node(scene, "b:crateShape"), 1)[0] == ["b:red"]
+
+
+def test_references_left_out():
+    scene, parsed_filepaths = resolve_references("ref_main.ma")
+    
+    # the deferred reference isn't parsed, and neither are the references of its file
+    assert "ref_cycle.ma" not in parsed_filepaths
+    assert not any(node.name.startswith(("unloaded:", "package:")) for node in scene.nodes)
+    assert scene.warnings == [
+        "reference 'ref_cycle.ma' is unloaded, left out",
+        "referenced file 'props/package.ma' not found",
+    ]
+
+
+def test_reference_cycle():
+    # ref_cycle.ma references ref_cycle_child.ma, which references ref_cycle.ma again
+    scene, parsed_filepaths = resolve_references("ref_cycle.ma")
+    assert parsed_filepaths == ["ref_cycle_child.ma"]
+    assert [node.long_name for node in scene.nodes] == ["|parentGroup", "|child:childGroup"]
+    assert scene.warnings == ["ref_cycle_child.ma: reference 'ref_cycle.ma' references itself, left out"]
+
+
+def test_namespaced():
+    assert maya_scene_graph.namespaced("|grp|pCube1", "props") == "|props:grp|props:pCube1"
+    assert maya_scene_graph.namespaced("pCube1", "set:prop") == "set:prop:pCube1"
+    assert maya_scene_graph.namespaced("pCube1", None) == "pCube1"
+
+
+def test_proxy_mesh(scene_directory):
+    filepath = str(scene_directory / "shading.ma")
+    full_scene = maya_scene.parse_scene(filepath)
+    scene = maya_scene.parse_scene(filepath, proxy_meshes=True)
+    with open(filepath, "rb") as f:
+        buffer = f.read()
+    
+    proxies = [node for node in scene.nodes if isinstance(node, maya_scene.Mesh)]
+    assert proxies and all(proxy.is_proxy for proxy in proxies)
+    
+    # the byte range of each proxy parses into the same mesh as the whole file
+    for proxy in proxies:
+        mesh = maya_scene.parse_proxy_mesh(buffer, *proxy.byte_range)
+        full_mesh = find_node(full_scene, proxy.name)
+        assert mesh.name == proxy.name
+        assert mesh.vertex_array().tolist() == full_mesh.vertex_array().tolist()
+        assert mesh.edge_array().tolist() == full_mesh.edge_array().tolist()
+        assert [array.tolist() for array in mesh.face_arrays()] == [array.tolist() for array in full_mesh.face_arrays()]
+    
+    # a range without a mesh in it
+    transform = find_node(scene, "pCube1")
+    index = maya_scene_index.load_index(filepath)
+    node_index = index.long_names().index(transform.long_name)
+    assert maya_scene.parse_proxy_mesh(buffer, index.starts[node_index], index.ends[node_index]) is None
+
+
+def test_sharp_edges_and_normals():
+    mesh = find_node(maya_scene.parse_scene(data_path("ref_prop.ma")), "crateShape")
+    
+    # the third value of .ed is 0 for hard edges
+    assert mesh.sharp_edges().tolist() == [True, False, True, False]
+    
+    # the loops whose normal isn't set get zeros
+    assert mesh.loop_normals(4).tolist() == [[0, 0, 0], [0, 0, 1], [0, 0, 0], [0, 0, 1]]
+    assert mesh.loop_normals(6).tolist()[4:] == [[0, 0, 0], [0, 0, 0]]
+    
+    # none are set
+    assert find_node(maya_scene.parse_scene(data_path("cube.ma")), "pCubeShape1").loop_normals(24) is None
+
+
+@pytest.mark.parametrize("root", ["pCube1", "pCube3"])
+def test_selection_keeps_shading(scene_directory, root):
+    filepath = str(scene_directory / "shading.ma")
+    full_scene = maya_scene.parse_scene(filepath)
+    scene = maya_scene.parse_scene(filepath, selection=maya_scene_index.NodeSelection(root=root))
+    
+    assert [node.long_name for node in scene.nodes] == [f"|{root}", f"|{root}|pCubeShape{root[-1]}"]
+    
+    slots, face_slots = scene.mesh_shading(scene.nodes[1], 4)
+    full_slots, full_face_slots = full_scene.mesh_shading(find_node(full_scene, scene.nodes[1].name), 4)
+    assert slots == full_slots
+    assert face_slots.tolist() == full_face_slots.tolist()
+    assert all(scene.materials[name] == full_scene.materials[name] for name in slots if name)
+    
+    # the connections of the meshes that weren't selected are left out
+    assert not scene.connections.outputs("pCubeShape2")
+
+
+def test_selection_keeps_animation(scene_directory):
+    filepath = str(scene_directory / "animated.ma")
+    full_scene = maya_scene.parse_scene(filepath)
+    scene = maya_scene.parse_scene(filepath, selection=maya_scene_index.NodeSelection(root="child"))
+    
+    transform = find_node(scene, "pCube1")
+    assert scene.node_animation(transform) == full_scene.node_animation(find_node(full_scene, "pCube1"))
+    assert scene.node_animation(transform) == [
+        ("location", 0, "pCube1_translateX"),
+        ("rotation_euler", 1, "pCube1_rotateY"),
+    ]
+    
+    keys = scene.anim_curve_keys("pCube1_translateX", 24)
+    full_keys = full_scene.anim_curve_keys("pCube1_translateX", 24)
+    assert all(np.array_equal(a, b) for a, b in zip(keys, full_keys))
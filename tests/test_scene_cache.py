@@ -0,0 +1,143 @@
+"""
+maya_scene_cache.ParseCache, stored scenes have to come back the same as they were parsed
+"""
+
+import os
+import shutil
+import threading
+
+import pytest
+
+from conftest import data_path
+from io_scene_maya import maya_scene
+from io_scene_maya import maya_scene_cache
+from test_scene import SCENE_FILES, scene_data
+
+
+@pytest.mark.parametrize("name", SCENE_FILES)
+def test_round_trip(tmp_path, name):
+    filepath = data_path(name)
+    scene = maya_scene.parse_scene(filepath)
+    
+    cache = maya_scene_cache.ParseCache(str(tmp_path / "cache"))
+    assert cache.load(filepath, {}) is None
+    cache.store(filepath, {}, scene)
+    assert cache.contains(filepath, {})
+    
+    cached_scene = cache.load(filepath, {})
+    assert cached_scene.filepath == filepath
+    assert scene_data(cached_scene) == scene_data(scene)
+    
+    # the nodes are linked up again, not just their names
+    for node in cached_scene.nodes:
+        assert node.parent is None or node in node.parent.children
+
+
+def test_options_and_changes_miss(tmp_path):
+    filepath = str(tmp_path / "cube.ma")
+    shutil.copy(data_path("cube.ma"), filepath)
+    
+    cache = maya_scene_cache.ParseCache(str(tmp_path / "cache"))
+    cache.store(filepath, {}, maya_scene.parse_scene(filepath))
+    assert not cache.contains(filepath, {"import_uvs": False})
+    
+    with open(filepath, "a") as f:
+        f.write("\n")
+    assert cache.load(filepath, {}) is None
+
+
+def test_unreadable_entry(tmp_path):
+    filepath = data_path("cube.ma")
+    cache = maya_scene_cache.ParseCache(str(tmp_path / "cache"))
+    cache.store(filepath, {}, maya_scene.parse_scene(filepath))
+    
+    with open(cache._entry_path(cache.key(filepath, {})), "wb") as f:
+        f.write(b"not an npz")
+    
+    assert cache.load(filepath, {}) is None
+    assert not cache.contains(filepath, {})
+
+
+def cube_copies(tmp_path, count):
+    filepaths = [str(tmp_path / f"cube{number}.ma") for number in range(count)]
+    for filepath in filepaths:
+        shutil.copy(data_path("cube.ma"), filepath)
+    return filepaths
+
+
+def test_eviction_counts_every_entry(tmp_path):
+    filepaths = cube_copies(tmp_path, 2)
+    scene = maya_scene.parse_scene(filepaths[0])
+    
+    cache = maya_scene_cache.ParseCache(str(tmp_path / "cache"))
+    cache.store(filepaths[0], {}, scene)
+    entry_size = os.path.getsize(cache._entry_path(cache.key(filepaths[0], {})))
+    
+    # an entry the index doesn't know about, as when another process' index write got lost
+    orphan_path = cache._entry_path("0" * 40)
+    with open(orphan_path, "wb") as f:
+        f.write(b"0" * entry_size)
+    
+    cache.max_size = 2 * entry_size
+    cache.store(filepaths[1], {}, scene)
+    assert not os.path.exists(orphan_path)
+    assert all(cache.contains(filepath, {}) for filepath in filepaths)
+    assert sorted(cache._read_index()) == sorted(cache.key(filepath, {}) for filepath in filepaths)
+    
+    cache.clear()
+    assert not any(name.endswith(".npz") for name in os.listdir(cache.directory))
+
+
+def test_index_lock(tmp_path):
+    filepath = data_path("cube.ma")
+    scene = maya_scene.parse_scene(filepath)
+    
+    cache = maya_scene_cache.ParseCache(str(tmp_path / "cache"))
+    os.makedirs(cache.directory)
+    with cache._index_lock():
+        thread = threading.Thread(target=cache.store, args=(filepath, {}, scene))
+        thread.start()
+        thread.join(0.2)
+        
+        # the entry is written, the index waits for the lock
+        assert thread.is_alive()
+        assert cache.contains(filepath, {})
+        assert cache._read_index() == {}
+    
+    thread.join()
+    assert list(cache._read_index()) == [cache.key(filepath, {})]
+    assert not os.path.exists(os.path.join(cache.directory, maya_scene_cache.INDEX_LOCK_FILE_NAME))
+
+
+def test_stale_index_lock(tmp_path):
+    filepath = data_path("cube.ma")
+    cache = maya_scene_cache.ParseCache(str(tmp_path / "cache"))
+    os.makedirs(cache.directory)
+    
+    lock_path = os.path.join(cache.directory, maya_scene_cache.INDEX_LOCK_FILE_NAME)
+    open(lock_path, "w").close()
+    stale_time = os.path.getmtime(lock_path) - maya_scene_cache.INDEX_LOCK_TIMEOUT - 1
+    os.utime(lock_path, (stale_time, stale_time))
+    
+    cache.store(filepath, {}, maya_scene.parse_scene(filepath))
+    assert cache.key(filepath, {}) in cache._read_index()
+
+
+def test_concurrent_stores(tmp_path):
+    filepaths = cube_copies(tmp_path, 16)
+    scene = maya_scene.parse_scene(filepaths[0])
+    cache = maya_scene_cache.ParseCache(str(tmp_path / "cache"))
+    
+    def store(filepaths):
+        for filepath in filepaths:
+            cache.store(filepath, {}, scene)
+            cache.load(filepath, {})
+    
+    threads = [threading.Thread(target=store, args=(filepaths[number::4],)) for number in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    # none of the index writes got lost
+    assert sorted(cache._read_index()) == sorted(cache.key(filepath, {}) for filepath in filepaths)
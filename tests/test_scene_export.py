@@ -0,0 +1,106 @@
+"""
+maya_scene_export and the command line converter (python -m io_scene_maya) that writes with it
+"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from conftest import data_path
+from io_scene_maya import __main__ as converter
+from io_scene_maya import maya_scene
+from io_scene_maya import maya_scene_cache
+from io_scene_maya import maya_scene_export
+
+
+def test_output_stems():
+    filepaths = [
+        os.path.join("assets", "props", "crate.ma.gz"),
+        os.path.join("assets", "chars", "hero.ma"),
+        os.path.join("assets", "chars", "hero.mb"),
+    ]
+    stems = maya_scene_export.output_stems(filepaths, "out")
+    
+    # the folders below the common one are kept, files that would land on the same stem keep their extension
+    assert stems == [
+        os.path.join("out", "props", "crate"),
+        os.path.join("out", "chars", "hero.ma"),
+        os.path.join("out", "chars", "hero.mb"),
+    ]
+
+
+def test_output_stems_in_other_folders():
+    filepaths = [os.path.join("a", "crate.ma"), os.path.join("b", "crate.ma")]
+    assert maya_scene_export.output_stems(filepaths, "out") == [
+        os.path.join("out", "a", "crate"),
+        os.path.join("out", "b", "crate"),
+    ]
+
+
+def test_convert_obj(tmp_path):
+    stem = str(tmp_path / "cube")
+    summary = maya_scene_export.convert_file(data_path("cube.ma"), stem)
+    assert summary["outputs"] == [stem + ".obj", stem + ".json"]
+    assert summary["meshes"] == 1
+    
+    with open(stem + ".obj") as f:
+        lines = f.read().splitlines()
+    assert sum(line.startswith("v ") for line in lines) == 8
+    assert sum(line.startswith("vt ") for line in lines) == 14
+    assert sum(line.startswith("f ") for line in lines) == 6
+    
+    with open(stem + ".json") as f:
+        hierarchy = json.load(f)
+    nodes = {node["long_name"]: node for node in hierarchy["nodes"]}
+    assert nodes["|pCube1"]["translate"] == [1, 2, 3]
+    assert nodes["|pCube1|pCubeShape1"]["vertices"] == 8
+    assert nodes["|pCube1|pCubeShape1"]["faces"] == 6
+
+
+def test_convert_npz(tmp_path):
+    stem = str(tmp_path / "cube")
+    summary = maya_scene_export.convert_file(data_path("cube.ma"), stem, output_format="npz")
+    assert summary["outputs"] == [stem + ".npz"]
+    
+    with np.load(stem + ".npz") as arrays:
+        scene = maya_scene_cache.scene_from_arrays(dict(arrays))
+    expected = maya_scene.parse_scene(data_path("cube.ma"))
+    assert [node.long_name for node in scene.nodes] == [node.long_name for node in expected.nodes]
+
+
+@pytest.mark.parametrize("workers, file_workers", [(1, 1), (3, 3), (None, os.cpu_count() or 1)])
+def test_convert_files_workers(monkeypatch, workers, file_workers):
+    converted = []
+    
+    def convert_file(filepath, stem, **options):
+        converted.append(options["workers"])
+        return {}
+    
+    # a single file is converted here, its byte ranges get the workers
+    monkeypatch.setattr(maya_scene_export, "convert_file", convert_file)
+    results = list(converter.convert_files([data_path("cube.ma")], ["cube"], workers, {}))
+    assert results == [(data_path("cube.ma"), {}, None)]
+    assert converted == [file_workers]
+
+
+def test_main(tmp_path):
+    output = str(tmp_path / "out")
+    assert converter.main([data_path("cube.ma"), data_path("shading.ma"), "-o", output, "-j", "1", "-q"]) == 0
+    assert sorted(os.listdir(output)) == ["cube.json", "cube.obj", "shading.json", "shading.obj"]
+
+
+def test_main_failures(tmp_path, capsys):
+    assert converter.main([str(tmp_path / "*.ma")]) == 1
+    assert "No files found" in capsys.readouterr().out
+    
+    # an .mb that isn't one
+    broken_filepath = str(tmp_path / "broken.mb")
+    with open(broken_filepath, "w") as f:
+        f.write("//Maya ASCII 2022 scene\n")
+    
+    assert converter.main([data_path("cube.ma"), broken_filepath, "-o", str(tmp_path / "out"), "-j", "1"]) == 1
+    out = capsys.readouterr().out
+    assert f"FAILED {broken_filepath}: MayaBinaryError" in out
+    assert "Converted 1 of 2 file(s)" in out